@@ -4,14 +4,50 @@ from langchain_openai import ChatOpenAI
 from crewai import Agent, Task, Crew, Process
 from crewai.memory import EntityMemory
 from crewai.memory.storage.rag_storage import RAGStorage
-from crewai_tools import MCPServerAdapter
 from mcp import StdioServerParameters
+from mcp_sessions import MCPSessionManager, SharedMCPSession
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from tool_cache import CachedTool, ToolResultCache
+from user_memory import (
+    UserMemoryCache,
+    restore_user_memory,
+    start_compaction_job,
+    user_memory_path,
+)
+import asyncio
 import os
 
 load_dotenv()
 mcp = FastMCP("multi-agent-server")
 
-def get_user_memory(user_id: str):
+airbnb_params = StdioServerParameters(command="npx", args=["-y", "@openbnb/mcp-server-airbnb", "--ignore-robots-txt"])
+
+# Started once and shared: stale cache entries are refreshed in the background after the request ends
+mcp_servers = MCPSessionManager(
+    [SharedMCPSession("airbnb", airbnb_params)],
+    health_interval=float(os.getenv("MCP_HEALTH_INTERVAL", "30")),
+)
+
+# Many users ask about the same destinations and dates: reuse tool results across requests
+tool_cache = ToolResultCache(
+    path=os.getenv("TOOL_CACHE_PATH", "./cache/tool_results.sqlite"),
+    ttls={
+        "airbnb_search": float(os.getenv("AIRBNB_SEARCH_TTL", "3600")),
+        "airbnb_listing_details": float(os.getenv("AIRBNB_LISTING_TTL", "21600")),
+    },
+    stale_ttl=float(os.getenv("TOOL_CACHE_STALE_TTL", "21600")),
+    max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "5000")),
+)
+llm = ChatOpenAI(model="gpt-4.1-mini")
+
+
+def cached_tools():
+    return [CachedTool.wrap(tool, tool_cache) for tool in mcp_servers.tools()]
+
+
+def open_user_memory(user_id: str):
+    restore_user_memory(user_id)
     return EntityMemory(
         storage=RAGStorage(
             embedder_config={
@@ -19,61 +55,76 @@ def get_user_memory(user_id: str):
                 "config": {"model": "text-embedding-3-small"},
             },
             type="short_term",
-            path=f"./memory_store/{user_id}/",
+            path=user_memory_path(user_id),
         )
     )
 
+
+# Opened memories are reused across requests; idle or least recently used ones are closed
+user_memories = UserMemoryCache(
+    open_user_memory,
+    max_entries=int(os.getenv("USER_MEMORY_CACHE_SIZE", "256")),
+    idle_timeout=float(os.getenv("USER_MEMORY_IDLE_TIMEOUT", "900")),
+)
+
+
+def get_user_memory(user_id: str):
+    return user_memories.get(user_id)
+
 @mcp.tool(name="multi_analyst")
 async def multi_analyst_tool(question: str, user_id: str) -> str:
     """Handle airbnb and DB questions using unified tool access."""
-    airbnb_params = StdioServerParameters(command="npx", args=["-y", "@openbnb/mcp-server-airbnb", "--ignore-robots-txt"])
-
-    mcp_adapters = []
-    try:
-        airbnb_adapter = MCPServerAdapter(airbnb_params)
-        mcp_adapters = [airbnb_adapter]
-
-        tools = airbnb_adapter.tools
-        llm = ChatOpenAI(model="gpt-4.1-mini")
-        memory = get_user_memory(user_id)
-
-        multi_analyst = Agent(
-            role="Professional Renting & Vacation Rental Analyst",
-            goal="Answer any question using airbnb and Supabase tools.",
-            backstory="Expert in SQL, renting, KPIs, and databases. Decides the best tool for each query.",
-            tools=tools,
-            verbose=True,
-            llm=llm,
-            allow_delegation=False,
-            memory=memory,
-        )
+    tools = await asyncio.to_thread(cached_tools)
+    memory = await asyncio.to_thread(get_user_memory, user_id)
 
-        task = Task(
-            description=f"Handle this user question: {question}",
-            expected_output="Useful response using the most suitable tool.",
-            tools=tools,
-            agent=multi_analyst,
-            memory=memory,
-        )
+    multi_analyst = Agent(
+        role="Professional Renting & Vacation Rental Analyst",
+        goal="Answer any question using airbnb and Supabase tools.",
+        backstory="Expert in SQL, renting, KPIs, and databases. Decides the best tool for each query.",
+        tools=tools,
+        verbose=True,
+        llm=llm,
+        allow_delegation=False,
+        memory=memory,
+    )
 
-        crew = Crew(
-            agents=[multi_analyst],
-            tasks=[task],
-            process=Process.sequential,
-            memory=True,
-            entity_memory=memory,
-            verbose=True,
-        )
+    task = Task(
+        description=f"Handle this user question: {question}",
+        expected_output="Useful response using the most suitable tool.",
+        tools=tools,
+        agent=multi_analyst,
+        memory=memory,
+    )
 
-        result = await crew.kickoff_async()
-        return result
-    finally:
-        for adapter in mcp_adapters:
-            try:
-                adapter.stop()
-            except Exception:
-                pass
+    crew = Crew(
+        agents=[multi_analyst],
+        tasks=[task],
+        process=Process.sequential,
+        memory=True,
+        entity_memory=memory,
+        verbose=True,
+    )
+
+    result = await crew.kickoff_async()
+    return result
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> JSONResponse:
+    return JSONResponse(
+        {
+            "tool_cache": tool_cache.stats(),
+            "user_memory": user_memories.stats(),
+            "mcp_servers": mcp_servers.stats(),
+        }
+    )
 
 
 if __name__ == "__main__":
+    mcp_servers.start()
+    start_compaction_job(
+        interval=float(os.getenv("USER_MEMORY_COMPACT_INTERVAL", "86400")),
+        stale_after=float(os.getenv("USER_MEMORY_STALE_AFTER", str(30 * 24 * 3600))),
+        cache=user_memories,
+    )
     mcp.run(transport="sse", host="127.0.0.1", port=8005)
\ No newline at end of file
@@ -0,0 +1,318 @@
+# Shared with the other MCP server: yfinance_mcp_server/src and airbnb_mcp_server/src
+# keep identical copies because each server is a standalone uv project run from its
+# src/ directory with sibling imports, so there is no common package to import from.
+# Change both copies together.
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai.tools import BaseTool
+from crewai_tools import MCPServerAdapter
+from mcp import StdioServerParameters
+
+logger = logging.getLogger(__name__)
+
+
+def _session_handles(
+    adapter: MCPServerAdapter,
+) -> Optional[Tuple[list, asyncio.AbstractEventLoop]]:
+    """
+    The MCP client sessions and event loop behind an MCPServerAdapter, used to
+    send MCP pings. crewai-tools has no public accessor for them (requirements.txt
+    pins the versions that have them); None if a release moved them.
+    """
+    inner = getattr(adapter, "_adapter", None)
+    sessions = getattr(inner, "sessions", None)
+    loop = getattr(inner, "loop", None)
+    if not sessions or loop is None:
+        return None
+    return sessions, loop
+
+
+class SharedMCPSession:
+    """
+    One MCP server subprocess shared by every request.
+
+    The adapter is started once and its tool list cached. Concurrent calls go
+    over the same MCP session (requests are multiplexed by id), and the session
+    is restarted when a ping fails, either in the background health check or
+    right after a failed tool call. A replaced adapter is stopped only once the
+    calls still running on it have returned (or after `drain_timeout`).
+
+    Pings go straight to the MCP session. If the installed crewai-tools/mcpadapt
+    does not expose it, the session still starts and is checked through its public
+    tools instead: `health_probe` names a cheap, side-effect-free tool call
+    (`(tool_name, arguments)`) to run as the ping. Without one the health is
+    unknown, so the background check skips the session and a failed tool call
+    restarts it for the next caller.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        params: StdioServerParameters,
+        ping_timeout: float = 10.0,
+        drain_timeout: float = 120.0,
+        health_probe: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ):
+        self.name = name
+        self.params = params
+        self.ping_timeout = ping_timeout
+        self.drain_timeout = drain_timeout
+        self.health_probe = health_probe
+        self._lock = threading.Lock()
+        self._adapter: Optional[MCPServerAdapter] = None
+        self._tools: Dict[str, BaseTool] = {}
+        self._wrapped: List[BaseTool] = []
+        # generation -> calls in flight; retired generation -> adapter to stop
+        self._in_flight: Dict[int, int] = {}
+        self._retired: Dict[int, MCPServerAdapter] = {}
+        self._probe_executor: Optional[ThreadPoolExecutor] = None
+        self._warned_no_ping = False
+        self.generation = 0
+        self.restarts = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._adapter is None:
+                self._start_locked()
+
+    def _start_locked(self) -> None:
+        started = time.perf_counter()
+        adapter = MCPServerAdapter(self.params)
+        tools = list(adapter.tools)
+        if not tools:
+            adapter.stop()
+            raise RuntimeError(f"MCP server '{self.name}' exposed no tools")
+        if _session_handles(adapter) is None and not self._warned_no_ping:
+            self._warned_no_ping = True
+            logger.warning(
+                f"MCPServerAdapter does not expose the MCP session of '{self.name}' "
+                f"(adapter._adapter.sessions/loop); "
+                + (
+                    f"checking health with the '{self.health_probe[0]}' tool instead"
+                    if self.health_probe
+                    else "health checks are skipped and failed calls restart the server"
+                )
+            )
+        self._adapter = adapter
+        self._tools = {tool.name: tool for tool in tools}
+        self.generation += 1
+        # Wrappers resolve the live tool on each call, so they survive restarts
+        self._wrapped = [SharedSessionTool.wrap(tool, self) for tool in tools]
+        logger.info(
+            f"MCP server '{self.name}' ready with {len(tools)} tools "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def _retire_locked(self) -> Optional[MCPServerAdapter]:
+        """Detach the current adapter; return it if nothing is using it anymore."""
+        adapter, self._adapter = self._adapter, None
+        if adapter is None:
+            return None
+        generation = self.generation
+        if not self._in_flight.get(generation):
+            return adapter
+        self._retired[generation] = adapter
+        timer = threading.Timer(self.drain_timeout, self._stop_retired, args=(generation,))
+        timer.daemon = True
+        timer.start()
+        return None
+
+    def _stop_retired(self, generation: int) -> None:
+        with self._lock:
+            adapter = self._retired.pop(generation, None)
+        if adapter is not None:
+            self._stop_adapter(adapter)
+
+    def _stop_adapter(self, adapter: MCPServerAdapter) -> None:
+        try:
+            adapter.stop()
+        except Exception as e:
+            logger.warning(f"Error stopping MCP server '{self.name}': {e}")
+
+    def stop(self) -> None:
+        with self._lock:
+            adapter, self._adapter = self._adapter, None
+            retired = list(self._retired.values())
+            self._retired.clear()
+            probe_executor, self._probe_executor = self._probe_executor, None
+        if probe_executor is not None:
+            probe_executor.shutdown(wait=False)
+        for old in [adapter, *retired]:
+            if old is not None:
+                self._stop_adapter(old)
+
+    def restart(self, generation: Optional[int] = None) -> None:
+        """Restart the subprocess; skipped if another caller already restarted `generation`."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            idle_adapter = self._retire_locked()
+            logger.warning(f"Restarting MCP server '{self.name}'")
+            self._start_locked()
+            self.restarts += 1
+        if idle_adapter is not None:
+            self._stop_adapter(idle_adapter)
+
+    @property
+    def tools(self) -> List[BaseTool]:
+        self.start()
+        return self._wrapped
+
+    def ping(self) -> Optional[bool]:
+        """
+        MCP ping over the live session(s), or the `health_probe` tool call when the
+        session is not reachable. False if the server stopped answering, None if
+        there is no way to tell.
+        """
+        adapter = self._adapter
+        if adapter is None:
+            return False
+        handles = _session_handles(adapter)
+        if handles is None and self.health_probe is None:
+            return None
+        try:
+            if handles is None:
+                self._run_probe()
+            else:
+                sessions, loop = handles
+                for session in sessions:
+                    asyncio.run_coroutine_threadsafe(session.send_ping(), loop).result(
+                        timeout=self.ping_timeout
+                    )
+            return True
+        except Exception as e:
+            logger.warning(f"Ping to MCP server '{self.name}' failed: {e}")
+            return False
+
+    def _run_probe(self) -> None:
+        tool_name, arguments = self.health_probe
+        generation, tool = self._checkout(tool_name)
+        try:
+            # Tool calls block without a timeout of their own
+            if self._probe_executor is None:
+                self._probe_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f"mcp-probe-{self.name}"
+                )
+            self._probe_executor.submit(tool.run, **arguments).result(
+                timeout=self.ping_timeout
+            )
+        finally:
+            self._checkin(generation)
+
+    def _checkout(self, tool_name: str) -> Tuple[int, BaseTool]:
+        with self._lock:
+            if self._adapter is None:
+                self._start_locked()
+            generation = self.generation
+            self._in_flight[generation] = self._in_flight.get(generation, 0) + 1
+            return generation, self._tools[tool_name]
+
+    def _checkin(self, generation: int) -> None:
+        with self._lock:
+            remaining = self._in_flight.get(generation, 1) - 1
+            if remaining > 0:
+                self._in_flight[generation] = remaining
+                return
+            self._in_flight.pop(generation, None)
+            adapter = self._retired.pop(generation, None)
+        if adapter is not None:
+            self._stop_adapter(adapter)
+
+    def call(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        for attempt in range(2):
+            generation, tool = self._checkout(tool_name)
+            try:
+                return tool.run(**arguments)
+            except Exception:
+                # Tool errors are returned as-is; only a dead session is restarted
+                if attempt:
+                    raise
+                alive = self.ping()
+                if alive:
+                    raise
+                if alive is None:
+                    # Health unknown: give the next call a fresh session, but do
+                    # not resend a call that may have reached the server
+                    self._restart_quietly(generation)
+                    raise
+            finally:
+                self._checkin(generation)
+            self.restart(generation)
+
+    def _restart_quietly(self, generation: int) -> None:
+        try:
+            self.restart(generation)
+        except Exception as e:
+            logger.error(f"Restart of MCP server '{self.name}' failed: {e}")
+
+
+class SharedSessionTool(BaseTool):
+    """Delegates to the current tool of a SharedMCPSession with the same name."""
+
+    session: Any = None
+    tool_name: str = ""
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, session: SharedMCPSession) -> "SharedSessionTool":
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            session=session,
+            tool_name=tool.name,
+        )
+
+    def _run(self, **kwargs: Any) -> Any:
+        return self.session.call(self.tool_name, kwargs)
+
+
+class MCPSessionManager:
+    """Starts the shared sessions at boot and health-checks them in the background."""
+
+    def __init__(self, sessions: List[SharedMCPSession], health_interval: float = 30.0):
+        self.sessions = {session.name: session for session in sessions}
+        self.health_interval = health_interval
+        self._health_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        for session in self.sessions.values():
+            try:
+                session.start()
+            except Exception as e:
+                # Retried on first use and by the health check
+                logger.error(f"Could not start MCP server '{session.name}': {e}")
+        if self._health_thread is None:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, name="mcp-health", daemon=True
+            )
+            self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        while True:
+            time.sleep(self.health_interval)
+            for session in self.sessions.values():
+                # None: no way to check this session, failed calls restart it instead
+                if session.ping() is not False:
+                    continue
+                try:
+                    session.restart(session.generation)
+                except Exception as e:
+                    logger.error(f"Restart of MCP server '{session.name}' failed: {e}")
+
+    def tools(self) -> List[BaseTool]:
+        return [tool for session in self.sessions.values() for tool in session.tools]
+
+    def stop(self) -> None:
+        for session in self.sessions.values():
+            session.stop()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"generation": s.generation, "restarts": s.restarts, "tools": len(s._tools)}
+            for name, s in self.sessions.items()
+        }
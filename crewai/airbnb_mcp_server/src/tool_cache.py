@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set, Tuple
+
+from crewai.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_args(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty values and case/whitespace differences so equivalent searches share a key."""
+    normalized = {}
+    for key, value in sorted(arguments.items()):
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, str):
+            value = re.sub(r"\s+", " ", value).strip().casefold()
+        normalized[key] = value
+    return normalized
+
+
+def cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        [tool_name, normalize_args(arguments)], sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Plain-text failures as returned by MCP tools/crewai ("Error executing tool ...")
+_ERROR_TEXT = re.compile(r"^\s*(error|exception|traceback|failed|erro)\b", re.IGNORECASE)
+
+
+def _is_error(result: Any) -> bool:
+    """Results that must not be cached: empty output, JSON errors or error text."""
+    if result is None:
+        return True
+    if not isinstance(result, str):
+        return False
+    if not result.strip() or _ERROR_TEXT.match(result):
+        return True
+    try:
+        parsed = json.loads(result)
+    except ValueError:
+        return False
+    return isinstance(parsed, dict) and ("error" in parsed or parsed.get("isError") is True)
+
+
+class ToolResultCache:
+    """
+    SQLite-backed cache of MCP tool results.
+
+    An entry is fresh for its tool's TTL and stale for `stale_ttl` seconds more;
+    stale entries are still served while a background call refreshes them. Older
+    entries are misses. The table is trimmed to `max_entries` by last use.
+    Hits only record their access time in memory; it is written with the next
+    `put` (or every `touch_batch` hits), so reads do not commit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 3600.0,
+        stale_ttl: float = 6 * 3600.0,
+        max_entries: int = 5000,
+        revalidate_workers: int = 2,
+        touch_batch: int = 256,
+    ):
+        self.path = path
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._touched: Dict[str, float] = {}
+        self.touch_batch = touch_batch
+        self._executor = ThreadPoolExecutor(
+            max_workers=revalidate_workers, thread_name_prefix="tool-cache-revalidate"
+        )
+        self.stats_counts = {"hits": 0, "stale_hits": 0, "misses": 0, "revalidations": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_results ("
+            " key TEXT PRIMARY KEY, tool TEXT, arguments TEXT, result TEXT,"
+            " created_at REAL, last_used REAL)"
+        )
+        self._conn.commit()
+
+    def ttl(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def get(self, tool_name: str, arguments: Dict[str, Any]) -> Tuple[Optional[str], str]:
+        """Return (result, "fresh" | "stale" | "miss")."""
+        key = cache_key(tool_name, arguments)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM tool_results WHERE key = ?", (key,)
+            ).fetchone()
+            age = now - row[1] if row else None
+            if row is None or age > self.ttl(tool_name) + self.stale_ttl:
+                self.stats_counts["misses"] += 1
+                return None, "miss"
+            self._touched[key] = now
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touches_locked()
+                self._conn.commit()
+            if age <= self.ttl(tool_name):
+                self.stats_counts["hits"] += 1
+                return row[0], "fresh"
+            self.stats_counts["stale_hits"] += 1
+            return row[0], "stale"
+
+    def _flush_touches_locked(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE tool_results SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def put(self, tool_name: str, arguments: Dict[str, Any], result: str) -> None:
+        now = time.time()
+        with self._lock:
+            # LRU trimming below needs the access times of recent hits
+            self._flush_touches_locked()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_results VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    cache_key(tool_name, arguments),
+                    tool_name,
+                    json.dumps(normalize_args(arguments), default=str),
+                    result,
+                    now,
+                    now,
+                ),
+            )
+            self._conn.execute(
+                "DELETE FROM tool_results WHERE key IN ("
+                " SELECT key FROM tool_results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def revalidate(self, tool_name: str, arguments: Dict[str, Any], fetch) -> None:
+        """Refresh a stale entry in the background; one refresh per key at a time."""
+        key = cache_key(tool_name, arguments)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.stats_counts["revalidations"] += 1
+
+        def refresh() -> None:
+            try:
+                result = fetch()
+                if not _is_error(result):
+                    self.put(tool_name, arguments, str(result))
+            except Exception as e:
+                logger.warning(f"Revalidation of {tool_name} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM tool_results").fetchone()[0]
+            counts = dict(self.stats_counts)
+        lookups = counts["hits"] + counts["stale_hits"] + counts["misses"]
+        served = counts["hits"] + counts["stale_hits"]
+        return {
+            **counts,
+            "entries": entries,
+            "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+        }
+
+
+class CachedTool(BaseTool):
+    """Wraps an MCP tool so its results are served from a ToolResultCache."""
+
+    inner_tool: Any = None
+    cache: Any = None
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, cache: ToolResultCache) -> "CachedTool":
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            inner_tool=tool,
+            cache=cache,
+        )
+
+    def _run(self, **kwargs: Any) -> Any:
+        cached, state = self.cache.get(self.name, kwargs)
+        if state == "stale":
+            self.cache.revalidate(self.name, kwargs, lambda: self.inner_tool.run(**kwargs))
+        if cached is not None:
+            return cached
+
+        result = self.inner_tool.run(**kwargs)
+        if not _is_error(result):
+            self.cache.put(self.name, kwargs, str(result))
+        return result
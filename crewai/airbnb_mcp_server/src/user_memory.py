@@ -0,0 +1,320 @@
+# Shared with the other MCP server: yfinance_mcp_server/src and airbnb_mcp_server/src
+# keep identical copies because each server is a standalone uv project run from its
+# src/ directory with sibling imports, so there is no common package to import from.
+# Change both copies together.
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MEMORY_ROOT = "./memory_store"
+ARCHIVE_DIR = os.path.join(MEMORY_ROOT, "_archive")
+ARCHIVE_COLLECTION = "archived_user_memories"
+SAFE_USER_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+STORE_LOCK_STRIPES = 64
+
+
+def store_name(user_id: str) -> str:
+    """
+    Directory name of a user's store. Ids that are already safe are kept as-is;
+    anything else ("john.doe", "../x", "_archive") maps to a hash, so two users
+    never share a store. The "id." prefix cannot collide with a kept id.
+    """
+    if SAFE_USER_ID.fullmatch(user_id):
+        return user_id
+    return "id." + hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:40]
+
+
+def user_memory_path(user_id: str) -> str:
+    return os.path.join(MEMORY_ROOT, store_name(user_id)) + "/"
+
+
+def _close_memory(memory: Any) -> None:
+    """Best-effort release of the Chroma client behind an EntityMemory."""
+    storage = getattr(memory, "storage", None)
+    for attr in ("app", "client", "_client"):
+        client = getattr(storage, attr, None)
+        if client is None:
+            continue
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logger.debug(f"Error closing memory client: {e}")
+        return
+
+
+def _release_chroma_system(path: str) -> None:
+    """
+    Drop the chromadb system cached for `path`, so a later PersistentClient on the
+    same path opens the files again instead of reusing handles to deleted ones.
+    Only this path is evicted: clear_system_cache() would break open clients.
+    """
+    from chromadb.api.client import SharedSystemClient
+
+    systems = SharedSystemClient._identifier_to_system
+    for identifier in (path.rstrip("/"), path.rstrip("/") + "/"):
+        system = systems.pop(identifier, None)
+        if system is not None:
+            try:
+                system.stop()
+            except Exception as e:
+                logger.debug(f"Error stopping chroma system for {path}: {e}")
+
+
+class UserMemoryCache:
+    """
+    LRU cache of opened per-user memories.
+
+    At most `max_entries` memories stay open; the least recently used one is closed
+    when a new user arrives, and a background thread closes memories idle for more
+    than `idle_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        max_entries: int = 256,
+        idle_timeout: float = 900.0,
+    ):
+        self.factory = factory
+        self.max_entries = max_entries
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._reaper: Optional[threading.Thread] = None
+        self._store_locks = [threading.Lock() for _ in range(STORE_LOCK_STRIPES)]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def store_lock(self, name: str) -> threading.Lock:
+        """
+        Lock held while a store is opened and while compaction inspects and
+        deletes it, so a user cannot open a store that is being compacted.
+        """
+        digest = hashlib.sha256(name.encode("utf-8")).digest()
+        return self._store_locks[digest[0] % STORE_LOCK_STRIPES]
+
+    def get(self, user_id: str) -> Any:
+        self._ensure_reaper()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (entry[0], time.monotonic())
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Opening a store is slow: do it outside the cache lock, under the store's lock
+        evicted = []
+        with self.store_lock(store_name(user_id)):
+            memory = self.factory(user_id)
+            with self._lock:
+                current = self._entries.get(user_id)
+                if current is not None:
+                    evicted.append(memory)
+                    memory = current[0]
+                self._entries[user_id] = (memory, time.monotonic())
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    evicted.append(self._entries.popitem(last=False)[1][0])
+                    self.evictions += 1
+        for stale in evicted:
+            _close_memory(stale)
+        return memory
+
+    def is_open(self, name: str) -> bool:
+        """Whether the store directory `name` belongs to an open memory."""
+        with self._lock:
+            return any(store_name(user_id) == name for user_id in self._entries)
+
+    def evict_idle(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                user_id
+                for user_id, (_, last_used) in self._entries.items()
+                if now - last_used > self.idle_timeout
+            ]
+            memories = [self._entries.pop(user_id)[0] for user_id in idle]
+            self.evictions += len(idle)
+        for memory in memories:
+            _close_memory(memory)
+        return len(idle)
+
+    def _ensure_reaper(self) -> None:
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._reap_loop, name="user-memory-reaper", daemon=True
+                )
+                self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 1.0))
+            self.evict_idle()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "open": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# -----------------------------
+# Compaction of stale stores
+# -----------------------------
+def _archive_collection():
+    import chromadb
+
+    client = chromadb.PersistentClient(path=ARCHIVE_DIR)
+    return client.get_or_create_collection(ARCHIVE_COLLECTION)
+
+
+def _last_modified(path: str) -> float:
+    latest = os.path.getmtime(path)
+    for root, _, files in os.walk(path):
+        for name in files:
+            latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+    return latest
+
+
+def _archive_store(archive: Any, name: str, path: str) -> None:
+    import chromadb
+
+    client = chromadb.PersistentClient(path=path)
+    for collection in client.list_collections():
+        collection = client.get_collection(getattr(collection, "name", collection))
+        data = collection.get(include=["documents", "metadatas", "embeddings"])
+        if not data["ids"]:
+            continue
+        archive.upsert(
+            ids=[f"{name}:{collection.name}:{i}" for i in data["ids"]],
+            documents=data["documents"],
+            embeddings=data["embeddings"],
+            metadatas=[
+                {**(m or {}), "_user_id": name, "_collection": collection.name}
+                for m in data["metadatas"]
+            ],
+        )
+
+
+def compact_stale_memories(
+    stale_after: float = 30 * 24 * 3600,
+    cache: Optional[UserMemoryCache] = None,
+) -> int:
+    """
+    Merge per-user stores untouched for `stale_after` seconds into one shared
+    archive collection and delete their directories. Archived entries are moved
+    back by `restore_user_memory` when the user returns.
+
+    With `cache`, each store is checked and deleted under the store's lock, so
+    open stores and stores being opened are skipped.
+
+    Returns the number of user stores compacted.
+    """
+    if not os.path.isdir(MEMORY_ROOT):
+        return 0
+    archive = _archive_collection()
+    now = time.time()
+    compacted = 0
+
+    for name in sorted(os.listdir(MEMORY_ROOT)):
+        path = os.path.join(MEMORY_ROOT, name)
+        if name.startswith("_") or not os.path.isdir(path):
+            continue
+        lock = cache.store_lock(name) if cache is not None else nullcontext()
+        with lock:
+            if cache is not None and cache.is_open(name):
+                continue
+            if now - _last_modified(path) < stale_after:
+                continue
+            _archive_store(archive, name, path)
+            # Close the cached client before its files go away
+            _release_chroma_system(path)
+            shutil.rmtree(path, ignore_errors=True)
+        compacted += 1
+
+    logger.info(f"Compacted {compacted} stale user memory store(s)")
+    return compacted
+
+
+def restore_user_memory(user_id: str) -> int:
+    """Move a compacted user's entries from the archive back into their own store."""
+    import chromadb
+
+    path = user_memory_path(user_id)
+    if os.path.isdir(path) or not os.path.isdir(ARCHIVE_DIR):
+        return 0
+    safe_id = store_name(user_id)
+    archive = _archive_collection()
+    data = archive.get(
+        where={"_user_id": safe_id}, include=["documents", "metadatas", "embeddings"]
+    )
+    if not data["ids"]:
+        return 0
+
+    client = chromadb.PersistentClient(path=path)
+    by_collection: Dict[str, Dict[str, list]] = {}
+    for archived_id, document, metadata, embedding in zip(
+        data["ids"], data["documents"], data["metadatas"], data["embeddings"]
+    ):
+        metadata = dict(metadata)
+        name = metadata.pop("_collection")
+        metadata.pop("_user_id", None)
+        batch = by_collection.setdefault(
+            name, {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        )
+        batch["ids"].append(archived_id.split(":", 2)[2])
+        batch["documents"].append(document)
+        batch["metadatas"].append(metadata or None)
+        batch["embeddings"].append(embedding)
+    for name, batch in by_collection.items():
+        client.get_or_create_collection(name).add(**batch)
+    archive.delete(ids=data["ids"])
+    logger.info(f"Restored {len(data['ids'])} archived memories for user {safe_id}")
+    return len(data["ids"])
+
+
+def start_compaction_job(
+    interval: float,
+    stale_after: float,
+    cache: Optional[UserMemoryCache] = None,
+) -> Optional[threading.Thread]:
+    """Run `compact_stale_memories` every `interval` seconds (0 disables)."""
+    if interval <= 0:
+        return None
+
+    def loop() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                compact_stale_memories(stale_after, cache)
+            except Exception as e:
+                logger.error(f"User memory compaction failed: {e}")
+
+    thread = threading.Thread(target=loop, name="user-memory-compaction", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    compact_stale_memories(
+        stale_after=float(os.getenv("USER_MEMORY_STALE_AFTER", str(30 * 24 * 3600)))
+    )
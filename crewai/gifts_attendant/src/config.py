@@ -16,6 +16,16 @@ class Settings(BaseSettings):
     # Data paths
     CATALOG_INDEX: str = Field(default="data/catalog.csv")
     PRICING_RULES_JSON: str = Field(default="data/pricing_rules.json")
+    CATALOG_RELOAD_INTERVAL: float = Field(
+        default=2.0, description="Seconds between checks for catalog/pricing file changes"
+    )
+
+    # Fast-path intent routing
+    INTENT_NLU_PATH: str = Field(default="data/rasa_nlu.yml")
+    FAST_PATH_ENABLED: bool = Field(default=True, description="Answer simple intents without the crew")
+    ROUTER_MIN_CONFIDENCE: float = Field(
+        default=0.7, description="Below this share of the intent score, messages go to the crew"
+    )
 
     # Networking / API
     HOST: str = Field(default="0.0.0.0")
@@ -6,9 +6,24 @@ from src.tools.catalog_tool import CatalogQueryTool
 from src.tools.pricing_tool import PricingTool
 from src.config import settings
 
-def create_crew() -> Crew:
-    catalog_tool = CatalogQueryTool(catalog_path=settings.CATALOG_INDEX)
-    pricing_tool = PricingTool(pricing_rules_path=settings.PRICING_RULES_JSON)
+def create_tools():
+    """Catalog and pricing tools, shared by the crew and the webhook fast path."""
+    catalog_tool = CatalogQueryTool(
+        catalog_path=settings.CATALOG_INDEX,
+        pricing_rules_path=settings.PRICING_RULES_JSON,
+        reload_interval=settings.CATALOG_RELOAD_INTERVAL,
+    )
+    pricing_tool = PricingTool(
+        catalog_path=settings.CATALOG_INDEX,
+        pricing_rules_path=settings.PRICING_RULES_JSON,
+        reload_interval=settings.CATALOG_RELOAD_INTERVAL,
+    )
+    return catalog_tool, pricing_tool
+
+
+def create_crew(catalog_tool=None, pricing_tool=None) -> Crew:
+    if catalog_tool is None or pricing_tool is None:
+        catalog_tool, pricing_tool = create_tools()
 
     dialog_agent = DialogAgent(name="dialog-agent")
     catalog_agent = CatalogAgent(name="catalog-agent", tools=[catalog_tool])
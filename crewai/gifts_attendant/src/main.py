@@ -1,9 +1,11 @@
 import logging
 import asyncio
+import time
 from fastapi import FastAPI
 from pydantic import BaseModel
 from src.config import settings
-from src.crew import create_crew
+from src.crew import create_crew, create_tools
+from src.router import IntentRouter, LatencyMetrics, MessageDispatcher
 
 # -----------------------------------------------------------------------------
 # Logging setup
@@ -23,7 +25,26 @@ app = FastAPI(
     description="CrewAI-based assistant to handle brinde catalog and pricing inquiries."
 )
 
-crew = create_crew()
+catalog_tool, pricing_tool = create_tools()
+crew = create_crew(catalog_tool, pricing_tool)
+
+# -----------------------------------------------------------------------------
+# Fast path: simple intents are answered from the tools, without the crew
+# -----------------------------------------------------------------------------
+def _is_catalog_word(word: str) -> bool:
+    return bool(catalog_tool.engine.snapshot.catalog_words(word))
+
+
+dispatcher = MessageDispatcher(
+    IntentRouter.from_nlu(
+        settings.INTENT_NLU_PATH,
+        is_catalog_word=_is_catalog_word,
+        min_confidence=settings.ROUTER_MIN_CONFIDENCE,
+    ),
+    catalog_tool,
+    pricing_tool,
+)
+latency = LatencyMetrics()
 
 # -----------------------------------------------------------------------------
 # Pydantic model
@@ -41,14 +62,36 @@ class IncomingMessage(BaseModel):
 async def webhook(msg: IncomingMessage):
     logger.info(f"📩 Incoming message: {msg.sender} -> {msg.text}")
 
+    started = time.perf_counter()
+    path = "crew"
     try:
         loop = asyncio.get_running_loop()
+        answer = None
+        if settings.FAST_PATH_ENABLED:
+            try:
+                answer = await loop.run_in_executor(None, dispatcher.dispatch, msg.text)
+            except Exception:
+                # The crew can still answer if the fast path breaks
+                logger.exception("❌ Fast path failed, escalating to the crew")
+            if answer is not None:
+                path = answer["path"]
+                logger.info(f"⚡ Fast path ({path}): {answer['result']}")
+                return {"ok": True, **answer}
+
         result = await loop.run_in_executor(None, crew.kickoff, msg.text)
         logger.info(f"✅ CrewAI result: {result}")
-        return {"ok": True, "result": result}
+        return {"ok": True, "path": path, "result": result}
     except Exception as e:
         logger.exception("❌ Error processing task")
+        path = f"{path}_error"
         return {"ok": False, "error": str(e)}
+    finally:
+        latency.observe(path, time.perf_counter() - started)
+
+
+@app.get("/metrics")
+def metrics():
+    return {"latency": latency.stats()}
 
 
 @app.get("/health")
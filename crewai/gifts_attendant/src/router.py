@@ -0,0 +1,229 @@
+import logging
+import math
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+import yaml
+
+from src.tools.catalog_engine import tokenize
+
+logger = logging.getLogger("crewai-brindes.router")
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+# Words allowed around an e-mail for the message to count as just providing it
+MAX_EMAIL_MESSAGE_WORDS = 4
+
+# Cue phrases added to the NLU examples: data/rasa_nlu.yml has no "how much" style
+# examples, and those are most of the inbound traffic
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    "request_quote": [
+        "quanto custa",
+        "quanto sai",
+        "qual o preço",
+        "qual o valor unitário",
+        "preço de 100 unidades",
+        "quero uma cotação",
+        "how much is it",
+        "price for 100 units",
+        "i need a quote",
+    ],
+    "ask_catalog": [
+        "quais produtos vocês têm",
+        "quais opções de brindes",
+        "me manda a lista de produtos",
+        "show me the catalog",
+        "which products do you have",
+    ],
+}
+
+STOPWORDS: Set[str] = {
+    "a", "o", "as", "os", "um", "uma", "de", "da", "do", "das", "dos", "e", "em",
+    "no", "na", "com", "para", "pra", "por", "me", "eu", "voce", "voces", "vc",
+    "the", "an", "of", "to", "for", "is", "it", "i", "you", "please",
+}
+
+
+def load_nlu_examples(path: str) -> Dict[str, List[str]]:
+    """Read `intent -> examples` from a Rasa NLU file (version 3 format)."""
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    examples: Dict[str, List[str]] = {}
+    for item in data.get("nlu", []):
+        if "intent" not in item:
+            continue
+        lines = (line.strip() for line in str(item.get("examples", "")).splitlines())
+        examples.setdefault(item["intent"], []).extend(
+            line[2:].strip() for line in lines if line.startswith("- ")
+        )
+    return examples
+
+
+@dataclass
+class IntentPrediction:
+    intent: Optional[str]
+    confidence: float
+    scores: Dict[str, float]
+
+
+class IntentRouter:
+    """
+    Keyword-weighted intent classifier trained from Rasa NLU examples.
+
+    Each intent keeps, per feature, the fraction of its examples containing it,
+    weighted by how specific the feature is to that intent (idf across intents).
+    Product names are entities, not intent cues, so words found in the catalog are
+    dropped before training and scoring. Numbers become a single "#num" feature.
+    Confidence is the best intent's share of the score times the share of the
+    message's features the router knows. Messages whose best intent is weak, close
+    to the runner-up, mostly made of unknown words or backed only by a number get
+    intent None and are escalated to the crew.
+    """
+
+    def __init__(
+        self,
+        examples: Dict[str, List[str]],
+        is_catalog_word: Callable[[str], bool] = lambda word: False,
+        min_score: float = 0.3,
+        min_confidence: float = 0.7,
+    ):
+        self.is_catalog_word = is_catalog_word
+        self.min_score = min_score
+        self.min_confidence = min_confidence
+
+        document_frequency: Dict[str, Dict[str, int]] = {}
+        for intent, texts in examples.items():
+            counts = document_frequency.setdefault(intent, {})
+            for text in texts:
+                for feature in self.features(text):
+                    counts[feature] = counts.get(feature, 0) + 1
+
+        intents_with: Dict[str, int] = {}
+        for counts in document_frequency.values():
+            for feature in counts:
+                intents_with[feature] = intents_with.get(feature, 0) + 1
+
+        self.weights: Dict[str, Dict[str, float]] = {}
+        for intent, counts in document_frequency.items():
+            total = max(len(examples[intent]), 1)
+            self.weights[intent] = {
+                feature: (count / total)
+                * (1 + math.log(len(document_frequency) / intents_with[feature]))
+                for feature, count in counts.items()
+            }
+
+    @classmethod
+    def from_nlu(cls, path: str, **kwargs) -> "IntentRouter":
+        examples = load_nlu_examples(path)
+        for intent, seeds in SEED_EXAMPLES.items():
+            examples.setdefault(intent, []).extend(seeds)
+        return cls(examples, **kwargs)
+
+    def features(self, text: str) -> Set[str]:
+        features = set()
+        for token in tokenize(text):
+            if token.isdigit():
+                features.add("#num")
+            elif token not in STOPWORDS and not self.is_catalog_word(token):
+                features.add(token)
+        return features
+
+    def classify(self, text: str) -> IntentPrediction:
+        email = EMAIL_PATTERN.search(text)
+        if email:
+            # Only a bare e-mail ("meu email é x@y.com") is handled here; an e-mail
+            # inside a longer message (a complaint, a question) goes to the crew
+            rest = tokenize(text[: email.start()] + text[email.end():])
+            if len(rest) <= MAX_EMAIL_MESSAGE_WORDS:
+                return IntentPrediction("provide_email", 1.0, {"provide_email": 1.0})
+            return IntentPrediction(None, 0.0, {})
+
+        features = self.features(text)
+        scores = {
+            intent: sum(weights.get(feature, 0.0) for feature in features)
+            for intent, weights in self.weights.items()
+        }
+        best = max(scores, key=scores.get, default=None)
+        if best is None:
+            return IntentPrediction(None, 0.0, scores)
+        total = sum(scores.values())
+        # Unknown words count against the prediction: "Recebi 200 canetas com defeito"
+        # shares only "#num" with quote requests and must not be answered with a quote
+        known = {f for f in features if any(f in weights for weights in self.weights.values())}
+        coverage = len(known) / len(features) if features else 0.0
+        confidence = (scores[best] / total) * coverage if total else 0.0
+        cues = known - {"#num"}
+        if not cues or scores[best] < self.min_score or confidence < self.min_confidence:
+            return IntentPrediction(None, confidence, scores)
+        return IntentPrediction(best, confidence, scores)
+
+
+class LatencyMetrics:
+    """Request count and latency percentiles per webhook path (last `window` requests)."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def observe(self, path: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(path, deque(maxlen=self.window)).append(seconds)
+            self._counts[path] = self._counts.get(path, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        def percentile(values: List[float], p: float) -> float:
+            return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+        with self._lock:
+            snapshot = {path: sorted(samples) for path, samples in self._samples.items()}
+            counts = dict(self._counts)
+        return {
+            path: {
+                "count": counts[path],
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+            for path, values in snapshot.items()
+        }
+
+
+class MessageDispatcher:
+    """
+    Answers catalog, pricing and e-mail messages straight from the tool layer.
+    `dispatch` returns None when the message needs the crew.
+    """
+
+    def __init__(self, router: IntentRouter, catalog_tool, pricing_tool):
+        self.router = router
+        self.catalog_tool = catalog_tool
+        self.pricing_tool = pricing_tool
+
+    def dispatch(self, text: str) -> Optional[Dict[str, str]]:
+        prediction = self.router.classify(text)
+
+        if prediction.intent == "request_quote":
+            answer = self.pricing_tool.quote_message(text)
+            if answer is None:
+                # Quote for something we cannot identify: let the crew ask
+                return None
+            return {"path": "pricing", "intent": prediction.intent, "result": answer}
+
+        if prediction.intent == "ask_catalog":
+            products = self.catalog_tool.engine.find(text, limit=self.catalog_tool.limit)
+            if products:
+                answer = self.catalog_tool.format_products(products)
+            else:
+                answer = self.catalog_tool.list_catalog()
+            return {"path": "catalog", "intent": prediction.intent, "result": answer}
+
+        if prediction.intent == "provide_email":
+            email = EMAIL_PATTERN.search(text).group()
+            answer = f"Thanks, we have noted your e-mail: {email}."
+            return {"path": "email", "intent": prediction.intent, "result": answer}
+
+        return None
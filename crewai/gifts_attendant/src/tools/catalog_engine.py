@@ -0,0 +1,329 @@
+import bisect
+import csv
+import json
+import logging
+import os
+import threading
+import re
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("crewai-brindes.catalog")
+
+# -----------------------------------------------------------------------------
+# Text normalization
+# -----------------------------------------------------------------------------
+def normalize(text: str) -> str:
+    """Lowercase and strip accents, so "Anotações" matches "anotacoes"."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", normalize(text))
+
+
+def _postings(index: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    return {key: np.asarray(rows, dtype=np.int32) for key, rows in index.items()}
+
+
+# -----------------------------------------------------------------------------
+# Immutable snapshot of catalog + pricing rules
+# -----------------------------------------------------------------------------
+class CatalogSnapshot:
+    """
+    Columnar, indexed view of the catalog built once per file version.
+
+    Columns are parallel lists/arrays indexed by row. Lookups go through:
+    - `row_by_id`: product id -> row
+    - `tag_index`: tag -> sorted rows
+    - `token_index` + sorted `vocabulary`: exact and prefix search on name/short_desc
+    Pricing columns (`base_price`, `min_qty`, `lead_time_days`) are numpy arrays, so
+    quotes for many products/quantities are computed in one vectorized pass.
+    """
+
+    def __init__(self, products: List[Dict[str, str]], rules: Dict[str, Dict[str, float]]):
+        self.ids = [p["id"] for p in products]
+        self.names = [p["name"] for p in products]
+        self.short_descs = [p.get("short_desc", "") for p in products]
+        self.tags = [tokenize(p.get("tags", "")) for p in products]
+        self.price = np.array([float(p.get("price") or 0) for p in products], dtype=np.float64)
+        self.row_by_id = {product_id: row for row, product_id in enumerate(self.ids)}
+
+        # Products without a pricing rule are quoted at list price, no minimum, no lead time
+        self.base_price = np.array(
+            [float(rules.get(i, {}).get("base_price", price)) for i, price in zip(self.ids, self.price)],
+            dtype=np.float64,
+        )
+        self.min_qty = np.array(
+            [int(rules.get(i, {}).get("min_qty", 1)) for i in self.ids], dtype=np.int64
+        )
+        self.lead_time_days = np.array(
+            [int(rules.get(i, {}).get("lead_time_days", 0)) for i in self.ids], dtype=np.int64
+        )
+
+        tag_index: Dict[str, List[int]] = {}
+        token_index: Dict[str, List[int]] = {}
+        name_index: Dict[str, List[int]] = {}
+        for row in range(len(self.ids)):
+            for tag in set(self.tags[row]):
+                tag_index.setdefault(tag, []).append(row)
+            tokens = set(tokenize(self.names[row]))
+            for token in tokens:
+                name_index.setdefault(token, []).append(row)
+            for token in tokens | set(tokenize(self.short_descs[row])) | set(self.tags[row]):
+                token_index.setdefault(token, []).append(row)
+
+        self.tag_index = _postings(tag_index)
+        self.token_index = _postings(token_index)
+        self.vocabulary = sorted(self.token_index)
+        self.name_index = _postings(name_index)
+        self.name_vocabulary = sorted(self.name_index)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _rows_for_prefix(
+        prefix: str, vocabulary: List[str], index: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Union of the postings of every token starting with `prefix` (binary search on the vocabulary)."""
+        start = bisect.bisect_left(vocabulary, prefix)
+        end = bisect.bisect_left(vocabulary, prefix + "\uffff", lo=start)
+        if start == end:
+            return np.empty(0, dtype=np.int32)
+        if end - start == 1:
+            return index[vocabulary[start]]
+        return np.unique(np.concatenate([index[t] for t in vocabulary[start:end]]))
+
+    def search_rows(
+        self, query: str, tags: Optional[Iterable[str]] = None, limit: int = 10
+    ) -> List[int]:
+        """
+        Rows matching every query token (exact or as a prefix) and every tag,
+        best matches first: exact token hits, then hits in the product name.
+        """
+        tokens = tokenize(query)
+        candidates: Optional[np.ndarray] = None
+        for tag in tags or []:
+            rows = self.tag_index.get(normalize(tag), np.empty(0, dtype=np.int32))
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+        for token in tokens:
+            rows = self._rows_for_prefix(token, self.vocabulary, self.token_index)
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if candidates.size == 0:
+                return []
+        if candidates is None:
+            return []
+
+        if candidates.size > 1 and tokens:
+            # Rank exact token hits first, then hits in the product name, then by id
+            empty = np.empty(0, dtype=np.int32)
+            exact = sum(np.isin(candidates, self.token_index.get(t, empty)) for t in tokens)
+            in_name = sum(
+                np.isin(candidates, self._rows_for_prefix(t, self.name_vocabulary, self.name_index))
+                for t in tokens
+            )
+            ids = np.array([self.ids[row] for row in candidates.tolist()])
+            order = np.lexsort((ids, -in_name, -exact))
+            candidates = candidates[order]
+        return candidates[:limit].tolist()
+
+    def catalog_words(self, text: str) -> List[str]:
+        """
+        Words of a free-text message that name something in the catalog: exact
+        tokens, simple plurals ("canetas") and prefixes of 4+ letters.
+        """
+        words = []
+        for token in tokenize(text):
+            if len(token) < 3:
+                continue
+            if token in self.token_index:
+                words.append(token)
+            elif token.endswith("s") and token[:-1] in self.token_index:
+                words.append(token[:-1])
+            elif len(token) >= 4 and self._rows_for_prefix(token, self.vocabulary, self.token_index).size:
+                words.append(token)
+        return words
+
+    def product(self, row: int) -> Dict[str, object]:
+        return {
+            "id": self.ids[row],
+            "name": self.names[row],
+            "short_desc": self.short_descs[row],
+            "tags": self.tags[row],
+            "price": float(self.price[row]),
+            # Price actually quoted by the pricing rules; show this one to customers
+            "unit_price": float(self.base_price[row]),
+            "min_qty": int(self.min_qty[row]),
+            "lead_time_days": int(self.lead_time_days[row]),
+        }
+
+    # -------------------------------------------------------------------------
+    # Quotes
+    # -------------------------------------------------------------------------
+    def quote_rows(self, rows: np.ndarray, quantities: np.ndarray) -> Dict[str, np.ndarray]:
+        """Vectorized quote: one entry per (row, quantity) pair."""
+        rows = np.asarray(rows, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        unit_price = self.base_price[rows]
+        min_qty = self.min_qty[rows]
+        return {
+            "unit_price": unit_price,
+            "total": np.round(unit_price * quantities, 2),
+            "min_qty": min_qty,
+            "meets_min_qty": quantities >= min_qty,
+            "lead_time_days": self.lead_time_days[rows],
+        }
+
+
+# -----------------------------------------------------------------------------
+# Engine with hot reload
+# -----------------------------------------------------------------------------
+class CatalogEngine:
+    """
+    Loads data/catalog.csv and data/pricing_rules.json into a CatalogSnapshot and
+    swaps in a new snapshot when either file changes (checked at most once every
+    `reload_interval` seconds). Readers always see a complete snapshot.
+    """
+
+    def __init__(self, catalog_path: str, pricing_rules_path: str, reload_interval: float = 2.0):
+        self.catalog_path = catalog_path
+        self.pricing_rules_path = pricing_rules_path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtimes: Tuple[float, float] = (0.0, 0.0)
+        self._checked_at = 0.0
+        self._snapshot = self._load()
+
+    def _file_mtimes(self) -> Tuple[float, float]:
+        def mtime(path: str) -> float:
+            return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+        return mtime(self.catalog_path), mtime(self.pricing_rules_path)
+
+    def _load(self) -> CatalogSnapshot:
+        started = time.perf_counter()
+        mtimes = self._file_mtimes()
+        with open(self.catalog_path, newline="", encoding="utf-8") as f:
+            products = list(csv.DictReader(f))
+        rules: Dict[str, Dict[str, float]] = {}
+        if os.path.exists(self.pricing_rules_path):
+            with open(self.pricing_rules_path, encoding="utf-8") as f:
+                rules = json.load(f)
+
+        snapshot = CatalogSnapshot(products, rules)
+        self._mtimes = mtimes
+        self._checked_at = time.monotonic()
+        logger.info(
+            f"📦 Catalog loaded: {len(snapshot)} products in {time.perf_counter() - started:.3f}s"
+        )
+        return snapshot
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.reload_interval:
+                    self._checked_at = time.monotonic()
+                    if self._file_mtimes() != self._mtimes:
+                        try:
+                            self._snapshot = self._load()
+                        except Exception:
+                            # Keep serving the previous snapshot if the new files are broken
+                            logger.exception("❌ Catalog reload failed")
+        return self._snapshot
+
+    def reload(self) -> None:
+        with self._lock:
+            self._snapshot = self._load()
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+    def get(self, product_id: str) -> Optional[Dict[str, object]]:
+        snapshot = self.snapshot
+        row = snapshot.row_by_id.get(product_id)
+        return None if row is None else snapshot.product(row)
+
+    def search(
+        self, query: str, tags: Optional[Iterable[str]] = None, limit: int = 10
+    ) -> List[Dict[str, object]]:
+        snapshot = self.snapshot
+        return [snapshot.product(row) for row in snapshot.search_rows(query, tags, limit)]
+
+    def find(self, text: str, limit: int = 10) -> List[Dict[str, object]]:
+        """
+        Products mentioned in a free-text message ("quanto custa a caneta?").
+        Words unrelated to the catalog are ignored; if the remaining words do not
+        all match one product, products matching any of them are returned.
+        """
+        snapshot = self.snapshot
+        words = snapshot.catalog_words(text)
+        if not words:
+            return []
+        rows = snapshot.search_rows(" ".join(words), limit=limit)
+        if not rows:
+            for word in words:
+                rows += [row for row in snapshot.search_rows(word, limit=limit) if row not in rows]
+        return [snapshot.product(row) for row in rows[:limit]]
+
+    def list_products(self, limit: int = 20) -> List[Dict[str, object]]:
+        snapshot = self.snapshot
+        return [snapshot.product(row) for row in range(min(limit, len(snapshot)))]
+
+    def quote(self, product_id: str, quantity: int) -> Optional[Dict[str, object]]:
+        quotes = self.quote_bulk([(product_id, quantity)])
+        return quotes[0]
+
+    def quote_bulk(self, items: Sequence[Tuple[str, int]]) -> List[Optional[Dict[str, object]]]:
+        """
+        Quote many (product_id, quantity) pairs in one vectorized pass.
+        Unknown product ids yield None at their position.
+        """
+        snapshot = self.snapshot
+        positions, rows, quantities = [], [], []
+        for position, (product_id, quantity) in enumerate(items):
+            row = snapshot.row_by_id.get(product_id)
+            if row is not None:
+                positions.append(position)
+                rows.append(row)
+                quantities.append(quantity)
+
+        results: List[Optional[Dict[str, object]]] = [None] * len(items)
+        if not rows:
+            return results
+        quote = snapshot.quote_rows(np.array(rows), np.array(quantities))
+        for i, position in enumerate(positions):
+            results[position] = {
+                "id": snapshot.ids[rows[i]],
+                "name": snapshot.names[rows[i]],
+                "quantity": int(quantities[i]),
+                "unit_price": float(quote["unit_price"][i]),
+                "total": float(quote["total"][i]),
+                "min_qty": int(quote["min_qty"][i]),
+                "meets_min_qty": bool(quote["meets_min_qty"][i]),
+                "lead_time_days": int(quote["lead_time_days"][i]),
+            }
+        return results
+
+
+_engines: Dict[Tuple[str, str], CatalogEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_catalog_engine(
+    catalog_path: str, pricing_rules_path: str, reload_interval: float = 2.0
+) -> CatalogEngine:
+    """One shared engine per (catalog, pricing rules) pair."""
+    key = (os.path.abspath(catalog_path), os.path.abspath(pricing_rules_path))
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = CatalogEngine(catalog_path, pricing_rules_path, reload_interval)
+        return _engines[key]
@@ -1,9 +1,45 @@
-from crewai import CrewStructuredTool
+from typing import Any, List
 
-class CatalogQueryTool(CrewStructuredTool):
-    name = "catalog-tool"
-    description = "Query products from catalog"
+from crewai.tools import BaseTool
 
-    def run(self, query: str):
-        # implement catalog lookup
-        return f"Catalog lookup result for: {query}"
+from src.tools.catalog_engine import get_catalog_engine
+
+
+class CatalogQueryTool(BaseTool):
+    name: str = "catalog-tool"
+    description: str = (
+        "Query products from catalog. Input: product name, description words or tags "
+        "(prefixes work, e.g. 'can' finds 'caneta')."
+    )
+    catalog_path: str = "data/catalog.csv"
+    pricing_rules_path: str = "data/pricing_rules.json"
+    reload_interval: float = 2.0
+    limit: int = 5
+
+    @property
+    def engine(self) -> Any:
+        # Shared, hot-reloaded index: loaded once, not on every call
+        return get_catalog_engine(self.catalog_path, self.pricing_rules_path, self.reload_interval)
+
+    @staticmethod
+    def format_products(products: List[dict]) -> str:
+        return "\n".join(
+            f"- {p['name']} ({p['id']}): {p['short_desc']} | R$ {p['unit_price']:.2f}/un. "
+            f"| min. {p['min_qty']} un. | {p['lead_time_days']} days"
+            for p in products
+        )
+
+    def search_catalog(self, query: str) -> str:
+        products = self.engine.search(query, limit=self.limit)
+        if not products:
+            return f"No products found for: {query}"
+        return self.format_products(products)
+
+    def list_catalog(self, limit: int = 20) -> str:
+        products = self.engine.list_products(limit)
+        if not products:
+            return "Catalog is empty"
+        return self.format_products(products)
+
+    def _run(self, query: str) -> str:
+        return self.search_catalog(query)
@@ -1,9 +1,66 @@
-from crewai import CrewStructuredTool
+import re
+from typing import Any, List, Optional, Tuple
 
-class PricingTool(CrewStructuredTool):
-    name = "pricing-tool"
-    description = "Calculate pricing"
+from crewai.tools import BaseTool
 
-    def run(self, product_name: str):
-        # implement pricing logic
-        return f"Price for {product_name} is $X"
+from src.tools.catalog_engine import get_catalog_engine
+
+
+def parse_quantity(text: str) -> Tuple[Optional[int], str]:
+    """Split "500 canetas" into (500, "canetas"); quantity is None when absent."""
+    match = re.search(r"\b\d+\b", text)
+    if not match:
+        return None, text.strip()
+    return int(match.group()), (text[: match.start()] + text[match.end():]).strip()
+
+
+class PricingTool(BaseTool):
+    name: str = "pricing-tool"
+    description: str = (
+        "Calculate pricing. Input: quantity and product, e.g. '500 caneta' or "
+        "'200 ecobag'. Returns unit price, total, minimum quantity and lead time."
+    )
+    catalog_path: str = "data/catalog.csv"
+    pricing_rules_path: str = "data/pricing_rules.json"
+    reload_interval: float = 2.0
+
+    @property
+    def engine(self) -> Any:
+        return get_catalog_engine(self.catalog_path, self.pricing_rules_path, self.reload_interval)
+
+    def quote_bulk(self, items: List[Tuple[str, int]]) -> List[Optional[dict]]:
+        """Quote many (product_id, quantity) pairs in one vectorized pass."""
+        return self.engine.quote_bulk(items)
+
+    @staticmethod
+    def format_quote(quote: dict) -> str:
+        line = (
+            f"{quote['quantity']} x {quote['name']}: R$ {quote['unit_price']:.2f}/un. "
+            f"= R$ {quote['total']:.2f} | lead time {quote['lead_time_days']} days"
+        )
+        if not quote["meets_min_qty"]:
+            line += f" | below minimum order of {quote['min_qty']} un."
+        return line
+
+    def quote_message(self, text: str, limit: int = 3) -> Optional[str]:
+        """
+        Quote every product mentioned in a free-text message, e.g.
+        "quanto custa 200 canetas?". Returns None when no product is recognized.
+        """
+        quantity, _ = parse_quantity(text)
+        products = self.engine.find(text, limit=limit)
+        if not products:
+            return None
+        quotes = self.quote_bulk([(p["id"], quantity or p["min_qty"]) for p in products])
+        return "\n".join(self.format_quote(q) for q in quotes if q is not None)
+
+    def get_price(self, query: str) -> str:
+        quantity, product_query = parse_quantity(query)
+        engine = self.engine
+        product = engine.get(product_query) or next(iter(engine.search(product_query, limit=1)), None)
+        if product is None:
+            return self.quote_message(query, limit=1) or f"Product not found: {product_query}"
+        return self.format_quote(engine.quote(product["id"], quantity or product["min_qty"]))
+
+    def _run(self, query: str) -> str:
+        return self.get_price(query)
@@ -0,0 +1,69 @@
+import json
+import os
+import time
+
+from src.tools.catalog_engine import CatalogEngine
+
+CATALOG = """id,name,short_desc,tags,price
+bloco-anotacoes,Bloco de Anotações A5,Bloco A5 50 folhas,bloco,5.00
+caneta-plastica,Caneta Plástica,Caneta personalizada,caneta,2.10
+ecobag,Ecobag de Algodão,Ecobag 40x35,ecobag,8.25
+moleskine,Bloco Moleskine,Bloco premium 80 folhas,bloco premium,12.50
+"""
+
+RULES = {
+    "bloco-anotacoes": {"base_price": 4.5, "lead_time_days": 5, "min_qty": 50},
+    "caneta-plastica": {"base_price": 1.5, "lead_time_days": 3, "min_qty": 100},
+    "moleskine": {"base_price": 9.0, "lead_time_days": 7, "min_qty": 20},
+}
+
+
+def make_engine(tmp_path, catalog=CATALOG):
+    catalog_path = tmp_path / "catalog.csv"
+    rules_path = tmp_path / "pricing_rules.json"
+    catalog_path.write_text(catalog, encoding="utf-8")
+    rules_path.write_text(json.dumps(RULES), encoding="utf-8")
+    return CatalogEngine(str(catalog_path), str(rules_path), reload_interval=0)
+
+
+def test_search_tokens_prefixes_and_accents(tmp_path):
+    engine = make_engine(tmp_path)
+    assert [p["id"] for p in engine.search("caneta")] == ["caneta-plastica"]
+    assert [p["id"] for p in engine.search("plast")] == ["caneta-plastica"]
+    assert [p["id"] for p in engine.search("anotacoes")] == ["bloco-anotacoes"]
+    assert [p["id"] for p in engine.search("bloco premium")] == ["moleskine"]
+    assert {p["id"] for p in engine.search("bloco")} == {"bloco-anotacoes", "moleskine"}
+    assert engine.search("caneca") == []
+
+
+def test_search_by_tag(tmp_path):
+    engine = make_engine(tmp_path)
+    assert [p["id"] for p in engine.search("", tags=["premium"])] == ["moleskine"]
+    assert [p["id"] for p in engine.search("folhas", tags=["bloco"], limit=1)] == ["bloco-anotacoes"]
+
+
+def test_quote_bulk(tmp_path):
+    engine = make_engine(tmp_path)
+    quotes = engine.quote_bulk([("caneta-plastica", 500), ("moleskine", 10), ("caneca", 5), ("ecobag", 3)])
+
+    assert quotes[0]["total"] == 750.0
+    assert quotes[0]["meets_min_qty"] and quotes[0]["lead_time_days"] == 3
+    assert quotes[1]["total"] == 90.0 and not quotes[1]["meets_min_qty"]
+    assert quotes[2] is None
+    # Catalog listings show the same unit price the quote uses
+    assert engine.get("caneta-plastica")["unit_price"] == quotes[0]["unit_price"] == 1.5
+    # Without a pricing rule the list price is used
+    assert quotes[3]["unit_price"] == 8.25 and quotes[3]["min_qty"] == 1
+
+
+def test_hot_reload_on_file_change(tmp_path):
+    engine = make_engine(tmp_path)
+    assert engine.get("squeeze") is None
+
+    catalog_path = tmp_path / "catalog.csv"
+    catalog_path.write_text(CATALOG + "squeeze,Squeeze Alumínio,Squeeze 500ml,squeeze,15.00\n", encoding="utf-8")
+    later = time.time() + 5
+    os.utime(catalog_path, (later, later))
+
+    assert engine.get("squeeze")["price"] == 15.0
+    assert [p["id"] for p in engine.search("alum")] == ["squeeze"]
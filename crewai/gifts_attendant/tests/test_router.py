@@ -0,0 +1,63 @@
+import pytest
+
+from src.router import IntentRouter, LatencyMetrics, load_nlu_examples
+from src.tools.catalog_engine import CatalogEngine
+
+
+@pytest.fixture(scope="module")
+def router():
+    engine = CatalogEngine("data/catalog.csv", "data/pricing_rules.json")
+    return IntentRouter.from_nlu(
+        "data/rasa_nlu.yml",
+        is_catalog_word=lambda word: bool(engine.snapshot.catalog_words(word)),
+    )
+
+
+def test_load_nlu_examples():
+    examples = load_nlu_examples("data/rasa_nlu.yml")
+    assert set(examples) == {"ask_catalog", "request_quote", "provide_email"}
+    assert "Pode me enviar o catálogo?" in examples["ask_catalog"]
+
+
+@pytest.mark.parametrize(
+    "text, intent",
+    [
+        ("Quanto custa a caneta?", "request_quote"),
+        ("qual o preço de 200 ecobags", "request_quote"),
+        ("Preciso de 100 unidades de bloco de anotações", "request_quote"),
+        ("Pode me enviar o catálogo?", "ask_catalog"),
+        ("Quais produtos vocês têm?", "ask_catalog"),
+        ("meu email é cliente@empresa.com.br", "provide_email"),
+    ],
+)
+def test_classify(router, text, intent):
+    assert router.classify(text).intent == intent
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Oi, tudo bem?",
+        "Vocês entregam em Curitiba?",
+        "caneta",
+        "200 canetas",
+        "Recebi 200 canetas com defeito",
+        "Quero cancelar o pedido de 200 canetas",
+        "Quero cancelar meu pedido",
+        "Recebi as canetas com defeito, me respondam em cliente@empresa.com.br",
+    ],
+)
+def test_ambiguous_messages_are_escalated(router, text):
+    assert router.classify(text).intent is None
+
+
+def test_latency_metrics():
+    metrics = LatencyMetrics(window=10)
+    for ms in range(1, 21):
+        metrics.observe("pricing", ms / 1000)
+    metrics.observe("crew", 2.5)
+
+    stats = metrics.stats()
+    assert stats["pricing"]["count"] == 20
+    assert stats["pricing"]["p50_ms"] == 16.0
+    assert stats["crew"]["max_ms"] == 2500.0
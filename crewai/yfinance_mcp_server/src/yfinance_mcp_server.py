@@ -4,15 +4,43 @@ from langchain_openai import ChatOpenAI
 from crewai import Agent, Task, Crew, Process
 from crewai.memory import EntityMemory
 from crewai.memory.storage.rag_storage import RAGStorage
-from crewai_tools import MCPServerAdapter
 from mcp import StdioServerParameters
+from mcp_sessions import MCPSessionManager, SharedMCPSession
+from user_memory import (
+    UserMemoryCache,
+    restore_user_memory,
+    start_compaction_job,
+    user_memory_path,
+)
+import asyncio
 import os
 
 load_dotenv()
 mcp = FastMCP("multi-agent-server")
 
+# Pin versions (e.g. YFMCP_PACKAGE=yfmcp==0.x) to skip registry resolution on restarts
+yfinance_params = StdioServerParameters(
+    command="uvx", args=[os.getenv("YFMCP_PACKAGE", "yfmcp")]
+)
+supabase_params = StdioServerParameters(
+    command="npx",
+    args=["-y", os.getenv("SUPABASE_MCP_PACKAGE", "@supabase/mcp-server-supabase")],
+    env={"SUPABASE_ACCESS_TOKEN": os.getenv("SUPABASE_ACCESS_TOKEN"), **os.environ},
+)
+
+# Started once at boot and shared by every request
+mcp_servers = MCPSessionManager(
+    [
+        SharedMCPSession("yfinance", yfinance_params),
+        SharedMCPSession("supabase", supabase_params),
+    ],
+    health_interval=float(os.getenv("MCP_HEALTH_INTERVAL", "30")),
+)
+llm = ChatOpenAI(model="gpt-4.1-mini")
+
 # Function for per-user memory
-def get_user_memory(user_id: str):
+def open_user_memory(user_id: str):
+    restore_user_memory(user_id)
     return EntityMemory(
         storage=RAGStorage(
             embedder_config={
@@ -20,67 +48,66 @@ def get_user_memory(user_id: str):
                 "config": {"model": "text-embedding-3-small"},
             },
             type="short_term",
-            path=f"./memory_store/{user_id}/",
+            path=user_memory_path(user_id),
         )
     )
 
+
+# Opened memories are reused across requests; idle or least recently used ones are closed
+user_memories = UserMemoryCache(
+    open_user_memory,
+    max_entries=int(os.getenv("USER_MEMORY_CACHE_SIZE", "256")),
+    idle_timeout=float(os.getenv("USER_MEMORY_IDLE_TIMEOUT", "900")),
+)
+
+
+def get_user_memory(user_id: str):
+    return user_memories.get(user_id)
+
 @mcp.tool(name="multi_analyst")
 async def multi_analyst_tool(question: str, user_id: str) -> str:
     """Handle financial and DB questions using unified tool access."""
-    yfinance_params = StdioServerParameters(command="uvx", args=["yfmcp@latest"])
-    supabase_params = StdioServerParameters(
-        command="npx",
-        args=["-y", "@supabase/mcp-server-supabase@latest"],
-        env={"SUPABASE_ACCESS_TOKEN": os.getenv("SUPABASE_ACCESS_TOKEN"), **os.environ},
-    )
+    # Only blocks if a server failed to start at boot
+    tools = await asyncio.to_thread(mcp_servers.tools)
+    memory = await asyncio.to_thread(get_user_memory, user_id)
 
-    mcp_adapters = []
-    try:
-        yfinance_adapter = MCPServerAdapter(yfinance_params)
-        supabase_adapter = MCPServerAdapter(supabase_params)
-        mcp_adapters = [yfinance_adapter, supabase_adapter]
-
-        tools = yfinance_adapter.tools + supabase_adapter.tools
-        llm = ChatOpenAI(model="gpt-4.1-mini")
-        memory = get_user_memory(user_id)
-
-        multi_analyst = Agent(
-            role="Professional Data & Finance Analyst",
-            goal="Answer any financial or database question using YFinance and Supabase tools.",
-            backstory="Expert in SQL, stocks, KPIs, and databases. Decides the best tool for each query.",
-            tools=tools,
-            verbose=True,
-            llm=llm,
-            allow_delegation=False,
-            memory=memory,
-        )
+    multi_analyst = Agent(
+        role="Professional Data & Finance Analyst",
+        goal="Answer any financial or database question using YFinance and Supabase tools.",
+        backstory="Expert in SQL, stocks, KPIs, and databases. Decides the best tool for each query.",
+        tools=tools,
+        verbose=True,
+        llm=llm,
+        allow_delegation=False,
+        memory=memory,
+    )
 
-        task = Task(
-            description=f"Handle this user question: {question}",
-            expected_output="Useful response using the most suitable tool.",
-            tools=tools,
-            agent=multi_analyst,
-            memory=memory,
-        )
+    task = Task(
+        description=f"Handle this user question: {question}",
+        expected_output="Useful response using the most suitable tool.",
+        tools=tools,
+        agent=multi_analyst,
+        memory=memory,
+    )
 
-        crew = Crew(
-            agents=[multi_analyst],
-            tasks=[task],
-            process=Process.sequential,
-            memory=True,
-            entity_memory=memory,
-            verbose=True,
-        )
+    crew = Crew(
+        agents=[multi_analyst],
+        tasks=[task],
+        process=Process.sequential,
+        memory=True,
+        entity_memory=memory,
+        verbose=True,
+    )
 
-        result = await crew.kickoff_async()
-        return result
-    finally:
-        for adapter in mcp_adapters:
-            try:
-                adapter.stop()
-            except Exception:
-                pass
+    result = await crew.kickoff_async()
+    return result
 
 
 if __name__ == "__main__":
+    mcp_servers.start()
+    start_compaction_job(
+        interval=float(os.getenv("USER_MEMORY_COMPACT_INTERVAL", "86400")),
+        stale_after=float(os.getenv("USER_MEMORY_STALE_AFTER", str(30 * 24 * 3600))),
+        cache=user_memories,
+    )
     mcp.run(transport="sse", host="127.0.0.1", port=8005)
\ No newline at end of file
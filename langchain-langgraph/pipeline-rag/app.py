@@ -1,6 +1,9 @@
 import streamlit as st
 
-from app.graph.rag_graph import run_streaming_rag
+from app.graph.rag_graph import get_compiled_graph, run_streaming_rag
+
+# Compila o grafo (e pré-aquece o pool) na abertura do app, não na primeira pergunta
+get_compiled_graph()
 
 # Configuração da Página e Título
 st.set_page_config(
@@ -32,6 +35,7 @@ if prompt := st.chat_input("Ex: Quais os precedentes da súmula 70 vigente?"):
         query_placeholder = details_expander.empty()
         filter_placeholder = details_expander.empty()
         answer_placeholder = st.empty()
+        sources_placeholder = st.empty()
 
         full_answer = ""
 
@@ -51,16 +55,21 @@ if prompt := st.chat_input("Ex: Quais os precedentes da súmula 70 vigente?"):
                 answer_placeholder.markdown(full_answer + "▌")  # O ▌ simula um cursor
 
             elif event["type"] == "sources":
-                answer_placeholder.markdown(full_answer)  # Resposta final sem o cursor
+                # As fontes chegam logo após a busca, antes da resposta
                 sources = event["data"]
                 if sources:
-                    with st.expander("📚 **Fontes Utilizadas**"):
-                        for source in sources:
-                            st.markdown(
-                                f"- **Arquivo:** `{source['pdf_name']}`\n"
-                                f"- **Súmula:** `{source['num_sumula']}`\n"
-                                f"- **Tipo:** `{source['chunk_type']}`"
-                            )
+                    with sources_placeholder.container():
+                        with st.expander("📚 **Fontes Utilizadas**"):
+                            for source in sources:
+                                score = source.get("score")
+                                st.markdown(
+                                    f"- **Arquivo:** `{source['pdf_name']}`\n"
+                                    f"- **Súmula:** `{source['num_sumula']}`\n"
+                                    f"- **Tipo:** `{source['chunk_type']}`"
+                                    + (f"\n- **Score:** `{score:.3f}`" if score is not None else "")
+                                )
+
+        answer_placeholder.markdown(full_answer)  # Resposta final sem o cursor
 
     # Adiciona a resposta completa ao histórico de chat
     st.session_state.messages.append({"role": "assistant", "content": full_answer})
\ No newline at end of file
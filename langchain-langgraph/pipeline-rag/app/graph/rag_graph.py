@@ -1,32 +1,55 @@
-from typing import Annotated, List, Dict, Any, Generator, TypedDict
+from typing import Annotated, List, Dict, Any, AsyncGenerator, Generator, TypedDict
 import re
+from functools import lru_cache
 
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from langchain_core.structured_query import StructuredQuery
 from langfuse.langchain import CallbackHandler
 from langchain_core.runnables import RunnableConfig
 
-from app.ingest.embed_qdrant import EmbeddingSelfQuery
-from app.retrieval.retriever import build_self_query_retriever, SelfQueryConfig
+from app.retrieval.retriever import (
+    SelfQueryConfig,
+    aself_query_search,
+    self_query_search,
+)
+from app.retrieval.pool import retriever_pool
 from app.graph.prompt import SYSTEM_PROMPT_JURIDICO
 
-langfuse_handler = CallbackHandler()
+
+@lru_cache(maxsize=1)
+def get_langfuse_handler() -> CallbackHandler:
+    """Handler do Langfuse, criado na primeira execução e não no import."""
+    return CallbackHandler()
+
+# Limite de fontes carregadas no estado/evento "sources"
+MAX_SOURCES = 10
 
 
 # Definição do Estado do Grafo
 class RAGState(TypedDict):
     question: str
     docs: List[Document]
-    answer: Generator[str, None, None]
+    sources: List[Dict[str, Any]]
+    answer: str
     generated_query: str
     generated_filter: str
     messages: Annotated[list, add_messages]
 
 
+QA_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", SYSTEM_PROMPT_JURIDICO),
+        (
+            "human",
+            "Pergunta: {question}\n\nContexto (trechos):\n{context}\n\nResponda de forma direta. Ao final, liste fontes no formato: (Status da Súmula: metadata.status_atual, Número da Súmula: metadata.num_sumula, Data da Publicação:  metadata.data_status).",
+        ),
+    ]
+)
+
+
 # --- Funções Auxiliares ---
 def _format_filter_for_display(filter_obj: Any) -> str:
     """Formata o filtro do LangChain para uma exibição mais amigável."""
@@ -57,126 +80,240 @@ def _format_docs(docs: List[Document]) -> str:
     return "\n\n---\n\n".join(parts)
 
 
+def _qa_inputs(state: RAGState) -> Dict[str, str]:
+    return {
+        "question": state["question"],
+        "context": _format_docs(state.get("docs", [])),
+    }
+
+
+def _qa_chain():
+    llm = retriever_pool.get_embedder().llm
+    return QA_PROMPT | llm | StrOutputParser()
+
+
+def _retrieve_output(docs: List[Document], structured_query: Any) -> Dict[str, Any]:
+    print(f"Busca finalizada. Encontrados {len(docs)} documentos.")
+    return {
+        "docs": docs,
+        "sources": _format_sources(docs),
+        "generated_query": structured_query.query,
+        "generated_filter": _format_filter_for_display(structured_query.filter),
+    }
+
+
+def _format_sources(docs: List[Document]) -> List[Dict[str, Any]]:
+    """Resumo compacto e serializável (JSON) das fontes recuperadas."""
+    return [
+        {
+            "pdf_name": d.metadata.get("pdf_name"),
+            "data_status": d.metadata.get("data_status"),
+            "data_status_ano": d.metadata.get("data_status_ano"),
+            "status_atual": d.metadata.get("status_atual"),
+            "num_sumula": d.metadata.get("num_sumula"),
+            "chunk_type": d.metadata.get("chunk_type"),
+            "score": d.metadata.get("score"),
+        }
+        for d in docs[:MAX_SOURCES]
+    ]
+
+
+def _to_rag_events(mode: str, chunk: Any) -> List[Dict[str, Any]]:
+    """Converte um item do stream do grafo (updates/messages) nos eventos do frontend."""
+    if mode == "updates" and "retrieve" in chunk:
+        output = chunk["retrieve"]
+        return [
+            {
+                "type": "details",
+                "data": {
+                    "query": output["generated_query"],
+                    "filter": output["generated_filter"],
+                },
+            },
+            # As fontes saem logo após a busca, sem esperar o fim da geração
+            {"type": "sources", "data": output["sources"]},
+        ]
+
+    if mode == "messages":
+        message, metadata = chunk
+        # Ignora tokens do query constructor (nó retrieve)
+        if metadata.get("langgraph_node") == "generate" and message.content:
+            return [{"type": "token", "data": message.content}]
+    return []
+
+
+def _run_config() -> RunnableConfig:
+    # run_config = {"callbacks": [langfuse_handler], "run_name": "Chat"}
+    return RunnableConfig(
+        callbacks=[get_langfuse_handler()],
+        run_name="Chat",
+        tags=["live-demo", "sumulas"],
+        metadata={"collection": "sumulas_jornada", "k": 5, "user": "Caio"},
+    )
+
+
 # --- Nós do Grafo ---
 def retrieve(
     state: RAGState,
     config: RunnableConfig,
     collection_name: str = "sumulas_jornada",
     k: int = 10,
+    use_fast_path: bool = False,
+    use_query_cache: bool = True,
 ) -> Dict[str, Any]:
     """Nó que executa o SelfQueryRetriever e extrai os detalhes da consulta gerada."""
     print("Executando o nó de recuperação...")
-    cfg = SelfQueryConfig(collection_name=collection_name, k=k)
-    retriever = build_self_query_retriever(cfg)
+    cfg = SelfQueryConfig(
+        collection_name=collection_name,
+        k=k,
+        use_fast_path=use_fast_path,
+        use_query_cache=use_query_cache,
+    )
+    retriever = retriever_pool.get_retriever(cfg)
 
-    structured_query: StructuredQuery = retriever.query_constructor.invoke(
-        {"query": state["question"]}, config=config
+    # No máximo uma chamada ao query constructor (parser/cache evitam o LLM):
+    # a mesma StructuredQuery é exibida e executada
+    docs, structured_query = self_query_search(
+        retriever, state["question"], config=config, cfg=cfg
     )
-    docs = retriever.invoke(state["question"], config=config)
+    return _retrieve_output(docs, structured_query)
 
-    print(f"Busca finalizada. Encontrados {len(docs)} documentos.")
-    return {
-        "docs": docs,
-        "generated_query": structured_query.query,
-        "generated_filter": _format_filter_for_display(structured_query.filter),
-    }
+
+async def aretrieve(
+    state: RAGState,
+    config: RunnableConfig,
+    collection_name: str = "sumulas_jornada",
+    k: int = 10,
+    use_fast_path: bool = False,
+    use_query_cache: bool = True,
+) -> Dict[str, Any]:
+    """Versão assíncrona do nó de recuperação."""
+    print("Executando o nó de recuperação (async)...")
+    cfg = SelfQueryConfig(
+        collection_name=collection_name,
+        k=k,
+        use_fast_path=use_fast_path,
+        use_query_cache=use_query_cache,
+    )
+    retriever = retriever_pool.get_retriever(cfg)
+    docs, structured_query = await aself_query_search(
+        retriever, state["question"], config=config, cfg=cfg
+    )
+    return _retrieve_output(docs, structured_query)
 
 
-def generate_stream(state: RAGState, config: RunnableConfig) -> Dict[str, Any]:
-    """Nó que gera a resposta final em formato de stream."""
+def generate(state: RAGState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Nó de geração. Os tokens chegam ao chamador pelo stream_mode="messages" do grafo
+    enquanto o LLM responde; o estado guarda apenas o texto final.
+    """
     print("Executando o nó de geração...")
-    QA_PROMPT = ChatPromptTemplate.from_messages(
-        [
-            ("system", SYSTEM_PROMPT_JURIDICO),
-            (
-                "human",
-                "Pergunta: {question}\n\nContexto (trechos):\n{context}\n\nResponda de forma direta. Ao final, liste fontes no formato: (Status da Súmula: metadata.status_atual, Número da Súmula: metadata.num_sumula, Data da Publicação:  metadata.data_status).",
-            ),
-        ]
-    )
+    answer = _qa_chain().invoke(_qa_inputs(state), config=config)
+    return {"answer": answer}
 
-    embedder = EmbeddingSelfQuery()
-    llm = embedder.llm
-    context = _format_docs(state.get("docs", []))
-    chain = QA_PROMPT | llm | StrOutputParser()
 
-    answer_stream = chain.stream(
-        {"question": state["question"], "context": context},
-        config=config,
-    )
-    return {"answer": answer_stream}
+async def agenerate(state: RAGState, config: RunnableConfig) -> Dict[str, Any]:
+    """Versão assíncrona do nó de geração."""
+    print("Executando o nó de geração (async)...")
+    answer = await _qa_chain().ainvoke(_qa_inputs(state), config=config)
+    return {"answer": answer}
 
 
 # --- Construção do Grafo ---
-def build_streaming_graph(collection_name: str = "sumulas_jornada", k: int = 5):
+def build_streaming_graph(
+    collection_name: str = "sumulas_jornada",
+    k: int = 5,
+    use_fast_path: bool = False,
+    use_query_cache: bool = True,
+):
     """Compila o grafo LangGraph com os nós para streaming."""
+    # Pré-aquece clientes e retriever para a primeira pergunta não pagar a construção
+    retriever_pool.warm(SelfQueryConfig(collection_name=collection_name, k=k))
+
     graph = StateGraph(RAGState)
     graph.add_node(
         "retrieve",
         lambda s, config: retrieve(
-            s, config=config, collection_name=collection_name, k=k
+            s,
+            config=config,
+            collection_name=collection_name,
+            k=k,
+            use_fast_path=use_fast_path,
+            use_query_cache=use_query_cache,
         ),
     )
-    graph.add_node("generate", generate_stream)
+    graph.add_node("generate", generate)
+    graph.set_entry_point("retrieve")
+    graph.add_edge("retrieve", "generate")
+    graph.add_edge("generate", END)
+    return graph.compile()
+
+
+def build_async_streaming_graph(
+    collection_name: str = "sumulas_jornada",
+    k: int = 5,
+    use_fast_path: bool = False,
+    use_query_cache: bool = True,
+):
+    """Compila o grafo com nós assíncronos, para execução via astream em um event loop."""
+    retriever_pool.warm(SelfQueryConfig(collection_name=collection_name, k=k))
+
+    async def _retrieve(s: RAGState, config: RunnableConfig) -> Dict[str, Any]:
+        return await aretrieve(
+            s,
+            config=config,
+            collection_name=collection_name,
+            k=k,
+            use_fast_path=use_fast_path,
+            use_query_cache=use_query_cache,
+        )
+
+    graph = StateGraph(RAGState)
+    graph.add_node("retrieve", _retrieve)
+    graph.add_node("generate", agenerate)
     graph.set_entry_point("retrieve")
     graph.add_edge("retrieve", "generate")
     graph.add_edge("generate", END)
     return graph.compile()
 
 
-# Instância única do grafo compilado para ser reutilizada
-COMPILED_GRAPH = build_streaming_graph()
+# Instâncias únicas dos grafos compilados, construídas no primeiro uso: importar o
+# módulo não pré-aquece o pool (benchmarks trocam o embedder antes)
+@lru_cache(maxsize=1)
+def get_compiled_graph():
+    return build_streaming_graph()
+
+
+@lru_cache(maxsize=1)
+def get_async_compiled_graph():
+    return build_async_streaming_graph()
 
 
 # --- Função Principal (Ponto de Entrada para o Frontend) ---
 def run_streaming_rag(question: str) -> Generator[Dict[str, Any], None, None]:
     """
-    Função de alto nível que executa o fluxo RAG e retorna um gerador de eventos para o frontend.
+    Função de alto nível que executa o fluxo RAG e retorna um gerador de eventos para o frontend:
+    "details" e "sources" logo após a busca, seguidos dos "token" da resposta.
     """
-
-    # run_config = {"callbacks": [langfuse_handler], "run_name": "Chat"}
-    run_config = RunnableConfig(
-        callbacks=[langfuse_handler],
-        run_name="Chat",
-        tags=["live-demo", "sumulas"],
-        metadata={"collection": "sumulas_jornada", "k": 5, "user": "Caio"},
-    )
-
     initial_state: RAGState = {"question": question, "messages": []}
-    final_state = {}
 
     # Executa o grafo em modo streaming
-    for event in COMPILED_GRAPH.stream(initial_state, config=run_config):
-        if "retrieve" in event:
-            output = event["retrieve"]
-            yield {
-                "type": "details",
-                "data": {
-                    "query": output["generated_query"],
-                    "filter": output["generated_filter"],
-                },
-            }
+    for mode, chunk in get_compiled_graph().stream(
+        initial_state, config=_run_config(), stream_mode=["updates", "messages"]
+    ):
+        yield from _to_rag_events(mode, chunk)
 
-        if "generate" in event:
-            answer_stream = event["generate"]["answer"]
-            # Itera sobre o gerador de tokens da resposta
-            for token in answer_stream:
-                yield {"type": "token", "data": token}
 
-        if END in event:
-            final_state = event[END]
+async def arun_streaming_rag(question: str) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Versão assíncrona de run_streaming_rag: produz os mesmos eventos sem bloquear uma
+    thread por conversa, permitindo atender várias conversas concorrentes no mesmo
+    event loop.
+    """
+    initial_state: RAGState = {"question": question, "messages": []}
 
-    # Formata e retorna as fontes no final do fluxo
-    docs = final_state.get("docs", [])
-    sources = [
-        {
-            "pdf_name": d.metadata.get("pdf_name"),
-            "data_status": d.metadata.get("data_status"),
-            "data_status_ano": d.metadata.get("data_status_ano"),
-            "status_atual": d.metadata.get("status_atual"),
-            "num_sumula": d.metadata.get("num_sumula"),
-            "chunk_type": d.metadata.get("chunk_type"),
-        }
-        for d in docs
-    ]
-    yield {"type": "sources", "data": sources}
\ No newline at end of file
+    async for mode, chunk in get_async_compiled_graph().astream(
+        initial_state, config=_run_config(), stream_mode=["updates", "messages"]
+    ):
+        for event in _to_rag_events(mode, chunk):
+            yield event
@@ -1,27 +1,56 @@
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
 from qdrant_client import QdrantClient
 from app.utils.settings import settings
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_qdrant import QdrantVectorStore
+from langchain_qdrant import QdrantVectorStore, RetrievalMode
+from app.ingest.embedding_cache import CachedEmbeddings, embedding_cache
+from app.ingest.sparse_encoder import BM25SparseEmbeddings
 
 
 class EmbeddingSelfQuery:
-    def __init__(self) -> None:
-        self.llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0)
-        self.client = QdrantClient(
+    def __init__(
+        self,
+        llm: Optional[BaseChatModel] = None,
+        client: Optional[QdrantClient] = None,
+        embeddings: Optional[Embeddings] = None,
+    ) -> None:
+        """
+        Os componentes podem ser injetados (ex.: LLM falso e Qdrant em memória nos
+        benchmarks); por padrão usa OpenAI e o Qdrant configurado em settings.
+        """
+        self.llm = llm or ChatOpenAI(model="gpt-4.1-mini", temperature=0)
+        self.client = client or QdrantClient(
             host=settings.QDRANT_HOST,
             port=settings.QDRANT_PORT,
             timeout=120,
         )
 
-        self.model = OpenAIEmbeddings(
-            model="text-embedding-3-large",
+        self.model = embeddings or CachedEmbeddings(
+            OpenAIEmbeddings(
+                model="text-embedding-3-large",
+            ),
+            cache=embedding_cache,
         )
+        self.sparse_model = BM25SparseEmbeddings()
 
-    def get_qdrant_vector_store(self, collection_name: str) -> QdrantVectorStore:
+    def get_qdrant_vector_store(
+        self,
+        collection_name: str,
+        retrieval_mode: RetrievalMode = RetrievalMode.HYBRID,
+    ) -> QdrantVectorStore:
+        """
+        No modo HYBRID, a busca combina o vetor denso e o esparso (BM25) com
+        Reciprocal Rank Fusion no Qdrant, e add_texts grava os dois vetores.
+        """
         return QdrantVectorStore(
             client=self.client,
             collection_name=collection_name,
             embedding=self.model,
+            sparse_embedding=self.sparse_model,
+            retrieval_mode=retrieval_mode,
             sparse_vector_name="text-sparse",
             vector_name="text-dense",
         )
\ No newline at end of file
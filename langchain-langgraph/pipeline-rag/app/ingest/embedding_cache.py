@@ -0,0 +1,165 @@
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.utils.settings import settings
+
+# Formato do struct para cada dtype suportado
+_DTYPE_FORMATS = {"float32": "f", "float16": "e"}
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Cache persistente (SQLite) de embeddings, chaveado por (modelo, dtype, hash do texto).
+
+    Os vetores são gravados como blobs binários (float32 ou float16), ocupando 4x/8x
+    menos espaço que listas JSON. Acima de `max_entries`, descarta as entradas
+    acessadas há mais tempo (LRU).
+    """
+
+    def __init__(
+        self,
+        path: str = settings.EMBEDDING_CACHE_PATH,
+        max_entries: int = settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        dtype: str = settings.EMBEDDING_CACHE_DTYPE,
+    ) -> None:
+        if dtype not in _DTYPE_FORMATS:
+            raise ValueError(f"dtype não suportado: {dtype}")
+        self.max_entries = max_entries
+        self.dtype = dtype
+        self._format = _DTYPE_FORMATS[dtype]
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        colunas = [row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")]
+        if colunas and "dtype" not in colunas:
+            # Esquema antigo sem dtype: não há como saber a largura dos blobs
+            self._conn.execute("DROP TABLE embeddings")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dtype TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, dtype, text_hash)
+            )
+            """
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _pack(self, vector: List[float]) -> bytes:
+        return struct.pack(f"<{len(vector)}{self._format}", *vector)
+
+    def _unpack(self, blob: bytes) -> List[float]:
+        size = struct.calcsize(f"<{self._format}")
+        return list(struct.unpack(f"<{len(blob) // size}{self._format}", blob))
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        hashes = [_text_hash(t) for t in texts]
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            unique = list(set(hashes))
+            # Consulta em blocos para respeitar o limite de parâmetros do SQLite
+            for start in range(0, len(unique), 500):
+                block = unique[start : start + 500]
+                placeholders = ",".join("?" * len(block))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND dtype = ? AND text_hash IN ({placeholders})",
+                    (model, self.dtype, *block),
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? "
+                    "WHERE model = ? AND dtype = ? AND text_hash = ?",
+                    [(now, model, self.dtype, h) for h in found],
+                )
+                self._conn.commit()
+            result = [found.get(h) for h in hashes]
+            hits = sum(1 for blob in result if blob is not None)
+            self.hits += hits
+            self.misses += len(result) - hits
+        return [self._unpack(blob) if blob is not None else None for blob in result]
+
+    def put_many(
+        self, model: str, texts: List[str], vectors: List[List[float]]
+    ) -> None:
+        now = time.time()
+        rows = [
+            (model, self.dtype, _text_hash(t), self._pack(v), now)
+            for t, v in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    """
+                    DELETE FROM embeddings WHERE rowid IN (
+                        SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings que consultam o EmbeddingCache antes de chamar o modelo subjacente."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache) -> None:
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = getattr(embeddings, "model", type(embeddings).__name__)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(self.model_name, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            # Textos repetidos no mesmo lote são embedados uma única vez
+            new_texts = list(dict.fromkeys(texts[i] for i in missing))
+            new_vectors = self.embeddings.embed_documents(new_texts)
+            self.cache.put_many(self.model_name, new_texts, new_vectors)
+            by_text = dict(zip(new_texts, new_vectors))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get_many(self.model_name, [text])[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many(self.model_name, [text], [vector])
+        return vector
+
+
+# Instância única compartilhada entre ingestão e consultas
+embedding_cache = EmbeddingCache()
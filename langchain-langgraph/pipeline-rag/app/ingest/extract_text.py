@@ -1,14 +1,44 @@
 import os
 import json
+import random
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Any
+from openai import RateLimitError
 from qdrant_client import models
 from qdrant_client.http.models import Distance, VectorParams, SparseVectorParams
 from markitdown import MarkItDown
 from app.ingest.embed_qdrant import EmbeddingSelfQuery
+from app.ingest.manifest import (
+    IngestManifest,
+    chunk_point_id,
+    chunk_sha256,
+    file_sha256,
+)
+from app.utils.settings import settings
 
-md = MarkItDown()
+# MarkItDown não é garantidamente thread-safe: uma instância por thread do pool
+_local = threading.local()
+
+
+def _markitdown() -> MarkItDown:
+    if not hasattr(_local, "md"):
+        _local.md = MarkItDown()
+    return _local.md
+
+
+def _invoke_with_backoff(embedder: EmbeddingSelfQuery, prompt: str, retries: int = 5):
+    """Chama o LLM recuando exponencialmente (com jitter) quando a API limita a taxa."""
+    for attempt in range(retries):
+        try:
+            return embedder.llm.invoke(prompt)
+        except RateLimitError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(2**attempt + random.random())
 
 
 def process_pdf_file(
@@ -18,7 +48,12 @@ def process_pdf_file(
     Usa o LLM interno do embedder para extrair metadados e dividir em até 3 chunks
     """
     pdf_name = os.path.basename(file_path)
-    result = md.convert(str(file_path))
+    try:
+        result = _markitdown().convert(str(file_path))
+    except Exception as e:
+        # PDF corrompido/ilegível: vai para mark_failed sem derrubar a ingestão
+        print(f"⚠️ Erro ao converter {pdf_name}: {e}")
+        return []
     text_content = result.text_content or ""
 
     # Prompt de extração
@@ -59,7 +94,7 @@ Texto da súmula:
 """
 
     try:
-        response = embedder.llm.invoke(prompt)
+        response = _invoke_with_backoff(embedder, prompt)
         json_text = (
             re.sub(r"```[\w-]*", "", response.content).replace("```", "").strip()
         )
@@ -90,7 +125,25 @@ Texto da súmula:
         return []
 
 
-def main(collection: str = "sumulas_jornada", pasta_pdfs: str = "sumulas"):
+def main(
+    collection: str = "sumulas_jornada",
+    pasta_pdfs: str = "sumulas",
+    workers: int = settings.INGEST_WORKERS,
+    batch_size: int = settings.INGEST_BATCH_SIZE,
+    force: bool = False,
+):
+    """
+    Ingestão concorrente e incremental: conversão + extração via LLM rodam em um pool
+    limitado de threads, enquanto os chunks prontos são inseridos no Qdrant em lotes.
+
+    O manifesto guarda o hash de cada PDF e de cada chunk: PDFs inalterados são pulados,
+    chunks alterados são substituídos (IDs determinísticos por pdf_name + chunk_type)
+    e PDFs removidos da pasta têm seus pontos apagados. Uma coleção que já tem pontos
+    mas nenhum manifesto (ingestões antigas, com IDs aleatórios) é esvaziada antes da
+    primeira carga, senão cada chunk ficaria duplicado. `force=True` reprocessa e
+    reinsere tudo (necessário, por exemplo, para popular vetores esparsos em pontos antigos).
+    Cada chunk é inserido com vetor denso (OpenAI) e esparso (BM25 local).
+    """
     embedder = EmbeddingSelfQuery()
 
     # Cria coleção se não existir
@@ -101,33 +154,136 @@ def main(collection: str = "sumulas_jornada", pasta_pdfs: str = "sumulas"):
                 "text-dense": VectorParams(size=3072, distance=Distance.COSINE)
             },
             sparse_vectors_config={
-                "text-sparse": SparseVectorParams()  # sem size para esparso
+                # sem size para esparso; o IDF do BM25 é calculado pelo Qdrant
+                "text-sparse": SparseVectorParams(modifier=models.Modifier.IDF)
             },
         )
         print(f"Coleção '{collection}' criada.")
     else:
+        # Coleções antigas foram criadas sem o modificador IDF
+        embedder.client.update_collection(
+            collection_name=collection,
+            sparse_vectors_config={
+                "text-sparse": SparseVectorParams(modifier=models.Modifier.IDF)
+            },
+        )
         print(f"Coleção '{collection}' já existe.")
 
     vector_store = embedder.get_qdrant_vector_store(collection)
-    pdf_files = list(Path(pasta_pdfs).glob("*.pdf"))
+    pdf_files = sorted(Path(pasta_pdfs).glob("*.pdf"))
+    manifest = IngestManifest(collection)
+
+    if not manifest.files:
+        # Pontos sem manifesto não têm IDs determinísticos: o upsert não os substitui
+        existing = embedder.client.count(collection_name=collection, exact=True).count
+        if existing:
+            print(f"🧹 {existing} pontos sem manifesto removidos antes da reingestão.")
+            embedder.client.delete(
+                collection_name=collection,
+                points_selector=models.FilterSelector(filter=models.Filter()),
+            )
+
+    # Remove do Qdrant os pontos de PDFs que não existem mais na pasta
+    current_names = {p.name for p in pdf_files}
+    removed = [name for name in manifest.files if name not in current_names]
+    for pdf_name in removed:
+        point_ids = manifest.point_ids(pdf_name)
+        if point_ids:
+            embedder.client.delete(
+                collection_name=collection,
+                points_selector=models.PointIdsList(points=point_ids),
+            )
+        manifest.remove(pdf_name)
+    if removed:
+        manifest.save()
+        print(f"🗑️ {len(removed)} PDFs removidos da coleção.")
+
     if not pdf_files:
         print("Nenhum PDF encontrado na pasta.")
         return
 
+    file_hashes = {p.name: file_sha256(str(p)) for p in pdf_files}
+    pending = [
+        p
+        for p in pdf_files
+        if force or not manifest.is_current(p.name, file_hashes[p.name])
+    ]
+    if len(pending) < len(pdf_files):
+        print(f"⏭️ {len(pdf_files) - len(pending)} PDFs inalterados, pulando.")
+
     total_chunks = 0
-    for pdf_file in pdf_files:
-        chunks = process_pdf_file(str(pdf_file), embedder)
-        if not chunks:
-            continue
-        texts = [c["text"] for c in chunks]
-        metadatas = [c["metadata"] for c in chunks]
-        vector_store.add_texts(texts=texts, metadatas=metadatas)
-        total_chunks += len(chunks)
+    batch: List[Dict[str, Any]] = []
+    batch_ids: List[str] = []
+    stale_ids: List[str] = []
+    batch_files: List[tuple] = []
+
+    def flush() -> None:
+        nonlocal total_chunks
+        if batch:
+            # Upsert: IDs determinísticos substituem as versões anteriores dos chunks
+            vector_store.add_texts(
+                texts=[c["text"] for c in batch],
+                metadatas=[c["metadata"] for c in batch],
+                ids=list(batch_ids),
+                batch_size=batch_size,
+            )
+            total_chunks += len(batch)
+        if stale_ids:
+            embedder.client.delete(
+                collection_name=collection,
+                points_selector=models.PointIdsList(points=list(stale_ids)),
+            )
+        # Só marca como concluído depois que os pontos estão no Qdrant
+        for pdf_name, sha256, chunk_hashes in batch_files:
+            manifest.mark_done(pdf_name, sha256, chunk_hashes)
+        manifest.save()
+        batch.clear()
+        batch_ids.clear()
+        stale_ids.clear()
+        batch_files.clear()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_pdf_file, str(pdf_file), embedder): pdf_file
+            for pdf_file in pending
+        }
+        for future in as_completed(futures):
+            pdf_file = futures[future]
+            try:
+                chunks = future.result()
+            except Exception as e:
+                print(f"⚠️ Erro ao processar {pdf_file.name}: {e}")
+                chunks = []
+            if not chunks:
+                manifest.mark_failed(pdf_file.name)
+                continue
+
+            previous = manifest.chunk_hashes(pdf_file.name)
+            chunk_hashes = {}
+            for chunk in chunks:
+                chunk_type = chunk["metadata"]["chunk_type"]
+                chunk_hashes[chunk_type] = chunk_sha256(chunk)
+                # Chunk idêntico ao já indexado: não paga o embedding de novo
+                if not force and previous.get(chunk_type) == chunk_hashes[chunk_type]:
+                    continue
+                batch.append(chunk)
+                batch_ids.append(chunk_point_id(pdf_file.name, chunk_type))
+            stale_ids.extend(
+                chunk_point_id(pdf_file.name, t)
+                for t in previous
+                if t not in chunk_hashes
+            )
+            batch_files.append(
+                (pdf_file.name, file_hashes[pdf_file.name], chunk_hashes)
+            )
+            if len(batch) >= batch_size:
+                flush()
+    flush()
 
     print(
-        f"✅ {len(pdf_files)} PDFs processados. {total_chunks} chunks inseridos no Qdrant."
+        f"✅ {len(pending)} PDFs processados. {total_chunks} chunks inseridos/atualizados no Qdrant."
     )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List
+
+from app.utils.settings import settings
+
+# Namespace fixo: o mesmo pdf_name + chunk_type gera sempre o mesmo ID no Qdrant
+POINT_ID_NAMESPACE = uuid.UUID("6f1c6d0e-5b3a-4c52-9a57-0d6a3f2b7c11")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_sha256(chunk: Dict[str, Any]) -> str:
+    """Hash do texto + metadados do chunk (mudança em qualquer um exige novo upsert)."""
+    payload = json.dumps(
+        {"text": chunk["text"], "metadata": chunk["metadata"]},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def chunk_point_id(pdf_name: str, chunk_type: str) -> str:
+    """ID determinístico do ponto no Qdrant, derivado de pdf_name + chunk_type."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{pdf_name}:{chunk_type}"))
+
+
+class IngestManifest:
+    """
+    Registro em disco do progresso da ingestão, por arquivo PDF.
+    Guarda o hash de cada PDF e de cada chunk inserido, permitindo retomar execuções
+    interrompidas e reingerir apenas o que mudou.
+    """
+
+    def __init__(self, collection: str, manifest_dir: str = settings.INGEST_MANIFEST_DIR):
+        self.path = os.path.join(manifest_dir, f"ingest_{collection}.json")
+        self._lock = threading.Lock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.files = json.load(f)
+
+    def is_current(self, pdf_name: str, sha256: str) -> bool:
+        """True se o PDF já foi ingerido com exatamente este conteúdo."""
+        entry = self.files.get(pdf_name, {})
+        return entry.get("status") == "done" and entry.get("sha256") == sha256
+
+    def chunk_hashes(self, pdf_name: str) -> Dict[str, str]:
+        """chunk_type -> hash dos chunks atualmente no Qdrant para o PDF."""
+        return dict(self.files.get(pdf_name, {}).get("chunk_hashes", {}))
+
+    def point_ids(self, pdf_name: str) -> List[str]:
+        return [chunk_point_id(pdf_name, t) for t in self.chunk_hashes(pdf_name)]
+
+    def mark_done(
+        self, pdf_name: str, sha256: str, chunk_hashes: Dict[str, str]
+    ) -> None:
+        with self._lock:
+            self.files[pdf_name] = {
+                "status": "done",
+                "sha256": sha256,
+                "chunks": len(chunk_hashes),
+                "chunk_hashes": chunk_hashes,
+                "updated_at": time.time(),
+            }
+
+    def mark_failed(self, pdf_name: str) -> None:
+        with self._lock:
+            # Mantém os hashes anteriores: os pontos antigos continuam no Qdrant
+            entry = self.files.get(pdf_name, {})
+            entry.update({"status": "failed", "updated_at": time.time()})
+            self.files[pdf_name] = entry
+
+    def remove(self, pdf_name: str) -> None:
+        with self._lock:
+            self.files.pop(pdf_name, None)
+
+    def save(self) -> None:
+        """Grava de forma atômica (arquivo temporário + rename)."""
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.files, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,70 @@
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from typing import List
+
+from langchain_qdrant import SparseEmbeddings, SparseVector
+
+from app.utils.settings import settings
+
+# Stopwords mais frequentes do português jurídico (não ajudam na busca por termo exato)
+_STOPWORDS = {
+    "a", "as", "o", "os", "um", "uma", "de", "da", "das", "do", "dos", "e", "em",
+    "na", "nas", "no", "nos", "por", "para", "com", "que", "se", "ao", "aos",
+    "ou", "sua", "seu", "suas", "seus", "pela", "pelo", "pelas", "pelos", "nao",
+    "sao", "ser", "qual", "quais",
+}
+
+# Números com separador de milhar ("8.666") viram um único token ("8666")
+_THOUSANDS_RE = re.compile(r"\b\d{1,3}(?:\.\d{3})+\b")
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _THOUSANDS_RE.sub(lambda m: m.group(0).replace(".", ""), text)
+    return [t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS]
+
+
+def _token_index(token: str) -> int:
+    # Hash estável: dispensa persistir um vocabulário entre ingestão e consulta
+    return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+
+class BM25SparseEmbeddings(SparseEmbeddings):
+    """
+    Encoder esparso BM25 calculado localmente, sem chamadas de rede.
+
+    Os documentos recebem o termo de frequência saturado do BM25; a consulta recebe
+    peso 1 por termo. O IDF é aplicado pelo próprio Qdrant (Modifier.IDF no vetor
+    esparso da coleção), então nenhuma estatística do corpus precisa ser mantida aqui.
+    """
+
+    def __init__(
+        self,
+        k1: float = settings.BM25_K1,
+        b: float = settings.BM25_B,
+        avg_len: float = settings.BM25_AVG_LEN,
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.avg_len = avg_len
+
+    def _encode_document(self, text: str) -> SparseVector:
+        tokens = tokenize(text)
+        doc_len = len(tokens)
+        weights = {}
+        for token, tf in Counter(tokens).items():
+            norm = self.k1 * (1 - self.b + self.b * doc_len / self.avg_len)
+            index = _token_index(token)
+            weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + norm)
+        return SparseVector(indices=list(weights), values=list(weights.values()))
+
+    def embed_documents(self, texts: List[str]) -> List[SparseVector]:
+        return [self._encode_document(t) for t in texts]
+
+    def embed_query(self, text: str) -> SparseVector:
+        indices = sorted({_token_index(t) for t in tokenize(text)})
+        return SparseVector(indices=indices, values=[1.0] * len(indices))
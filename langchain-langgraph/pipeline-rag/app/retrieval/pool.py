@@ -0,0 +1,76 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from langchain.retrievers.self_query.base import SelfQueryRetriever
+
+from app.ingest.embed_qdrant import EmbeddingSelfQuery
+from app.retrieval.retriever import SelfQueryConfig, build_self_query_retriever
+
+
+class RetrieverPool:
+    """
+    Pool de recursos de longa duração do processo.
+
+    Mantém um único EmbeddingSelfQuery (ChatOpenAI, QdrantClient e OpenAIEmbeddings,
+    cujas conexões HTTP ficam em keep-alive) e um SelfQueryRetriever por
+    (collection_name, k, retrieval_mode), evitando reconstruí-los a cada pergunta.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._embedder: Optional[EmbeddingSelfQuery] = None
+        self._retrievers: Dict[Tuple[str, int, str], SelfQueryRetriever] = {}
+        self.hits = 0
+        self.constructions = 0
+
+    def get_embedder(self) -> EmbeddingSelfQuery:
+        with self._lock:
+            return self._get_embedder_locked()
+
+    def _get_embedder_locked(self) -> EmbeddingSelfQuery:
+        if self._embedder is None:
+            self._embedder = EmbeddingSelfQuery()
+            self.constructions += 1
+        else:
+            self.hits += 1
+        return self._embedder
+
+    def get_retriever(self, cfg: SelfQueryConfig) -> SelfQueryRetriever:
+        key = (cfg.collection_name, cfg.k, cfg.retrieval_mode.value)
+        with self._lock:
+            retriever = self._retrievers.get(key)
+            if retriever is not None:
+                self.hits += 1
+                return retriever
+            embedder = self._get_embedder_locked()
+            retriever = build_self_query_retriever(cfg, embedder=embedder)
+            self._retrievers[key] = retriever
+            self.constructions += 1
+            return retriever
+
+    def reset(self, embedder: Optional[EmbeddingSelfQuery] = None) -> None:
+        """Descarta os recursos do pool; `embedder` substitui o padrão (ex.: benchmarks)."""
+        with self._lock:
+            self._embedder = embedder
+            self._retrievers.clear()
+            self.hits = 0
+            self.constructions = 0
+
+    def warm(self, cfg: SelfQueryConfig) -> None:
+        """Constrói antecipadamente os recursos da chave; falhas não impedem o startup."""
+        try:
+            self.get_retriever(cfg)
+        except Exception as e:
+            print(f"⚠️ Não foi possível pré-aquecer o pool ({cfg.collection_name}): {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "constructions": self.constructions,
+                "retrievers": len(self._retrievers),
+            }
+
+
+# Instância única compartilhada pelo processo
+retriever_pool = RetrieverPool()
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.structured_query import (
+    Comparator,
+    Comparison,
+    Operation,
+    Operator,
+    StructuredQuery,
+)
+
+from app.retrieval.query_parser import normalize_question
+from app.utils.settings import settings
+
+
+# --- Serialização da StructuredQuery ---
+def _filter_to_dict(filter_obj: Any) -> Optional[Dict[str, Any]]:
+    if filter_obj is None:
+        return None
+    if isinstance(filter_obj, Comparison):
+        return {
+            "comparator": filter_obj.comparator.value,
+            "attribute": filter_obj.attribute,
+            "value": filter_obj.value,
+        }
+    return {
+        "operator": filter_obj.operator.value,
+        "arguments": [_filter_to_dict(arg) for arg in filter_obj.arguments],
+    }
+
+
+def _filter_from_dict(data: Optional[Dict[str, Any]]) -> Any:
+    if data is None:
+        return None
+    if "comparator" in data:
+        return Comparison(
+            comparator=Comparator(data["comparator"]),
+            attribute=data["attribute"],
+            value=data["value"],
+        )
+    return Operation(
+        operator=Operator(data["operator"]),
+        arguments=[_filter_from_dict(arg) for arg in data["arguments"]],
+    )
+
+
+def dumps_structured_query(structured_query: StructuredQuery) -> str:
+    return json.dumps(
+        {
+            "query": structured_query.query,
+            "filter": _filter_to_dict(structured_query.filter),
+            "limit": structured_query.limit,
+        },
+        ensure_ascii=False,
+    )
+
+
+def loads_structured_query(payload: str) -> StructuredQuery:
+    data = json.loads(payload)
+    return StructuredQuery(
+        query=data["query"],
+        filter=_filter_from_dict(data["filter"]),
+        limit=data["limit"],
+    )
+
+
+class StructuredQueryCache:
+    """
+    Cache persistente (SQLite) de pergunta normalizada -> StructuredQuery,
+    com expiração por TTL e descarte LRU acima de `max_entries`.
+
+    Guarda também a latência do LLM que gerou cada entrada, para contabilizar
+    o tempo economizado em cada acerto.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.QUERY_CACHE_PATH,
+        ttl_seconds: int = settings.QUERY_CACHE_TTL_SECONDS,
+        max_entries: int = settings.QUERY_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS structured_queries (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                latency REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.fast_path_hits = 0
+        self.saved_seconds = 0.0
+        self._llm_seconds = 0.0
+
+    def get(self, question: str) -> Optional[StructuredQuery]:
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, latency, created_at FROM structured_queries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute(
+                        "DELETE FROM structured_queries WHERE key = ?", (key,)
+                    )
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE structured_queries SET last_access = ? WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+            self.saved_seconds += row[1]
+        return loads_structured_query(row[0])
+
+    def put(
+        self, question: str, structured_query: StructuredQuery, latency: float
+    ) -> None:
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            self._llm_seconds += latency
+            self._conn.execute(
+                "INSERT OR REPLACE INTO structured_queries VALUES (?, ?, ?, ?, ?)",
+                (key, dumps_structured_query(structured_query), latency, now, now),
+            )
+            # Descarte LRU: mantém apenas as `max_entries` entradas mais recentes
+            self._conn.execute(
+                """
+                DELETE FROM structured_queries WHERE key NOT IN (
+                    SELECT key FROM structured_queries
+                    ORDER BY last_access DESC LIMIT ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def record_fast_path(self) -> None:
+        """Contabiliza uma pergunta resolvida pelo parser determinístico, sem LLM."""
+        with self._lock:
+            self.fast_path_hits += 1
+            # Estimativa: latência média observada do query constructor
+            if self.misses:
+                self.saved_seconds += self._llm_seconds / self.misses
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "fast_path_hits": self.fast_path_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+# Instância única compartilhada pelo processo
+query_cache = StructuredQueryCache()
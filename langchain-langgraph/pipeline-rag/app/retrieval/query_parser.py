@@ -0,0 +1,107 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from langchain_core.structured_query import (
+    Comparator,
+    Comparison,
+    Operation,
+    Operator,
+    StructuredQuery,
+)
+
+from app.retrieval.self_query import metadata_field_info
+
+
+def normalize_question(question: str) -> str:
+    """Normaliza a pergunta (minúsculas, sem acentos/pontuação) para uso como chave."""
+    text = unicodedata.normalize("NFKD", question.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _field_values(name: str, pattern: str) -> List[str]:
+    """Extrai os valores de exemplo citados na descrição de um campo do metadata_field_info."""
+    for field in metadata_field_info:
+        if field.name == name:
+            return re.findall(pattern, field.description)
+    return []
+
+
+# Valores conhecidos, lidos das descrições dos campos
+_STATUS_VALUES = _field_values("status_atual", r"'([A-Z]+)'")
+_CHUNK_TYPES = _field_values("chunk_type", r"'([a-z_]+)'")
+
+_SUMULA_RE = re.compile(r"\bsumulas? (?:n[o°º]? |numero )?(\d{1,4})\b")
+# Só pistas explícitas de data: um "de" solto ("lei 8.666 de 1993", "súmula 331 de
+# 2011") é o ano de edição do ato, não o ano do status
+_YEAR_RE = re.compile(
+    r"\b(antes de|ate|depois de|apos|a partir de|desde|em) (\d{4})\b"
+)
+_YEAR_COMPARATORS: Dict[str, Comparator] = {
+    "antes de": Comparator.LT,
+    "ate": Comparator.LTE,
+    "depois de": Comparator.GT,
+    "apos": Comparator.GT,
+    "a partir de": Comparator.GTE,
+    "desde": Comparator.GTE,
+    "em": Comparator.EQ,
+}
+
+
+def parse_structured_query(question: str) -> Optional[StructuredQuery]:
+    """
+    Parser determinístico (sem LLM) para os padrões mais comuns de pergunta:
+    número da súmula, status e ano. Retorna None quando nenhum filtro é reconhecido,
+    deixando a pergunta para o query constructor.
+    """
+    text = normalize_question(question)
+    comparisons: List[Comparison] = []
+
+    match = _SUMULA_RE.search(text)
+    if match:
+        comparisons.append(
+            Comparison(
+                comparator=Comparator.EQ,
+                attribute="num_sumula",
+                value=str(int(match.group(1))),
+            )
+        )
+
+    for status in _STATUS_VALUES:
+        # Aceita singular e plural ("vigente", "vigentes")
+        if re.search(rf"\b{status.lower()}s?\b", text):
+            comparisons.append(
+                Comparison(
+                    comparator=Comparator.EQ, attribute="status_atual", value=status
+                )
+            )
+            break
+
+    match = _YEAR_RE.search(text)
+    if match:
+        comparisons.append(
+            Comparison(
+                comparator=_YEAR_COMPARATORS[match.group(1)],
+                attribute="data_status_ano",
+                value=int(match.group(2)),
+            )
+        )
+
+    for chunk_type in _CHUNK_TYPES:
+        if re.search(rf"\b{chunk_type.replace('_', ' ')}\b", text):
+            comparisons.append(
+                Comparison(
+                    comparator=Comparator.EQ, attribute="chunk_type", value=chunk_type
+                )
+            )
+            break
+
+    if not comparisons:
+        return None
+    if len(comparisons) == 1:
+        filter_ = comparisons[0]
+    else:
+        filter_ = Operation(operator=Operator.AND, arguments=comparisons)
+    return StructuredQuery(query=question, filter=filter_, limit=None)
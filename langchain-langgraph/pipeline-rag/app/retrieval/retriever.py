@@ -1,8 +1,14 @@
-from typing import List, Optional
+import time
+from typing import List, Optional, Tuple
 
 from langchain.retrievers.self_query.base import SelfQueryRetriever
 from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+from langchain_core.structured_query import StructuredQuery
+from langchain_qdrant import RetrievalMode
 from app.ingest.embed_qdrant import EmbeddingSelfQuery
+from app.retrieval.query_cache import query_cache
+from app.retrieval.query_parser import parse_structured_query
 from app.retrieval.self_query import document_content_description, metadata_field_info
 from dataclasses import dataclass
 
@@ -11,14 +17,23 @@ from dataclasses import dataclass
 class SelfQueryConfig:
     collection_name: str = "sumulas_jornada"
     k: int = 10
+    use_query_cache: bool = True
+    use_fast_path: bool = False
+    # HYBRID: denso + esparso (BM25) fundidos por RRF; DENSE mantém o comportamento antigo
+    retrieval_mode: RetrievalMode = RetrievalMode.HYBRID
 
 
-def build_self_query_retriever(cfg: SelfQueryConfig) -> SelfQueryRetriever:
+def build_self_query_retriever(
+    cfg: SelfQueryConfig, embedder: Optional[EmbeddingSelfQuery] = None
+) -> SelfQueryRetriever:
     """
     Cria o SelfQueryRetriever sobre o QdrantVectorStore.
+    Se `embedder` for informado, reutiliza seus clientes em vez de criar novos.
     """
-    embedder = EmbeddingSelfQuery()
-    vectorstore = embedder.get_qdrant_vector_store(cfg.collection_name)
+    embedder = embedder or EmbeddingSelfQuery()
+    vectorstore = embedder.get_qdrant_vector_store(
+        cfg.collection_name, retrieval_mode=cfg.retrieval_mode
+    )
 
     retriever = SelfQueryRetriever.from_llm(
         llm=embedder.llm,
@@ -31,6 +46,153 @@ def build_self_query_retriever(cfg: SelfQueryConfig) -> SelfQueryRetriever:
     return retriever
 
 
+def _prepare_structured_query(
+    retriever: SelfQueryRetriever, query: str, structured_query: StructuredQuery
+) -> Tuple[str, dict]:
+    """Traduz a StructuredQuery (via translator) na consulta e kwargs do vectorstore."""
+    new_query, new_kwargs = (
+        retriever.structured_query_translator.visit_structured_query(structured_query)
+    )
+    if structured_query.limit is not None:
+        new_kwargs["k"] = structured_query.limit
+    if retriever.use_original_query:
+        new_query = query
+    return new_query, {**retriever.search_kwargs, **new_kwargs}
+
+
+def _with_scores(docs_and_scores: List[Tuple[Document, float]]) -> List[Document]:
+    """Copia o score de similaridade para metadata["score"] de cada documento."""
+    for doc, score in docs_and_scores:
+        doc.metadata["score"] = float(score)
+    return [doc for doc, _ in docs_and_scores]
+
+
+def execute_structured_query(
+    retriever: SelfQueryRetriever, query: str, structured_query: StructuredQuery
+) -> List[Document]:
+    """
+    Executa uma StructuredQuery já construída direto no vectorstore, via translator,
+    sem chamar novamente o LLM do query constructor.
+    """
+    new_query, search_kwargs = _prepare_structured_query(
+        retriever, query, structured_query
+    )
+    if retriever.search_type == "similarity":
+        return _with_scores(
+            retriever.vectorstore.similarity_search_with_score(
+                new_query, **search_kwargs
+            )
+        )
+    return retriever.vectorstore.search(
+        new_query, retriever.search_type, **search_kwargs
+    )
+
+
+async def aexecute_structured_query(
+    retriever: SelfQueryRetriever, query: str, structured_query: StructuredQuery
+) -> List[Document]:
+    """Versão assíncrona de execute_structured_query."""
+    new_query, search_kwargs = _prepare_structured_query(
+        retriever, query, structured_query
+    )
+    if retriever.search_type == "similarity":
+        return _with_scores(
+            await retriever.vectorstore.asimilarity_search_with_score(
+                new_query, **search_kwargs
+            )
+        )
+    return await retriever.vectorstore.asearch(
+        new_query, retriever.search_type, **search_kwargs
+    )
+
+
+def _lookup_structured_query(
+    query: str, cfg: SelfQueryConfig
+) -> Optional[StructuredQuery]:
+    """Tenta resolver a pergunta sem LLM: parser determinístico (opcional) e cache."""
+    if cfg.use_fast_path:
+        structured_query = parse_structured_query(query)
+        if structured_query is not None:
+            query_cache.record_fast_path()
+            return structured_query
+
+    if cfg.use_query_cache:
+        return query_cache.get(query)
+    return None
+
+
+def construct_structured_query(
+    retriever: SelfQueryRetriever,
+    query: str,
+    config: Optional[RunnableConfig] = None,
+    cfg: Optional[SelfQueryConfig] = None,
+) -> StructuredQuery:
+    """
+    Obtém a StructuredQuery da pergunta, na ordem: parser determinístico (opcional),
+    cache persistente e, por fim, o LLM do query constructor.
+    """
+    cfg = cfg or SelfQueryConfig()
+    structured_query = _lookup_structured_query(query, cfg)
+    if structured_query is not None:
+        return structured_query
+
+    start = time.perf_counter()
+    structured_query = retriever.query_constructor.invoke(
+        {"query": query}, config=config
+    )
+    if cfg.use_query_cache:
+        query_cache.put(query, structured_query, time.perf_counter() - start)
+    return structured_query
+
+
+async def aconstruct_structured_query(
+    retriever: SelfQueryRetriever,
+    query: str,
+    config: Optional[RunnableConfig] = None,
+    cfg: Optional[SelfQueryConfig] = None,
+) -> StructuredQuery:
+    """Versão assíncrona de construct_structured_query."""
+    cfg = cfg or SelfQueryConfig()
+    structured_query = _lookup_structured_query(query, cfg)
+    if structured_query is not None:
+        return structured_query
+
+    start = time.perf_counter()
+    structured_query = await retriever.query_constructor.ainvoke(
+        {"query": query}, config=config
+    )
+    if cfg.use_query_cache:
+        query_cache.put(query, structured_query, time.perf_counter() - start)
+    return structured_query
+
+
+def self_query_search(
+    retriever: SelfQueryRetriever,
+    query: str,
+    config: Optional[RunnableConfig] = None,
+    cfg: Optional[SelfQueryConfig] = None,
+) -> Tuple[List[Document], StructuredQuery]:
+    """
+    Self-query em passo único: constrói a StructuredQuery uma vez (no máximo uma chamada
+    ao LLM) e retorna os documentos junto com a consulta/filtro gerados.
+    """
+    structured_query = construct_structured_query(retriever, query, config, cfg)
+    docs = execute_structured_query(retriever, query, structured_query)
+    return docs, structured_query
+
+
+async def aself_query_search(
+    retriever: SelfQueryRetriever,
+    query: str,
+    config: Optional[RunnableConfig] = None,
+    cfg: Optional[SelfQueryConfig] = None,
+) -> Tuple[List[Document], StructuredQuery]:
+    """Versão assíncrona de self_query_search."""
+    structured_query = await aconstruct_structured_query(retriever, query, config, cfg)
+    docs = await aexecute_structured_query(retriever, query, structured_query)
+    return docs, structured_query
+
+
 def search(
     query: str,
     cfg: Optional[SelfQueryConfig] = None,
@@ -38,7 +200,9 @@ def search(
     """
     Consulta usando self-query: o LLM infere termos SEMÂNTICOS e também FILTROS de metadado.
     """
+    from app.retrieval.pool import retriever_pool
+
     cfg = cfg or SelfQueryConfig()
-    retriever = build_self_query_retriever(cfg)
-    # .invoke() retorna List[Document]
-    return retriever.invoke(query)
\ No newline at end of file
+    retriever = retriever_pool.get_retriever(cfg)
+    docs, _ = self_query_search(retriever, query, cfg=cfg)
+    return docs
\ No newline at end of file
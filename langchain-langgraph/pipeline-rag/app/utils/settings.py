@@ -12,5 +12,25 @@ class Settings:
     QDRANT_HOST = "localhost"
     QDRANT_PORT = "6333"
 
+    # Cache de StructuredQuery do self-query
+    QUERY_CACHE_PATH = ".cache/structured_queries.sqlite"
+    QUERY_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+    QUERY_CACHE_MAX_ENTRIES = 5000
+
+    # Ingestão paralela
+    INGEST_WORKERS = 8
+    INGEST_BATCH_SIZE = 64
+    INGEST_MANIFEST_DIR = ".cache"
+
+    # Cache de embeddings (compartilhado entre ingestão e consultas)
+    EMBEDDING_CACHE_PATH = ".cache/embeddings.sqlite"
+    EMBEDDING_CACHE_MAX_ENTRIES = 50000
+    EMBEDDING_CACHE_DTYPE = "float32"  # ou "float16", metade do espaço
+
+    # Encoder esparso BM25 (busca híbrida)
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    BM25_AVG_LEN = 200
+
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Benchmark / teste de carga do grafo retrieve -> generate com substitutos locais.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_rag_graph --concurrency 1,2,4,8 --requests 32
+
+Reporta, por nível de concorrência: throughput, p50/p95/p99 de cada nó, do tempo até
+o primeiro token (TTFT) e do total, além de tokens/s.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from app.graph.rag_graph import (
+    build_async_streaming_graph,
+    build_streaming_graph,
+)
+from app.retrieval.pool import retriever_pool
+from benchmarks.fakes import FakeStreamingChatModel, build_local_embedder
+
+BENCH_COLLECTION = "sumulas_bench"
+
+QUESTIONS = [
+    "Quais os precedentes da súmula 70?",
+    "Quais súmulas vigentes antes de 2010?",
+    "Existe súmula sobre licitação e contratos?",
+    "O que diz a súmula 12 sobre servidores?",
+    "Quais súmulas foram revogadas?",
+    "Referências normativas da súmula 5",
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil com interpolação linear (p em 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * p / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class _RequestTimer:
+    """Acumula os marcos de tempo de uma execução a partir dos eventos do grafo."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.retrieved: Optional[float] = None
+        self.first_token: Optional[float] = None
+        self.last_token: Optional[float] = None
+        self.tokens = 0
+
+    def on_event(self, mode: str, chunk: Any) -> None:
+        now = time.perf_counter()
+        if mode == "updates" and "retrieve" in chunk:
+            self.retrieved = now
+        elif mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") == "generate" and message.content:
+                self.tokens += 1
+                self.first_token = self.first_token or now
+                self.last_token = now
+
+    def result(self) -> Dict[str, float]:
+        end = time.perf_counter()
+        retrieved = self.retrieved or end
+        first_token = self.first_token or end
+        streaming = (self.last_token or end) - first_token
+        return {
+            "retrieve_ms": (retrieved - self.start) * 1000,
+            "generate_ms": (end - retrieved) * 1000,
+            "ttft_ms": (first_token - self.start) * 1000,
+            "total_ms": (end - self.start) * 1000,
+            "tokens_per_s": (self.tokens - 1) / streaming if streaming > 0 else 0.0,
+        }
+
+
+def _run_sync(graph: Any, question: str) -> Dict[str, float]:
+    timer = _RequestTimer()
+    for mode, chunk in graph.stream(
+        {"question": question, "messages": []}, stream_mode=["updates", "messages"]
+    ):
+        timer.on_event(mode, chunk)
+    return timer.result()
+
+
+async def _run_async(graph: Any, question: str) -> Dict[str, float]:
+    timer = _RequestTimer()
+    async for mode, chunk in graph.astream(
+        {"question": question, "messages": []}, stream_mode=["updates", "messages"]
+    ):
+        timer.on_event(mode, chunk)
+    return timer.result()
+
+
+async def run_level(
+    graph: Any, mode: str, concurrency: int, requests: int
+) -> Dict[str, Any]:
+    """Executa `requests` perguntas com no máximo `concurrency` simultâneas."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> Dict[str, float]:
+        question = QUESTIONS[i % len(QUESTIONS)]
+        async with semaphore:
+            if mode == "sync":
+                # Modo síncrono: uma thread por conversa, como no Streamlit
+                return await asyncio.to_thread(_run_sync, graph, question)
+            return await _run_async(graph, question)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - start
+
+    summary: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "throughput_rps": requests / wall,
+    }
+    for metric in ("retrieve_ms", "generate_ms", "ttft_ms", "total_ms", "tokens_per_s"):
+        values = [r[metric] for r in results]
+        for p in (50, 95, 99):
+            summary[f"{metric}_p{p}"] = percentile(values, p)
+    return summary
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    header = (
+        f"{'conc':>4} {'req/s':>7} | {'retrieve p50/p95/p99':>22} | "
+        f"{'generate p50/p95/p99':>22} | {'ttft p50/p95/p99':>22} | "
+        f"{'total p50/p95/p99':>22} | {'tok/s p50':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    def triple(row: Dict[str, Any], metric: str) -> str:
+        return "/".join(f"{row[f'{metric}_p{p}']:.0f}" for p in (50, 95, 99))
+
+    for row in rows:
+        print(
+            f"{row['concurrency']:>4} {row['throughput_rps']:>7.2f} | "
+            f"{triple(row, 'retrieve_ms'):>22} | {triple(row, 'generate_ms'):>22} | "
+            f"{triple(row, 'ttft_ms'):>22} | {triple(row, 'total_ms'):>22} | "
+            f"{row['tokens_per_s_p50']:>9.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--mode", choices=["async", "sync"], default="async")
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--pdf-dir", default="sumulas")
+    parser.add_argument("--max-pdfs", type=int, default=None)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--qc-ms", type=float, default=500, help="latência do query constructor")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    parser.add_argument("--embed-ms", type=float, default=0)
+    parser.add_argument("--json", dest="json_path", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    llm = FakeStreamingChatModel(
+        query_constructor_latency=args.qc_ms / 1000,
+        first_token_latency=args.first_token_ms / 1000,
+        token_latency=args.token_ms / 1000,
+        answer_tokens=args.answer_tokens,
+    )
+    embedder = build_local_embedder(
+        llm,
+        BENCH_COLLECTION,
+        pdf_dir=args.pdf_dir,
+        max_pdfs=args.max_pdfs,
+        dim=args.dim,
+        embed_latency=args.embed_ms / 1000,
+    )
+    retriever_pool.reset(embedder=embedder)
+
+    # Sem cache de StructuredQuery: cada pergunta paga o query constructor
+    build = build_async_streaming_graph if args.mode == "async" else build_streaming_graph
+    graph = build(collection_name=BENCH_COLLECTION, k=args.k, use_query_cache=False)
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    rows = [
+        asyncio.run(run_level(graph, args.mode, level, args.requests)) for level in levels
+    ]
+    _print_table(rows)
+    print(f"Pool: {retriever_pool.stats()}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Substitutos locais (sem rede) para o benchmark do grafo RAG:
+LLM falso com latência configurável e Qdrant em memória populado a partir de sumulas/.
+"""
+
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from markitdown import MarkItDown
+from qdrant_client import QdrantClient, models
+from qdrant_client.http.models import Distance, SparseVectorParams, VectorParams
+
+from app.ingest.embed_qdrant import EmbeddingSelfQuery
+
+_WORDS = (
+    "Conforme a Súmula o Tribunal de Contas entende que a despesa pública "
+    "deve observar os princípios da legalidade e da economicidade"
+).split()
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """
+    LLM determinístico. Para o prompt do query constructor devolve uma StructuredQuery
+    sem filtro; para os demais, gera `answer_tokens` tokens com latência de primeiro
+    token e intervalo entre tokens configuráveis.
+    """
+
+    query_constructor_latency: float = 0.5
+    first_token_latency: float = 0.3
+    token_latency: float = 0.02
+    answer_tokens: int = 200
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    @staticmethod
+    def _prompt(messages: List[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    def _structured_request(self, prompt: str) -> Optional[str]:
+        if "Structured Request" not in prompt:
+            return None
+        queries = re.findall(r"User Query:\s*(.*?)\s*Structured Request:", prompt, re.S)
+        query = queries[-1] if queries else ""
+        payload = json.dumps({"query": query, "filter": "NO_FILTER"}, ensure_ascii=False)
+        return f"```json\n{payload}\n```"
+
+    def _tokens(self) -> List[str]:
+        return [f"{_WORDS[i % len(_WORDS)]} " for i in range(self.answer_tokens)]
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any
+    ) -> ChatResult:
+        structured = self._structured_request(self._prompt(messages))
+        if structured is not None:
+            time.sleep(self.query_constructor_latency)
+            text = structured
+        else:
+            text = "".join(c.message.content for c in self._stream(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any
+    ) -> ChatResult:
+        structured = self._structured_request(self._prompt(messages))
+        if structured is not None:
+            await asyncio.sleep(self.query_constructor_latency)
+            text = structured
+        else:
+            text = "".join([c.message.content async for c in self._astream(messages)])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        structured = self._structured_request(self._prompt(messages))
+        if structured is not None:
+            time.sleep(self.query_constructor_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=structured))
+            return
+        time.sleep(self.first_token_latency)
+        for i, token in enumerate(self._tokens()):
+            if i:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        structured = self._structured_request(self._prompt(messages))
+        if structured is not None:
+            await asyncio.sleep(self.query_constructor_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=structured))
+            return
+        await asyncio.sleep(self.first_token_latency)
+        for i, token in enumerate(self._tokens()):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class SlowFakeEmbedding(DeterministicFakeEmbedding):
+    """Embedding determinístico local com latência fixa por chamada."""
+
+    latency: float = 0.0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def _split_sumula(text: str) -> dict:
+    """Divide o texto da súmula nos três chunks usados pela ingestão real (sem LLM)."""
+    parts = re.split(r"REFER[ÊE]NCIAS NORMATIVAS:?|PRECEDENTES:?", text, maxsplit=2)
+    names = ["conteudo_principal", "referencias_normativas", "precedentes"]
+    return {name: part.strip() for name, part in zip(names, parts) if part.strip()}
+
+
+def build_local_embedder(
+    llm: BaseChatModel,
+    collection: str,
+    pdf_dir: str = "sumulas",
+    max_pdfs: Optional[int] = None,
+    dim: int = 256,
+    embed_latency: float = 0.0,
+) -> EmbeddingSelfQuery:
+    """Cria um EmbeddingSelfQuery com Qdrant em memória já populado com as súmulas."""
+    embeddings = SlowFakeEmbedding(size=dim, latency=embed_latency)
+    embedder = EmbeddingSelfQuery(
+        llm=llm, client=QdrantClient(":memory:"), embeddings=embeddings
+    )
+    embedder.client.create_collection(
+        collection_name=collection,
+        vectors_config={"text-dense": VectorParams(size=dim, distance=Distance.COSINE)},
+        sparse_vectors_config={
+            "text-sparse": SparseVectorParams(modifier=models.Modifier.IDF)
+        },
+    )
+
+    md = MarkItDown()
+    texts, metadatas = [], []
+    for pdf_file in sorted(Path(pdf_dir).glob("*.pdf"))[:max_pdfs]:
+        text = md.convert(str(pdf_file)).text_content or ""
+        # "Súmula 001-87.pdf" -> súmula 1, ano 1987
+        match = re.search(r"(\d+)-(\d{2})", pdf_file.stem)
+        year = None
+        if match:
+            yy = int(match.group(2))
+            year = (1900 if yy >= 50 else 2000) + yy
+        status = re.findall(r"VIGENTE|REVOGADA|ALTERADA", text)
+        for idx, (chunk_type, chunk) in enumerate(_split_sumula(text).items()):
+            texts.append(chunk)
+            metadatas.append(
+                {
+                    "num_sumula": str(int(match.group(1))) if match else None,
+                    "data_status_ano": year,
+                    "status_atual": status[-1] if status else None,
+                    "pdf_name": pdf_file.name,
+                    "chunk_type": chunk_type,
+                    "chunk_index": idx,
+                }
+            )
+
+    embedder.get_qdrant_vector_store(collection).add_texts(
+        texts=texts, metadatas=metadatas
+    )
+    print(f"Qdrant em memória: {len(texts)} chunks de súmulas indexados.")
+    return embedder
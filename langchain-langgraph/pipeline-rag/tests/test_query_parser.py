@@ -0,0 +1,56 @@
+import pytest
+
+from langchain_core.structured_query import Comparator, Comparison, Operation
+
+from app.retrieval.query_parser import parse_structured_query
+
+
+def _comparisons(question):
+    structured = parse_structured_query(question)
+    if structured is None:
+        return []
+    if isinstance(structured.filter, Operation):
+        return structured.filter.arguments
+    return [structured.filter]
+
+
+def _year_filters(question):
+    return [
+        (c.comparator, c.value)
+        for c in _comparisons(question)
+        if isinstance(c, Comparison) and c.attribute == "data_status_ano"
+    ]
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("Quais súmulas vigentes antes de 2010?", [(Comparator.LT, 2010)]),
+        ("Súmulas alteradas até 2015", [(Comparator.LTE, 2015)]),
+        ("Súmulas revogadas depois de 2018", [(Comparator.GT, 2018)]),
+        ("Súmulas vigentes a partir de 2012", [(Comparator.GTE, 2012)]),
+        ("Quais súmulas foram revogadas em 2020?", [(Comparator.EQ, 2020)]),
+    ],
+)
+def test_explicit_year_cues(question, expected):
+    assert _year_filters(question) == expected
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "O que diz a lei 8.666 de 1993 sobre licitação?",
+        "Precedentes da súmula 331 de 2011",
+        "Súmulas sobre o decreto de 2005",
+    ],
+)
+def test_bare_de_is_not_a_year_filter(question):
+    assert _year_filters(question) == []
+
+
+def test_sumula_number_still_parsed_next_to_bare_de():
+    comparisons = _comparisons("Precedentes da súmula 331 de 2011")
+    assert [(c.attribute, c.value) for c in comparisons] == [
+        ("num_sumula", "331"),
+        ("chunk_type", "precedentes"),
+    ]
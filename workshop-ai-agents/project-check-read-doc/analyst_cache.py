@@ -0,0 +1,199 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+_SYSTEM_SCHEMAS = "('pg_catalog', 'information_schema')"
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and drop trailing semicolons so equivalent queries share a key."""
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+
+def _is_read_query(sql: str) -> bool:
+    return normalize_sql(sql).lower().startswith(("select", "with"))
+
+
+def _rows(raw: str) -> List[Dict[str, Any]]:
+    """The postgres MCP server returns rows as a JSON array in the tool output."""
+    try:
+        rows = json.loads(raw)
+        return rows if isinstance(rows, list) else []
+    except (TypeError, ValueError):
+        return []
+
+
+# Same filter as crewai/airbnb_mcp_server/src/tool_cache.py (separate project, so a
+# copy): plain-text failures as returned by MCP tools/crewai ("Error executing tool ...")
+_ERROR_TEXT = re.compile(r"^\s*(error|exception|traceback|failed|erro)\b", re.IGNORECASE)
+
+
+def _is_error(result: Any) -> bool:
+    """Results that must not be cached: empty output, JSON errors or error text."""
+    if result is None:
+        return True
+    if not isinstance(result, str):
+        return False
+    if not result.strip() or _ERROR_TEXT.match(result):
+        return True
+    try:
+        parsed = json.loads(result)
+    except ValueError:
+        return False
+    return isinstance(parsed, dict) and ("error" in parsed or parsed.get("isError") is True)
+
+
+class SchemaSnapshotCache:
+    """
+    Cached, compact description of the database schema for the agent prompt.
+
+    A cheap fingerprint query detects DDL changes every `check_interval` seconds;
+    the snapshot itself is rebuilt when the fingerprint changes or `ttl` expires.
+    """
+
+    def __init__(
+        self,
+        schemas: List[str],
+        ttl: float = 3600.0,
+        check_interval: float = 60.0,
+    ):
+        self.schemas = schemas
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self.refreshes = 0
+
+    def _schema_filter(self) -> str:
+        names = ", ".join(f"'{s}'" for s in self.schemas)
+        return f"table_schema IN ({names})" if names else f"table_schema NOT IN {_SYSTEM_SCHEMAS}"
+
+    def _fingerprint_sql(self) -> str:
+        return (
+            "SELECT md5(string_agg(table_schema || '.' || table_name || '.' || column_name "
+            "|| ':' || data_type, ',' ORDER BY table_schema, table_name, ordinal_position)) "
+            f"AS fingerprint FROM information_schema.columns WHERE {self._schema_filter()}"
+        )
+
+    def _snapshot_sql(self) -> str:
+        return (
+            "SELECT table_schema, table_name, column_name, data_type "
+            f"FROM information_schema.columns WHERE {self._schema_filter()} "
+            "ORDER BY table_schema, table_name, ordinal_position"
+        )
+
+    def _build(self, query_tool: BaseTool) -> str:
+        tables: "OrderedDict[str, List[str]]" = OrderedDict()
+        for row in _rows(query_tool.run(sql=self._snapshot_sql())):
+            key = f"{row['table_schema']}.{row['table_name']}"
+            tables.setdefault(key, []).append(f"{row['column_name']} {row['data_type']}")
+        return "\n".join(f"- {name}({', '.join(cols)})" for name, cols in tables.items())
+
+    def get(self, query_tool: BaseTool) -> Tuple[str, Optional[str]]:
+        """Return (snapshot, fingerprint), refreshing on TTL expiry or schema change."""
+        now = time.monotonic()
+        with self._lock:
+            expired = self._snapshot is None or now - self._built_at > self.ttl
+            if not expired and now - self._checked_at < self.check_interval:
+                return self._snapshot, self._fingerprint
+
+            rows = _rows(query_tool.run(sql=self._fingerprint_sql()))
+            fingerprint = rows[0].get("fingerprint") if rows else None
+            self._checked_at = now
+            if expired or fingerprint != self._fingerprint:
+                logger.info("Refreshing schema snapshot...")
+                self._snapshot = self._build(query_tool)
+                self._fingerprint = fingerprint
+                self._built_at = now
+                self.refreshes += 1
+            return self._snapshot, self._fingerprint
+
+
+class QueryResultCache:
+    """
+    LRU cache of read-query results keyed by normalized SQL.
+    Entries expire after `ttl` seconds and are all dropped when the schema changes.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._schema_fingerprint: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def invalidate_on_schema_change(self, fingerprint: Optional[str]) -> None:
+        with self._lock:
+            if fingerprint != self._schema_fingerprint:
+                self._entries.clear()
+                self._schema_fingerprint = fingerprint
+
+    def get(self, sql: str) -> Optional[str]:
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, sql: str, result: str) -> None:
+        key = normalize_sql(sql)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class CachedQueryTool(BaseTool):
+    """Wraps the MCP `query` tool, answering repeated read queries from QueryResultCache."""
+
+    inner_tool: Any = None
+    cache: Any = None
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, cache: QueryResultCache) -> "CachedQueryTool":
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            inner_tool=tool,
+            cache=cache,
+        )
+
+    def _run(self, sql: str, **kwargs: Any) -> str:
+        if not _is_read_query(sql):
+            return self.inner_tool.run(sql=sql, **kwargs)
+        cached = self.cache.get(sql)
+        if cached is not None:
+            return cached
+        result = self.inner_tool.run(sql=sql, **kwargs)
+        # Syntax errors and dropped connections must not be replayed to later queries
+        if not _is_error(result):
+            self.cache.put(sql, result)
+        return result
@@ -1,7 +1,9 @@
 import streamlit as st
-import asyncio
+import queue
 import uuid
-from fastmcp import Client
+from mcp_client import PersistentMCPClient
+
+SERVER_URL = "http://127.0.0.1:8004/sse"  # Replace with your server URL
 
 # Set up page configuration
 st.set_page_config(page_title="AI Database Assistant", layout="centered")
@@ -14,6 +16,13 @@ st.markdown("Ask questions about your database and get AI-powered insights")
 if "user_id" not in st.session_state:
     st.session_state.user_id = str(uuid.uuid4())
 
+# One persistent MCP connection per process, shared by all sessions and reruns:
+# sessions end without any teardown hook, so per-session clients would leak their
+# loop threads and SSE connections
+@st.cache_resource
+def get_mcp_client(url: str) -> PersistentMCPClient:
+    return PersistentMCPClient(url)
+
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -24,15 +33,23 @@ for message in st.session_state.messages:
         st.markdown(message["content"])
 
 
-# Helper: Call the MCP agent server via SSE
-async def call_agent(question: str):
-    client = Client("http://127.0.0.1:8004/sse")  # Replace with your server URL
-    async with client:
-        result = await client.call_tool(
-            "postgres-analyst",
-            {"question": question},
-        )
-        return result[0].text if result and hasattr(result[0], "text") else str(result)
+# Helper: Call the MCP agent server, streaming progress into the chat
+def call_agent(question: str, user_id: str, placeholder) -> str:
+    updates: "queue.Queue[str]" = queue.Queue()
+    future = get_mcp_client(SERVER_URL).call_tool(
+        "postgres-analyst",
+        {"question": question, "user_id": user_id},
+        on_progress=updates.put,
+    )
+
+    steps = []
+    while not future.done():
+        try:
+            steps.append(updates.get(timeout=0.2))
+        except queue.Empty:
+            continue
+        placeholder.markdown("\n\n".join(f"_{step}_" for step in steps) + " ▌")
+    return future.result()
 
 
 # Chat input
@@ -46,19 +63,20 @@ if prompt := st.chat_input("Ask me anything about the database..."):
 
     # Display assistant response
     with st.chat_message("assistant"):
-        with st.spinner("Analyzing your question..."):
-            try:
-                response = asyncio.run(call_agent(prompt))
-                st.markdown(response)
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": response}
-                )
-            except Exception as e:
-                error_msg = f"Sorry, I encountered an error: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": error_msg}
-                )
+        placeholder = st.empty()
+        placeholder.markdown("_Analyzing your question..._ ▌")
+        try:
+            response = call_agent(prompt, st.session_state.user_id, placeholder)
+            placeholder.markdown(response)
+            st.session_state.messages.append(
+                {"role": "assistant", "content": response}
+            )
+        except Exception as e:
+            error_msg = f"Sorry, I encountered an error: {str(e)}"
+            placeholder.error(error_msg)
+            st.session_state.messages.append(
+                {"role": "assistant", "content": error_msg}
+            )
 
 # Sidebar with info
 with st.sidebar:
@@ -80,5 +98,5 @@ with st.sidebar:
         st.rerun()
 
     st.markdown("---")
-    st.markdown("**Server:** `http://127.0.0.1:8004/sse`")
+    st.markdown(f"**Server:** `{SERVER_URL}`")
     st.markdown("**Tool:** `postgres-analyst`")
\ No newline at end of file
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ServerBusyError(RuntimeError):
+    """Raised when the admission queue is full."""
+
+
+class AnalysisCancelled(RuntimeError):
+    """Raised inside a running analysis after its client went away."""
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+class AnalystExecutor:
+    """
+    Runs blocking analyst calls on a bounded worker pool so the event loop keeps
+    serving other SSE clients.
+
+    - at most `max_workers` calls run at once and `max_queue` more may wait;
+      anything beyond that is rejected immediately (ServerBusyError)
+    - each user_id gets at most `per_user_limit` calls in flight; calls without a
+      user_id are only bound by the global limits
+    - if the awaiting request is cancelled (client disconnected), a queued call is
+      dropped and a running one is signalled through its cancel event; its
+      admission and user slots are held until the worker thread actually returns
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 16, per_user_limit: int = 1):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.per_user_limit = per_user_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analyst")
+        self._lock = threading.Lock()
+        self._user_slots: Dict[str, Tuple[asyncio.Semaphore, int]] = {}
+
+        self.admitted = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self._latencies: Deque[Tuple[float, float]] = deque(maxlen=500)
+
+    def _acquire_user_slot(self, user_id: str) -> asyncio.Semaphore:
+        semaphore, refs = self._user_slots.get(user_id, (None, 0))
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_user_limit)
+        self._user_slots[user_id] = (semaphore, refs + 1)
+        return semaphore
+
+    def _release_user_slot(self, user_id: str) -> None:
+        semaphore, refs = self._user_slots[user_id]
+        if refs <= 1:
+            del self._user_slots[user_id]
+        else:
+            self._user_slots[user_id] = (semaphore, refs - 1)
+
+    def _release_user(self, semaphore: asyncio.Semaphore, user_id: str) -> None:
+        semaphore.release()
+        self._release_user_slot(user_id)
+
+    def _leave(self) -> None:
+        with self._lock:
+            self.admitted -= 1
+
+    async def submit(
+        self, fn: Callable[..., Any], *args: Any, user_id: Optional[str] = None
+    ) -> Any:
+        """
+        Run `fn(*args, cancel_event)` on the worker pool and await its result.
+        """
+        with self._lock:
+            if self.admitted >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ServerBusyError(
+                    f"{self.admitted} requests in flight, try again shortly"
+                )
+            self.admitted += 1
+
+        loop = asyncio.get_running_loop()
+        enqueued_at = time.monotonic()
+        started = {}
+        cancel_event = threading.Event()
+
+        semaphore = None
+        if user_id is not None:
+            semaphore = self._acquire_user_slot(user_id)
+            try:
+                await semaphore.acquire()
+            except BaseException:
+                self._release_user_slot(user_id)
+                self._leave()
+                raise
+
+        def run() -> Any:
+            started["at"] = time.monotonic()
+            with self._lock:
+                self.running += 1
+            try:
+                return fn(*args, cancel_event)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        def finished(_: Any) -> None:
+            # Runs once the worker returned, or right away if a queued call was dropped
+            self._leave()
+            if semaphore is not None:
+                try:
+                    loop.call_soon_threadsafe(self._release_user, semaphore, user_id)
+                except RuntimeError:
+                    pass  # loop already closed
+
+        future = self._pool.submit(run)
+        future.add_done_callback(finished)
+        try:
+            result = await asyncio.wrap_future(future)
+            with self._lock:
+                self.completed += 1
+                self._latencies.append(
+                    (started["at"] - enqueued_at, time.monotonic() - started["at"])
+                )
+            return result
+        except asyncio.CancelledError:
+            # Queued calls never start; running ones stop at their next step
+            cancel_event.set()
+            future.cancel()
+            with self._lock:
+                self.cancelled += 1
+            logger.info(f"Analysis for user {user_id} cancelled by client")
+            raise
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = [w for w, _ in self._latencies]
+            runs = [r for _, r in self._latencies]
+            return {
+                "queue_depth": self.admitted - self.running,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+                "queue_wait_p50_s": round(_percentile(waits, 50), 3),
+                "queue_wait_p95_s": round(_percentile(waits, 95), 3),
+                "run_p50_s": round(_percentile(runs, 50), 3),
+                "run_p95_s": round(_percentile(runs, 95), 3),
+            }
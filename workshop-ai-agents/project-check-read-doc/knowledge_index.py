@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai.knowledge.source.base_knowledge_source import BaseKnowledgeSource
+from crewai.knowledge.source.crew_docling_source import CrewDoclingSource
+from crewai.knowledge.storage.knowledge_storage import KnowledgeStorage
+
+logger = logging.getLogger(__name__)
+
+# CrewAI resolves knowledge file names against ./knowledge
+KNOWLEDGE_DIR = Path("knowledge")
+MANIFEST_PATH = KNOWLEDGE_DIR / ".index_manifest.json"
+COLLECTION_PREFIX = "postgres_schema_"
+# KnowledgeStorage stores `collection_name` as the Chroma collection "knowledge_<name>"
+STORAGE_PREFIX = "knowledge_"
+
+
+class PrebuiltKnowledgeSource(BaseKnowledgeSource):
+    """
+    Knowledge source whose chunks already live in a persisted storage.
+    `add()` is a no-op, so agents can query it without re-parsing or re-embedding.
+    """
+
+    def validate_content(self) -> Any:
+        return None
+
+    def add(self) -> None:
+        return None
+
+
+class KnowledgeIndex:
+    """
+    Builds the schema knowledge base once and keeps it on disk.
+
+    The Chroma collection name is derived from a hash of the knowledge/*.md contents:
+    on restart the existing collection is reused as-is, and only a change to the
+    documentation triggers a new parse + embedding run. Reuse requires the
+    collection itself to hold chunks, so a wiped storage is rebuilt even if the
+    manifest survived; collections of older fingerprints are deleted.
+
+    Uses KnowledgeStorage's chromadb handles (`app`, `collection`,
+    `initialize_knowledge_storage`), which crewai removed in 0.193: see the pin in
+    requirements.txt.
+    """
+
+    def __init__(self, embedder: Dict[str, Any], knowledge_dir: Path = KNOWLEDGE_DIR):
+        self.embedder = embedder
+        self.knowledge_dir = knowledge_dir
+        self._lock = threading.Lock()
+        self._built: Optional[Tuple[str, List[BaseKnowledgeSource], KnowledgeStorage]] = None
+
+    def _files(self) -> List[Path]:
+        return sorted(self.knowledge_dir.glob("*.md"))
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for path in self._files():
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        if MANIFEST_PATH.exists():
+            return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+        return {}
+
+    def _write_manifest(self, fingerprint: str, files: List[Path]) -> None:
+        MANIFEST_PATH.write_text(
+            json.dumps(
+                {"fingerprint": fingerprint, "files": [p.name for p in files]}, indent=2
+            ),
+            encoding="utf-8",
+        )
+
+    @staticmethod
+    def _drop_stale_collections(storage: KnowledgeStorage) -> List[str]:
+        """Delete the Chroma collections of older fingerprints; returns their names."""
+        current = storage.collection.name
+        dropped = []
+        for collection in storage.app.list_collections():
+            name = getattr(collection, "name", collection)
+            if name.startswith(STORAGE_PREFIX + COLLECTION_PREFIX) and name != current:
+                logger.info(f"Deleting stale knowledge collection {name}")
+                storage.app.delete_collection(name)
+                dropped.append(name)
+        return dropped
+
+    def get(self) -> Tuple[List[BaseKnowledgeSource], KnowledgeStorage]:
+        """Return (sources, storage), building or rebuilding the index only if needed."""
+        fingerprint = self.fingerprint()
+        with self._lock:
+            if self._built and self._built[0] == fingerprint:
+                return self._built[1], self._built[2]
+
+            files = self._files()
+            collection_name = f"{COLLECTION_PREFIX}{fingerprint[:16]}"
+            storage = KnowledgeStorage(embedder=self.embedder, collection_name=collection_name)
+            storage.initialize_knowledge_storage()
+            self._drop_stale_collections(storage)
+
+            chunks = storage.collection.count()
+            if chunks and self._read_manifest().get("fingerprint") == fingerprint:
+                logger.info(f"Reusing persisted knowledge index ({chunks} chunks)")
+            else:
+                if chunks:
+                    # Left over from an interrupted build: start from an empty collection
+                    storage.app.delete_collection(storage.collection.name)
+                    storage.initialize_knowledge_storage()
+                logger.info(f"Embedding {len(files)} knowledge file(s)...")
+                CrewDoclingSource(
+                    file_paths=[p.name for p in files], storage=storage
+                ).add()
+                self._write_manifest(fingerprint, files)
+
+            sources: List[BaseKnowledgeSource] = [PrebuiltKnowledgeSource(storage=storage)]
+            self._built = (fingerprint, sources, storage)
+            return sources, storage
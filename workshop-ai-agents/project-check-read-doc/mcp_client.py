@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from fastmcp import Client
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str], None]
+
+
+def _result_text(result: Any) -> str:
+    # Newer fastmcp returns a CallToolResult, older versions a list of content blocks
+    content = getattr(result, "content", result)
+    if content and hasattr(content[0], "text"):
+        return content[0].text
+    return str(result)
+
+
+class PersistentMCPClient:
+    """
+    One long-lived MCP client connection, driven by its own event loop thread.
+
+    Streamlit reruns the script on every message, so app.py shares one client per
+    process (st.cache_resource) across reruns and sessions: the SSE connection is
+    opened once, pinged every `keepalive_interval` seconds, reopened with
+    exponential backoff when it drops, and closed after `idle_timeout` seconds
+    without calls (reopened lazily).
+
+    A tool call is sent at most once. A connection not confirmed alive within the
+    last `keepalive_interval` seconds is pinged first, and reopened if the ping
+    fails, because nothing has been sent yet. A failure after the call went out is
+    raised to the caller instead of repeating a possibly long-running tool.
+
+    Each connection is held open by one task (`async with client`), so the client
+    is entered and exited in the same task, as anyio's cancel scopes require.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        keepalive_interval: float = 30.0,
+        idle_timeout: float = 600.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        self.url = url
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="mcp-client-loop", daemon=True
+        )
+        self._thread.start()
+        self._client: Optional[Client] = None
+        self._connection_task: Optional[asyncio.Task] = None
+        self._stop_connection: Optional[asyncio.Event] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._last_used = time.monotonic()
+        self._last_alive = 0.0
+        self.connects = 0
+        self.reconnects = 0
+        asyncio.run_coroutine_threadsafe(self._keepalive_loop(), self._loop)
+
+    # -----------------------------
+    # Connection management (event loop thread)
+    # -----------------------------
+    async def _hold_connection(
+        self, client: Client, ready: "asyncio.Future[None]", stop: asyncio.Event
+    ) -> None:
+        try:
+            async with client:
+                ready.set_result(None)
+                await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.debug(f"MCP connection closed with an error: {e}")
+
+    async def _connect(self) -> Client:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._client is not None and self._client.is_connected():
+                return self._client
+            # The previous connection dropped: let its task leave the client context
+            await self._disconnect()
+
+            delay = self.backoff_base
+            for attempt in range(self.max_retries + 1):
+                client = Client(self.url)
+                ready = self._loop.create_future()
+                stop = asyncio.Event()
+                task = self._loop.create_task(self._hold_connection(client, ready, stop))
+                try:
+                    await ready
+                    self._client = client
+                    self._connection_task = task
+                    self._stop_connection = stop
+                    self._last_alive = time.monotonic()
+                    self.connects += 1
+                    logger.info(f"Connected to MCP server at {self.url}")
+                    return client
+                except asyncio.CancelledError:
+                    stop.set()
+                    raise
+                except Exception as e:
+                    await task
+                    if attempt == self.max_retries:
+                        raise ConnectionError(f"Could not connect to {self.url}: {e}") from e
+                    logger.warning(f"MCP connect failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.backoff_max)
+
+    async def _disconnect(self) -> None:
+        task, stop = self._connection_task, self._stop_connection
+        self._client = self._connection_task = self._stop_connection = None
+        if task is not None:
+            stop.set()
+            await task
+
+    async def _keepalive_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            if self._client is None:
+                continue
+            if time.monotonic() - self._last_used > self.idle_timeout:
+                logger.info("Closing idle MCP connection")
+                await self._disconnect()
+                continue
+            try:
+                await self._client.ping()
+                self._last_alive = time.monotonic()
+            except Exception as e:
+                logger.warning(f"MCP keep-alive failed ({e}), reconnecting")
+                await self._disconnect()
+                self.reconnects += 1
+                try:
+                    await self._connect()
+                except ConnectionError as ce:
+                    logger.warning(str(ce))
+
+    async def _call_tool(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        on_progress: Optional[ProgressCallback],
+    ) -> str:
+        async def progress_handler(progress: float, total: Optional[float], message: Optional[str]):
+            if on_progress is not None and message:
+                on_progress(message)
+
+        self._last_used = time.monotonic()
+        client = await self._ensure_alive()
+        try:
+            result = await client.call_tool(name, arguments, progress_handler=progress_handler)
+            self._last_alive = time.monotonic()
+            return _result_text(result)
+        except (ConnectionError, OSError):
+            # The request may already be running on the server: do not resend it,
+            # just make the next call start from a fresh connection
+            await self._disconnect()
+            self.reconnects += 1
+            raise
+        finally:
+            self._last_used = time.monotonic()
+
+    async def _ensure_alive(self) -> Client:
+        """Connected client, checked with a ping if not recently confirmed alive."""
+        client = await self._connect()
+        if time.monotonic() - self._last_alive < self.keepalive_interval:
+            return client
+        try:
+            await client.ping()
+            self._last_alive = time.monotonic()
+            return client
+        except Exception as e:
+            logger.warning(f"MCP connection is stale ({e}), reconnecting before the call")
+            await self._disconnect()
+            self.reconnects += 1
+            return await self._connect()
+
+    # -----------------------------
+    # Public API (any thread)
+    # -----------------------------
+    def call_tool(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> "Future[str]":
+        """
+        Schedule a tool call on the background loop and return its Future.
+        `on_progress` is called from the loop thread with each progress message.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._call_tool(name, arguments, on_progress), self._loop
+        )
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._disconnect(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,231 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from crewai_tools import MCPServerAdapter
+from mcp import StdioServerParameters
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledSession:
+    """An MCPServerAdapter plus the bookkeeping the pool needs."""
+
+    def __init__(self, adapter: MCPServerAdapter):
+        self.adapter = adapter
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+
+    @property
+    def tools(self):
+        return self.adapter.tools
+
+    def stop(self) -> None:
+        try:
+            self.adapter.stop()
+        except Exception as e:
+            logger.warning(f"Error stopping MCP session: {e}")
+
+
+class MCPAdapterPool:
+    """
+    Long-lived pool of MCP stdio sessions.
+
+    Sessions are spawned once and checked out per request, so requests no longer pay
+    the subprocess startup, package resolution and database connection on every call.
+    Idle sessions above `min_size` are reaped, and a session that fails its health
+    check on checkout is restarted.
+    """
+
+    def __init__(
+        self,
+        server_params: StdioServerParameters,
+        min_size: int = 1,
+        max_size: int = 4,
+        idle_timeout: float = 300.0,
+        health_check: Optional[Callable[[MCPServerAdapter], bool]] = None,
+        health_check_interval: float = 30.0,
+    ):
+        self.server_params = server_params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledSession] = []
+        self._in_use = 0
+        self._closed = False
+        self._reaper: Optional[threading.Thread] = None
+
+        self.created = 0
+        self.restarted = 0
+        self.reaped = 0
+        self.checkouts = 0
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self) -> None:
+        """Pre-spawn `min_size` sessions and start the idle reaper."""
+        with self._cond:
+            missing = self.min_size - len(self._idle) - self._in_use
+        for _ in range(max(missing, 0)):
+            session = self._spawn()
+            with self._cond:
+                self._idle.append(session)
+                self._cond.notify()
+        self._ensure_reaper()
+        logger.info(f"MCP pool started with {len(self._idle)} warm session(s)")
+
+    def _ensure_reaper(self) -> None:
+        with self._cond:
+            if self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._reap_loop, name="mcp-pool-reaper", daemon=True
+                )
+                self._reaper.start()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            sessions, self._idle = self._idle, []
+            self._cond.notify_all()
+        for session in sessions:
+            session.stop()
+
+    def _spawn(self) -> _PooledSession:
+        logger.info("Starting MCP server session...")
+        session = _PooledSession(MCPServerAdapter(self.server_params))
+        if not session.tools:
+            session.stop()
+            raise RuntimeError("MCP server exposed no tools")
+        with self._cond:
+            self.created += 1
+        return session
+
+    def _is_healthy(self, session: _PooledSession, force: bool = False) -> bool:
+        if not force and time.monotonic() - session.last_checked < self.health_check_interval:
+            return True
+        try:
+            healthy = bool(session.tools) and (
+                self.health_check is None or self.health_check(session.adapter)
+            )
+        except Exception as e:
+            logger.warning(f"MCP session health check failed: {e}")
+            healthy = False
+        session.last_checked = time.monotonic()
+        return healthy
+
+    # -----------------------------
+    # Checkout / release
+    # -----------------------------
+    @contextmanager
+    def session(self, timeout: float = 60.0) -> Iterator[MCPServerAdapter]:
+        """Check out a session for the duration of one request."""
+        self._ensure_reaper()
+        session = self._acquire(timeout)
+        try:
+            yield session.adapter
+        except BaseException:
+            # The error may have come from a dead server: check before reusing it
+            self._release(session, failed=True)
+            raise
+        self._release(session)
+
+    def _acquire(self, timeout: float) -> _PooledSession:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("MCP pool is closed")
+                if self._idle:
+                    session = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    # Reserve the slot, spawn outside the lock
+                    self._in_use += 1
+                    session = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise TimeoutError("Timed out waiting for an MCP session")
+
+        try:
+            if session is None:
+                session = self._spawn()
+            elif not self._is_healthy(session):
+                logger.warning("Restarting unhealthy MCP session")
+                session.stop()
+                session = self._spawn()
+                with self._cond:
+                    self.restarted += 1
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self.checkouts += 1
+        return session
+
+    def _release(self, session: _PooledSession, failed: bool = False) -> None:
+        session.last_used = time.monotonic()
+        healthy = not failed or self._is_healthy(session, force=True)
+        if not healthy:
+            logger.warning("Discarding MCP session that failed mid-request")
+        with self._cond:
+            self._in_use -= 1
+            if self._closed or not healthy:
+                stop = True
+                if not healthy:
+                    self.restarted += 1
+            else:
+                stop = False
+                self._idle.append(session)
+            self._cond.notify()
+        if stop:
+            session.stop()
+
+    # -----------------------------
+    # Idle reaping
+    # -----------------------------
+    def _reap_loop(self) -> None:
+        interval = max(self.idle_timeout / 2, 1.0)
+        while True:
+            time.sleep(interval)
+            with self._cond:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                # Keep at least min_size sessions alive (idle + in use)
+                spare = len(self._idle) + self._in_use - self.min_size
+                expired = []
+                for session in sorted(self._idle, key=lambda s: s.last_used):
+                    if spare <= 0:
+                        break
+                    if now - session.last_used > self.idle_timeout:
+                        expired.append(session)
+                        spare -= 1
+                for session in expired:
+                    self._idle.remove(session)
+                self.reaped += len(expired)
+            for session in expired:
+                session.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "created": self.created,
+                "restarted": self.restarted,
+                "reaped": self.reaped,
+                "checkouts": self.checkouts,
+            }
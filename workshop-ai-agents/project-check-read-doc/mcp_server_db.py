@@ -1,13 +1,20 @@
 import os
+import asyncio
 import logging
+import threading
+from typing import Any, Callable, Optional
 from dotenv import load_dotenv
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from langchain_openai import ChatOpenAI
 from crewai import Agent, Task, Crew, Process
 from crewai_tools import MCPServerAdapter
 from mcp import StdioServerParameters
-from crewai.knowledge.source.crew_docling_source import CrewDoclingSource
-from crewai.knowledge.storage.knowledge_storage import KnowledgeStorage
+from mcp_pool import MCPAdapterPool
+from knowledge_index import KnowledgeIndex
+from analyst_cache import CachedQueryTool, QueryResultCache, SchemaSnapshotCache
+from execution import AnalysisCancelled, AnalystExecutor, ServerBusyError
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
 # -----------------------------
 # Setup logging & environment
@@ -35,141 +42,240 @@ llm = ChatOpenAI(
 )
 
 
+# -----------------------------
+# MCP Session Pool
+# -----------------------------
+def _query_tool(adapter: MCPServerAdapter):
+    return next((t for t in adapter.tools if t.name == "query"), None)
+
+
+def _postgres_health_check(adapter: MCPServerAdapter) -> bool:
+    """
+    Run a trivial query through the MCP server to confirm it is still alive.
+    MCP tools usually report failures as text instead of raising, so the result
+    must contain the probe column.
+    """
+    query_tool = _query_tool(adapter)
+    if query_tool is None:
+        logger.warning("MCP session has no 'query' tool")
+        return False
+    result = query_tool.run(sql="SELECT 1 AS mcp_health_probe")
+    return "mcp_health_probe" in str(result)
+
+
+postgres_pool = MCPAdapterPool(
+    StdioServerParameters(
+        command="npx",
+        args=[
+            "-y",
+            "@modelcontextprotocol/server-postgres",
+            DATABASE_URL,
+        ],
+    ),
+    min_size=int(os.getenv("MCP_POOL_MIN_SIZE", "1")),
+    max_size=int(os.getenv("MCP_POOL_MAX_SIZE", "4")),
+    idle_timeout=float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "300")),
+    health_check=_postgres_health_check,
+)
+
+
+# -----------------------------
+# Schema & Result Caches
+# -----------------------------
+schema_cache = SchemaSnapshotCache(
+    schemas=os.getenv("SCHEMA_SNAPSHOT_SCHEMAS", "public_marts,public_staging").split(","),
+    ttl=float(os.getenv("SCHEMA_SNAPSHOT_TTL", "3600")),
+    check_interval=float(os.getenv("SCHEMA_CHECK_INTERVAL", "60")),
+)
+# Set SQL_RESULT_CACHE_TTL=0 to disable result caching
+result_cache = QueryResultCache(ttl=float(os.getenv("SQL_RESULT_CACHE_TTL", "300")))
+
+
+def prepare_tools(adapter: MCPServerAdapter):
+    """
+    Return (tools, schema_snapshot) for one request: the cached schema snapshot
+    and the MCP tools, with `query` answered from the result cache when enabled.
+    """
+    tools = adapter.tools
+    query_tool = _query_tool(adapter)
+    if query_tool is None:
+        return tools, ""
+
+    try:
+        snapshot, fingerprint = schema_cache.get(query_tool)
+    except Exception as e:
+        logger.warning(f"Failed to load schema snapshot: {e}")
+        return tools, ""
+
+    if result_cache.enabled:
+        result_cache.invalidate_on_schema_change(fingerprint)
+        tools = [
+            CachedQueryTool.wrap(t, result_cache) if t is query_tool else t
+            for t in tools
+        ]
+    return tools, snapshot
+
+
 # -----------------------------
 # Knowledge Management
 # -----------------------------
+knowledge_index = KnowledgeIndex(
+    embedder={
+        "provider": "ollama",
+        "model": "mxbai-embed-large",
+        "base_url": "http://localhost:11434",
+    }
+)
+
+
 def load_knowledge_sources():
-    """Load documentation files into a Docling knowledge source."""
+    """
+    Return the (sources, storage) of the schema knowledge base.
+    Built once and persisted; only re-embedded when knowledge/*.md changes.
+    """
     try:
-        return CrewDoclingSource(
-            file_paths=[
-                "01_schema_overview.md",
-                "02_table_definitions.md",
-                "03_kpi_definitions.md",
-            ],
-            storage=KnowledgeStorage(
-                embedder={
-                    "provider": "ollama",
-                    "model": "mxbai-embed-large",
-                    "base_url": "http://localhost:11434",
-                }
-            ),
-        )
+        return knowledge_index.get()
     except Exception as e:
-        logger.warning(f"Failed to load knowledge sources: {e}")
-        return None
+        logger.exception(f"Failed to load knowledge sources, running without them: {e}")
+        return [], None
+
+
+# -----------------------------
+# Request Execution
+# -----------------------------
+analyst_executor = AnalystExecutor(
+    max_workers=int(os.getenv("ANALYST_WORKERS", "4")),
+    max_queue=int(os.getenv("ANALYST_MAX_QUEUE", "16")),
+    per_user_limit=int(os.getenv("ANALYST_PER_USER_LIMIT", "1")),
+)
+
+
+def _raise_if_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise AnalysisCancelled("Client disconnected")
+
+
+def _describe_step(step: Any) -> str:
+    """Short, user-facing summary of one agent step (AgentAction or AgentFinish)."""
+    tool = getattr(step, "tool", None)
+    if tool:
+        return f"Running `{tool}`: {str(getattr(step, 'tool_input', ''))[:200]}"
+    thought = str(getattr(step, "thought", "") or "").strip()
+    return thought[:300] or "Preparing the answer..."
 
 
 # -----------------------------
 # Core Agent Function
 # -----------------------------
-def run_postgres_analyst(question: str, user_id: str = "default") -> str:
+def run_postgres_analyst(
+    question: str,
+    user_id: str = "default",
+    on_step: Optional[Callable[[str], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> str:
     """
     Core function that creates and runs the Postgres analyst agent.
+    The MCP server session is checked out from the shared pool, not spawned per call.
+    Each agent step is reported through `on_step`; if `cancel_event` is set, the
+    crew stops at its next step.
     """
-    mcp_server_adapter = None
+
+    def step_callback(step: Any) -> None:
+        _raise_if_cancelled(cancel_event)
+        if on_step is not None:
+            on_step(_describe_step(step))
 
     try:
-        # Setup MCP Server connection
-        logger.info("Initializing MCP server connection...")
-        serverparams = StdioServerParameters(
-            command="npx",
-            args=[
-                "-y",
-                "@modelcontextprotocol/server-postgres",
-                DATABASE_URL,
-            ],
-        )
+        _raise_if_cancelled(cancel_event)
+        with postgres_pool.session() as mcp_server_adapter:
+            tools = mcp_server_adapter.tools
 
-        mcp_server_adapter = MCPServerAdapter(serverparams)
-        tools = mcp_server_adapter.tools
-
-        if not tools:
-            return "Error: No tools available from MCP server"
-
-        logger.info(f"Connected to MCP server with {len(tools)} tools")
-
-        # Load knowledge base
-        knowledge = load_knowledge_sources()
-        knowledge_sources = [knowledge] if knowledge else []
-
-        # Create Agent
-        agent = Agent(
-            role="PostgreSQL Database Analyst",
-            goal="Answer database questions using SQL queries with accurate, verified information",
-            backstory=(
-                "You are an expert SQL analyst with deep knowledge of PostgreSQL. "
-                "You write efficient queries, understand database schemas, and provide "
-                "precise answers based on actual data. You always verify schema before querying."
-            ),
-            tools=tools,
-            knowledge_sources=knowledge_sources,
-            llm=llm,
-            allow_delegation=False,
-            memory=False,
-            verbose=True,
-            max_iter=5,
-            max_execution_time=180,
-        )
+            if not tools:
+                return "Error: No tools available from MCP server"
 
-        # Create Task
-        task = Task(
-            description=(
-                f"Answer this database question: '{question}'\n\n"
-                "PROCESS:\n"
-                "1. First, check knowledge base for schema information\n"
-                "2. If schema unclear, query information_schema tables\n"
-                "3. Write and execute ONE precise SQL query\n"
-                "4. Return the direct answer with key insights\n"
-                "5. If no data found, state that clearly\n\n"
-                "REQUIREMENTS:\n"
-                "- Use only verified schema information\n"
-                "- Write efficient, readable SQL\n"
-                "- Provide concise, accurate answers\n"
-                "- Include relevant numbers/metrics when applicable"
-            ),
-            expected_output="SQL query results with clear, direct answer to the question",
-            tools=tools,
-            agent=agent,
-        )
+            logger.info(f"Using pooled MCP session with {len(tools)} tools")
+            tools, schema_snapshot = prepare_tools(mcp_server_adapter)
 
-        # Execute with Crew
-        crew = Crew(
-            agents=[agent],
-            tasks=[task],
-            process=Process.sequential,
-            knowledge_sources=knowledge_sources,
-            verbose=True,
-            llm=llm,
-        )
+            # Load knowledge base
+            knowledge_sources, knowledge_storage = load_knowledge_sources()
+
+            # Create Agent
+            agent = Agent(
+                role="PostgreSQL Database Analyst",
+                goal="Answer database questions using SQL queries with accurate, verified information",
+                backstory=(
+                    "You are an expert SQL analyst with deep knowledge of PostgreSQL. "
+                    "You write efficient queries, understand database schemas, and provide "
+                    "precise answers based on actual data. You always verify schema before querying."
+                ),
+                tools=tools,
+                knowledge_sources=knowledge_sources,
+                knowledge_storage=knowledge_storage,
+                llm=llm,
+                allow_delegation=False,
+                memory=False,
+                verbose=True,
+                max_iter=5,
+                max_execution_time=180,
+            )
+
+            # Create Task
+            task = Task(
+                description=(
+                    f"Answer this database question: '{question}'\n\n"
+                    f"DATABASE SCHEMA (cached snapshot, table(column type, ...)):\n{schema_snapshot}\n\n"
+                    "PROCESS:\n"
+                    "1. First, use the schema snapshot above and the knowledge base\n"
+                    "2. Only query information_schema if a table or column is missing from the snapshot\n"
+                    "3. Write and execute ONE precise SQL query\n"
+                    "4. Return the direct answer with key insights\n"
+                    "5. If no data found, state that clearly\n\n"
+                    "REQUIREMENTS:\n"
+                    "- Use only verified schema information\n"
+                    "- Write efficient, readable SQL\n"
+                    "- Provide concise, accurate answers\n"
+                    "- Include relevant numbers/metrics when applicable"
+                ),
+                expected_output="SQL query results with clear, direct answer to the question",
+                tools=tools,
+                agent=agent,
+            )
 
-        logger.info("Executing database analysis...")
-        result = crew.kickoff()
+            # Execute with Crew
+            crew = Crew(
+                agents=[agent],
+                tasks=[task],
+                process=Process.sequential,
+                verbose=True,
+                llm=llm,
+                step_callback=step_callback,
+            )
 
-        # Extract the actual result content
-        if hasattr(result, "raw"):
-            return str(result.raw)
-        else:
-            return str(result)
+            _raise_if_cancelled(cancel_event)
+            logger.info("Executing database analysis...")
+            result = crew.kickoff()
 
+            # Extract the actual result content
+            if hasattr(result, "raw"):
+                return str(result.raw)
+            else:
+                return str(result)
+
+    except AnalysisCancelled:
+        logger.info(f"Analysis for user {user_id} stopped: client disconnected")
+        return "Analysis cancelled"
     except Exception as e:
         logger.exception(f"Error in postgres analyst: {e}")
         return f"Analysis failed: {str(e)}"
 
-    finally:
-        if mcp_server_adapter:
-            try:
-                mcp_server_adapter.stop()
-                logger.info("MCP server connection closed")
-            except Exception as e:
-                logger.warning(f"Error closing MCP connection: {e}")
-
 
 # -----------------------------
 # FastMCP Tool Registration
 # -----------------------------
 @mcp.tool(name="postgres-analyst")
-def postgres_analyst_tool(question: str, user_id: str = "default") -> str:
+async def postgres_analyst_tool(
+    question: str, user_id: str = "default", ctx: Context = None
+) -> str:
     """
     Analyze PostgreSQL database and answer questions using SQL queries.
 
@@ -180,7 +286,43 @@ def postgres_analyst_tool(question: str, user_id: str = "default") -> str:
     Returns:
         SQL query results with analysis and insights
     """
-    return run_postgres_analyst(question, user_id)
+    loop = asyncio.get_running_loop()
+    steps = 0
+
+    def on_step(message: str) -> None:
+        # Called from the worker thread; progress goes back to the client over SSE
+        nonlocal steps
+        steps += 1
+        if ctx is not None:
+            asyncio.run_coroutine_threadsafe(
+                ctx.report_progress(progress=steps, message=message), loop
+            )
+
+    # The crew blocks, so it runs on the worker pool instead of the event loop.
+    # Anonymous calls are not serialized behind a shared per-user slot
+    try:
+        return await analyst_executor.submit(
+            run_postgres_analyst,
+            question,
+            user_id,
+            on_step,
+            user_id=None if user_id == "default" else user_id,
+        )
+    except ServerBusyError as e:
+        logger.warning(f"Rejected request from user {user_id}: {e}")
+        return f"Server busy: {e}"
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> JSONResponse:
+    """Queue depth, latency percentiles and cache/pool counters."""
+    return JSONResponse(
+        {
+            "executor": analyst_executor.stats(),
+            "mcp_pool": postgres_pool.stats(),
+            "result_cache": result_cache.stats(),
+        }
+    )
 
 
 # -----------------------------
@@ -189,6 +331,11 @@ def postgres_analyst_tool(question: str, user_id: str = "default") -> str:
 if __name__ == "__main__":
     logger.info("Starting Postgres Analyst MCP Tool...")
     logger.info("Tool available: postgres-analyst")
+    logger.info("Metrics available at: http://127.0.0.1:8004/metrics")
+
+    # Warm the MCP session pool and the knowledge index before accepting requests
+    postgres_pool.start()
+    load_knowledge_sources()
 
     # Run the FastMCP server
     mcp.run(transport="sse", host="127.0.0.1", port=8004)
\ No newline at end of file
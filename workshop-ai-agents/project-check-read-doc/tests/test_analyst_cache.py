@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("crewai")
+
+from analyst_cache import CachedQueryTool, QueryResultCache
+
+
+class FlakyQueryTool:
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    def run(self, sql, **kwargs):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def test_error_results_are_not_cached():
+    inner = FlakyQueryTool(["Error executing tool query: connection closed", '[{"n": 1}]'])
+    tool = CachedQueryTool(
+        name="query", description="run sql", inner_tool=inner, cache=QueryResultCache()
+    )
+
+    assert tool._run("SELECT 1").startswith("Error")
+    assert tool._run("SELECT 1") == '[{"n": 1}]'
+    assert tool._run("SELECT 1;") == '[{"n": 1}]'
+    assert inner.calls == 2
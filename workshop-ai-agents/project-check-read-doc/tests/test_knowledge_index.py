@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from knowledge_index import COLLECTION_PREFIX, STORAGE_PREFIX, KnowledgeIndex
+
+
+class FakeChromaClient:
+    def __init__(self, names):
+        self.names = list(names)
+
+    def list_collections(self):
+        return [SimpleNamespace(name=name) for name in self.names]
+
+    def delete_collection(self, name):
+        self.names.remove(name)
+
+
+def test_drop_stale_collections_keeps_current_and_unrelated():
+    current = f"{STORAGE_PREFIX}{COLLECTION_PREFIX}new"
+    stale = f"{STORAGE_PREFIX}{COLLECTION_PREFIX}old"
+    other = f"{STORAGE_PREFIX}crew_notes"
+    client = FakeChromaClient([stale, current, other])
+    storage = SimpleNamespace(app=client, collection=SimpleNamespace(name=current))
+
+    assert KnowledgeIndex._drop_stale_collections(storage) == [stale]
+    assert client.names == [current, other]
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Literal
+from pydantic import BaseModel, Field
 from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
@@ -5,6 +8,91 @@ from langgraph.prebuilt import create_react_agent
 from utils.state import StateSuporteSimples
 from memory.workflow_memory import checkpointer as default_checkpointer, in_memory_store
 
+# --- Cliente LLM compartilhado ---
+# Criado uma única vez, no primeiro uso, e reutilizado por todas as chamadas (pool de
+# conexões HTTP mantido entre consultas). Não é criado no import: main.py só carrega
+# o .env com a OPENAI_API_KEY depois de importar o grafo.
+@lru_cache(maxsize=1)
+def obter_llm_classificacao() -> ChatOpenAI:
+    return ChatOpenAI(model="gpt-4o-mini", temperature=0)
+
+# --- Prompts de Classificação ---
+
+prompt_categoria = ChatPromptTemplate.from_template(
+    """
+        Analise a seguinte consulta de cliente e categorize em uma dessas opções:
+        - Technical: Problemas técnicos, bugs, funcionalidades.
+        - Billing: Questões financeiras, cobranças, pagamentos.
+        - General: Informações gerais, horários, políticas.
+        
+        Consulta: {query}
+        
+        Responda apenas com uma palavra: Technical, Billing ou General
+        """
+)
+
+prompt_sentimento = ChatPromptTemplate.from_template(
+    """
+        Analise o sentimento da seguinte consulta de cliente:
+        
+        Consulta: {query}
+        
+        Classifique como:
+        - Positive: Cliente satisfeito, elogiando.
+        - Neutral: Consulta neutra, apenas pergunta.
+        - Negative: Cliente insatisfeito, reclamando, frustrado.
+        
+        Responda apenas: Positive, Neutral ou Negative
+        """
+)
+
+prompt_classificacao = ChatPromptTemplate.from_template(
+    """
+        Analise a seguinte consulta de cliente e classifique:
+
+        Categoria:
+        - Technical: Problemas técnicos, bugs, funcionalidades.
+        - Billing: Questões financeiras, cobranças, pagamentos.
+        - General: Informações gerais, horários, políticas.
+
+        Sentimento:
+        - Positive: Cliente satisfeito, elogiando.
+        - Neutral: Consulta neutra, apenas pergunta.
+        - Negative: Cliente insatisfeito, reclamando, frustrado.
+
+        Consulta: {query}
+        """
+)
+
+
+class ClassificacaoConsulta(BaseModel):
+    """Categoria e sentimento de uma consulta, obtidos em uma única chamada"""
+
+    category: Literal["Technical", "Billing", "General"] = Field(
+        description="Categoria da consulta"
+    )
+    sentiment: Literal["Positive", "Neutral", "Negative"] = Field(
+        description="Sentimento do cliente"
+    )
+
+
+# --- Chains reutilizáveis (montadas no primeiro uso) ---
+@lru_cache(maxsize=1)
+def chain_categoria():
+    return prompt_categoria | obter_llm_classificacao()
+
+
+@lru_cache(maxsize=1)
+def chain_sentimento():
+    return prompt_sentimento | obter_llm_classificacao()
+
+
+@lru_cache(maxsize=1)
+def chain_classificacao():
+    return prompt_classificacao | obter_llm_classificacao().with_structured_output(
+        ClassificacaoConsulta
+    )
+
 # --- Definição das Ferramentas (Tools) ---
 
 
@@ -19,21 +107,7 @@ def categorizar_consulta(query: str) -> str:
     Returns:
         str: Uma das categorias: Technical, Billing ou General.
     """
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Analise a seguinte consulta de cliente e categorize em uma dessas opções:
-        - Technical: Problemas técnicos, bugs, funcionalidades.
-        - Billing: Questões financeiras, cobranças, pagamentos.
-        - General: Informações gerais, horários, políticas.
-        
-        Consulta: {query}
-        
-        Responda apenas com uma palavra: Technical, Billing ou General
-        """
-    )
-    chain = prompt | llm
-    return chain.invoke({"query": query}).content.strip()
+    return chain_categoria().invoke({"query": query}).content.strip()
 
 
 @tool
@@ -47,23 +121,20 @@ def analisar_sentimento(query: str) -> str:
     Returns:
         str: Positive, Neutral ou Negative.
     """
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Analise o sentimento da seguinte consulta de cliente:
-        
-        Consulta: {query}
-        
-        Classifique como:
-        - Positive: Cliente satisfeito, elogiando.
-        - Neutral: Consulta neutra, apenas pergunta.
-        - Negative: Cliente insatisfeito, reclamando, frustrado.
-        
-        Responda apenas: Positive, Neutral ou Negative
-        """
-    )
-    chain = prompt | llm
-    return chain.invoke({"query": query}).content.strip()
+    return chain_sentimento().invoke({"query": query}).content.strip()
+
+
+def classificar_consulta(query: str) -> ClassificacaoConsulta:
+    """
+    Categoria e sentimento em uma única chamada com saída estruturada.
+
+    Args:
+        query: A consulta do cliente.
+
+    Returns:
+        ClassificacaoConsulta: category e sentiment da consulta.
+    """
+    return chain_classificacao().invoke({"query": query})
 
 
 @tool
@@ -1,7 +1,15 @@
 # agente_rag.py
 
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Optional
+
 from langchain_core.documents import Document
 from langchain.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain.chains import RetrievalQA
 from langchain_core.tools import tool
@@ -17,23 +25,167 @@ INFO_EMPRESA = {
     "entrega": "O prazo de entrega padrão para todo o Brasil é de 5 a 10 dias úteis.",
 }
 
+EMBEDDING_MODEL = "text-embedding-3-large"
+# Índice gerado offline com: PYTHONPATH=. python "agents/agente_rag.py.py" --build
+INDICE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "memory", "indice_info_empresa"
+)
+MANIFESTO_PATH = os.path.join(INDICE_DIR, "manifesto.json")
+# Vetores normalizados + produto interno: o score do FAISS é o cosseno
+PARAMS_INDICE = {"distance_strategy": DistanceStrategy.MAX_INNER_PRODUCT, "normalize_L2": True}
+# Acima deste cosseno o documento mais próximo é a resposta (sem chamada ao LLM).
+# Sem a variável, usa o limiar calibrado em construir_indice e salvo no manifesto
+LIMIAR_RESPOSTA_DIRETA = os.getenv("LIMIAR_RESPOSTA_DIRETA")
+MARGEM_CALIBRACAO = 0.02
+
+# Perguntas rotuladas para calibrar o limiar: (pergunta, chave esperada ou None
+# quando a pergunta não deve ser respondida direto por nenhum documento)
+PERGUNTAS_CALIBRACAO = [
+    ("Qual é o horário de funcionamento aos sábados?", "horario_funcionamento"),
+    ("Vocês abrem que horas?", "horario_funcionamento"),
+    ("Qual o telefone de vocês?", "contato"),
+    ("Qual o e-mail do suporte?", "contato"),
+    ("Onde fica o escritório?", "endereco"),
+    ("Qual o endereço da empresa?", "endereco"),
+    ("Quanto tempo de garantia tem um produto físico?", "garantia"),
+    ("Serviços digitais têm garantia?", "garantia"),
+    ("Qual o prazo de entrega?", "entrega"),
+    ("Em quantos dias meu pedido chega?", "entrega"),
+    ("Vocês vendem notebooks?", None),
+    ("Como cancelo minha assinatura?", None),
+    ("Vocês têm loja física no Rio de Janeiro?", None),
+    ("Quem é o CEO da empresa?", None),
+]
+
 # --- 1. Transformar INFO_EMPRESA em Documentos LangChain ---
 docs_info_empresa = [
-    Document(page_content=f"{chave.capitalize()}: {conteudo}")
+    Document(
+        page_content=f"{chave.capitalize()}: {conteudo}", metadata={"chave": chave}
+    )
     for chave, conteudo in INFO_EMPRESA.items()
 ]
 
-# --- 2. Gerar Embeddings e Indexar com FAISS ---
-embedding_model = OpenAIEmbeddings(model="text-embedding-3-large")
-vectorstore = FAISS.from_documents(docs_info_empresa, embedding_model)
-retriever = vectorstore.as_retriever()
 
-# --- 3. Criar o Pipeline de RAG com RetrievalQA ---
-rag_chain = RetrievalQA.from_chain_type(
-    llm=ChatOpenAI(model="gpt-4o-mini", temperature=0.4),
-    retriever=retriever,
-    return_source_documents=True,
-)
+def hash_conteudo() -> str:
+    """Hash dos documentos + modelo de embedding: muda quando o índice precisa ser refeito"""
+    dados = json.dumps(
+        {
+            "modelo": EMBEDDING_MODEL,
+            "distancia": "cosseno",
+            "calibracao": PERGUNTAS_CALIBRACAO,
+            "docs": [[d.page_content, d.metadata] for d in docs_info_empresa],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(dados.encode("utf-8")).hexdigest()
+
+
+def _ler_manifesto() -> dict:
+    if not os.path.exists(MANIFESTO_PATH):
+        return {}
+    with open(MANIFESTO_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _indice_atualizado() -> bool:
+    return _ler_manifesto().get("hash") == hash_conteudo()
+
+
+def calibrar_limiar(vectorstore: FAISS) -> Optional[float]:
+    """
+    Menor cosseno acima do qual o documento mais próximo respondeu certo todas as
+    PERGUNTAS_CALIBRACAO: fica acima do maior score de um acerto errado ou de uma
+    pergunta fora do escopo, mais MARGEM_CALIBRACAO.
+
+    Returns:
+        O limiar, ou None se nenhum acerto ficar acima dele (resposta direta desligada)
+    """
+    acertos, erros = [], []
+    for pergunta, chave in PERGUNTAS_CALIBRACAO:
+        doc, cosseno = vectorstore.similarity_search_with_score(pergunta, k=1)[0]
+        correto = chave is not None and doc.metadata["chave"] == chave
+        (acertos if correto else erros).append(float(cosseno))
+        print(f"   {cosseno:.3f} {'✅' if correto else '❌'} {pergunta}")
+
+    limiar = max(erros, default=0.0) + MARGEM_CALIBRACAO
+    if not any(c >= limiar for c in acertos):
+        return None
+    return round(limiar, 3)
+
+
+# --- 2. Gerar Embeddings e Indexar com FAISS (offline) ---
+def construir_indice(forcar: bool = False) -> bool:
+    """
+    Gera os embeddings e salva o índice FAISS em disco junto com o hash do conteúdo.
+
+    Returns:
+        bool: True se o índice foi (re)construído, False se já estava atualizado
+    """
+    if not forcar and _indice_atualizado():
+        print("✅ Índice FAISS já atualizado")
+        return False
+
+    print(f"📚 Indexando {len(docs_info_empresa)} documentos com {EMBEDDING_MODEL}...")
+    vectorstore = FAISS.from_documents(
+        docs_info_empresa, OpenAIEmbeddings(model=EMBEDDING_MODEL), **PARAMS_INDICE
+    )
+    vectorstore.save_local(INDICE_DIR)
+
+    print("🎯 Calibrando o limiar de resposta direta (cosseno):")
+    limiar = calibrar_limiar(vectorstore)
+    print(f"   limiar: {limiar if limiar is not None else 'nenhum (resposta direta desligada)'}")
+    with open(MANIFESTO_PATH, "w", encoding="utf-8") as f:
+        json.dump(
+            {"hash": hash_conteudo(), "modelo": EMBEDDING_MODEL, "limiar_cosseno": limiar},
+            f,
+            indent=2,
+        )
+    print(f"✅ Índice salvo em: {os.path.abspath(INDICE_DIR)}")
+    return True
+
+
+# --- 3. Carregamento sob demanda do índice e do pipeline RAG ---
+_lock = threading.Lock()
+_vectorstore = None
+_rag_chain = None
+_limiar_resposta_direta = None
+
+
+def carregar_vectorstore() -> FAISS:
+    """Carrega o índice na primeira consulta; constrói se faltar ou estiver desatualizado"""
+    global _vectorstore, _limiar_resposta_direta
+    with _lock:
+        if _vectorstore is None:
+            if not _indice_atualizado():
+                print("⚠️ Índice FAISS ausente ou desatualizado, construindo agora...")
+                construir_indice(forcar=True)
+            # Arquivo gerado localmente por construir_indice
+            _vectorstore = FAISS.load_local(
+                INDICE_DIR,
+                OpenAIEmbeddings(model=EMBEDDING_MODEL),
+                allow_dangerous_deserialization=True,
+                **PARAMS_INDICE,
+            )
+            if LIMIAR_RESPOSTA_DIRETA is not None:
+                _limiar_resposta_direta = float(LIMIAR_RESPOSTA_DIRETA)
+            else:
+                _limiar_resposta_direta = _ler_manifesto().get("limiar_cosseno")
+        return _vectorstore
+
+
+def carregar_rag_chain() -> RetrievalQA:
+    global _rag_chain
+    vectorstore = carregar_vectorstore()
+    with _lock:
+        if _rag_chain is None:
+            _rag_chain = RetrievalQA.from_chain_type(
+                llm=ChatOpenAI(model="gpt-4o-mini", temperature=0.4),
+                retriever=vectorstore.as_retriever(),
+                return_source_documents=True,
+            )
+        return _rag_chain
+
 
 # --- 4. Expor como Tool LangChain ---
 @tool
@@ -41,7 +193,14 @@ def buscar_info_empresa_semantico(pergunta: str) -> str:
     """
     Faz uma pergunta sobre a empresa e obtém resposta com base em RAG (semântica + geração).
     """
-    return rag_chain.run(pergunta)
+    # Resposta direta: o documento mais próximo já responde a pergunta
+    resultados = carregar_vectorstore().similarity_search_with_score(pergunta, k=1)
+    if resultados and _limiar_resposta_direta is not None:
+        doc, cosseno = resultados[0]
+        if cosseno >= _limiar_resposta_direta:
+            return INFO_EMPRESA[doc.metadata["chave"]]
+
+    return carregar_rag_chain().invoke({"query": pergunta})["result"]
 
 # --- 5. Prompt do Agente ---
 geral_prompt_rag = """
@@ -79,17 +238,16 @@ class AgenteGeralRAG:
     def get_agent(self):
         return self.agent
 
-# test_agente_rag.py
-
-from agente_rag import AgenteGeralRAG
-from utils.state import StateSuporteSimples
-
-agente = AgenteGeralRAG().get_agent()
 
-# Simulando uma pergunta de usuário
-entrada = {"input": "Qual é o horário de funcionamento aos sábados?"}
-estado_inicial = StateSuporteSimples(**entrada)
+if __name__ == "__main__":
+    # Passo offline: PYTHONPATH=. python "agents/agente_rag.py.py" --build [--force]
+    if "--build" in sys.argv:
+        construir_indice(forcar="--force" in sys.argv)
+    else:
+        agente = AgenteGeralRAG().get_agent()
 
-# Executar o agente
-resposta = agente.invoke(estado_inicial)
-print(resposta.output)
\ No newline at end of file
+        # Simulando uma pergunta de usuário
+        resposta = agente.invoke(
+            {"messages": [("user", "Qual é o horário de funcionamento aos sábados?")]}
+        )
+        print(resposta["messages"][-1].content)
@@ -0,0 +1,480 @@
+"""
+Classificador local (sem LLM) para categoria e sentimento das consultas.
+
+Duas camadas, ambas em processo:
+1. Regras de palavras-chave/regex: decidem sozinhas quando apenas um rótulo casa
+2. Modelo linear (regressão logística sobre TF-IDF) treinado com exemplos rotulados
+   e persistido em disco
+
+Cada previsão vem com uma confiança; abaixo do limiar o workflow recorre ao LLM.
+Quando as regras de categoria apontam rótulos diferentes, a decisão também fica com
+o LLM; no sentimento, pistas negativas prevalecem sobre positivas e uma consulta de
+categoria reconhecida sem nenhuma pista de sentimento é Neutral.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+MODELO_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "memory", "classificador_local.json"
+)
+
+# === REGRAS ===
+# Padrões aplicados ao texto em minúsculas e sem acentos
+
+REGRAS_CATEGORIA = {
+    "Technical": [
+        r"\blogin\b|\blogar\b",
+        r"\bsenha\b",
+        r"\berro\b",
+        r"\bbug\b",
+        r"\btrav(ou|a|ando)\b",
+        r"\bconexao\b|\bconectar\b",
+        r"\blent(o|a|idao)\b",
+        r"nao (abre|carrega|funciona)",
+        r"\baplicativo\b|\bapp\b",
+    ],
+    "Billing": [
+        r"\breembolso\b",
+        r"\bestorno\b",
+        r"\bcobra(do|da|nca|ram)\b",
+        r"\bpagamento\b|\bpagar\b",
+        r"\bfatura\b",
+        r"\bboleto\b",
+        r"\bpix\b",
+        r"\bduplicidade\b|\bduplicata\b",
+    ],
+    "General": [
+        r"\bhorario\b",
+        r"\bfuncionamento\b",
+        r"\bcontato\b|\btelefone\b|\be-?mail\b",
+        r"\bendereco\b",
+        r"\bgarantia\b",
+        r"\bentrega\b",
+    ],
+}
+
+REGRAS_SENTIMENTO = {
+    "Negative": [
+        r"\birritad[oa]\b",
+        r"\bfrustrad[oa]\b",
+        r"\babsurdo\b",
+        r"\bpessim[oa]\b",
+        r"\bhorrivel\b",
+        r"\bdecepcionad[oa]\b",
+        r"\binaceitavel\b",
+        r"\bperdi\b",
+        r"!{2,}",
+        r"\bcontinua\b",
+        r"\bainda nao\b",
+        r"\bde novo\b|\bnovamente\b|\bmais uma vez\b",
+        r"\bem (duplicidade|duplicata)\b|\bduas vezes\b",
+        # Agradecimento seguido de ressalva ("Obrigado, mas o login continua lento")
+        r"\b(obrigad[oa]|agradeco)\b.*\b(mas|porem|so que|entretanto)\b",
+    ],
+    "Positive": [
+        r"\bobrigad[oa]\b",
+        r"\bparabens\b",
+        r"\bexcelente\b",
+        r"\botim[oa]\b",
+        r"\badorei\b",
+        r"\bsatisfeit[oa]\b",
+    ],
+}
+
+# Pistas negativas prevalecem quando aparecem junto com positivas
+PRIORIDADE_SENTIMENTO = "Negative"
+# Sentimento de uma consulta com categoria reconhecida pelas regras e sem pistas
+SENTIMENTO_PADRAO = "Neutral"
+
+# === EXEMPLOS DE TREINO ===
+# (consulta, categoria, sentimento) - ponto de partida para o modelo linear
+
+EXEMPLOS_TREINO = [
+    ("Não consigo fazer login no sistema", "Technical", "Neutral"),
+    ("Esqueci minha senha, como redefinir?", "Technical", "Neutral"),
+    ("O aplicativo não abre no meu celular", "Technical", "Neutral"),
+    ("A página está dando erro 500", "Technical", "Neutral"),
+    ("O site está muito lento hoje", "Technical", "Neutral"),
+    ("Minha conexão cai toda hora ao usar a plataforma", "Technical", "Neutral"),
+    ("O sistema travou e perdi todos os meus dados! Estou muito irritado!", "Technical", "Negative"),
+    ("Já é a terceira vez que o app trava, isso é inaceitável", "Technical", "Negative"),
+    ("Que absurdo, o sistema não funciona desde ontem", "Technical", "Negative"),
+    ("Consegui acessar depois da atualização, obrigado pela ajuda", "Technical", "Positive"),
+    ("A nova versão do aplicativo ficou excelente", "Technical", "Positive"),
+    ("Como exportar meus relatórios da plataforma?", "Technical", "Neutral"),
+    ("Fui cobrado em duplicata no meu cartão", "Billing", "Negative"),
+    ("Quero pedir o reembolso da minha compra", "Billing", "Neutral"),
+    ("Quais são as formas de pagamento aceitas?", "Billing", "Neutral"),
+    ("Quando o estorno vai aparecer na fatura?", "Billing", "Neutral"),
+    ("Posso pagar com PIX ou boleto?", "Billing", "Neutral"),
+    ("Minha fatura veio com um valor errado", "Billing", "Neutral"),
+    ("Cobraram duas vezes a mesma assinatura, estou decepcionado", "Billing", "Negative"),
+    ("Péssimo atendimento, ainda não recebi meu reembolso", "Billing", "Negative"),
+    ("Recebi o estorno rapidinho, obrigada!", "Billing", "Positive"),
+    ("Ótimo, o pagamento foi confirmado na hora", "Billing", "Positive"),
+    ("Como cancelar a renovação automática da assinatura?", "Billing", "Neutral"),
+    ("Qual o valor do plano anual?", "Billing", "Neutral"),
+    ("Qual o horário de funcionamento da empresa?", "General", "Neutral"),
+    ("Qual o endereço do escritório?", "General", "Neutral"),
+    ("Como entro em contato por telefone?", "General", "Neutral"),
+    ("Qual o prazo de entrega para o Rio de Janeiro?", "General", "Neutral"),
+    ("Qual a garantia dos produtos físicos?", "General", "Neutral"),
+    ("Vocês abrem aos sábados?", "General", "Neutral"),
+    ("Qual o e-mail do suporte?", "General", "Neutral"),
+    ("A entrega atrasou de novo, que horrível", "General", "Negative"),
+    ("Ninguém atende o telefone, estou frustrado", "General", "Negative"),
+    ("Parabéns pelo atendimento, adorei a empresa", "General", "Positive"),
+    ("Estou muito satisfeito com o serviço de vocês", "General", "Positive"),
+    ("Vocês têm loja física em São Paulo?", "General", "Neutral"),
+]
+
+
+# Abaixo disso o modelo nem é treinado: a calibração não chega a 95% de precisão
+# fora da amostra (com os exemplos acima, nenhum limiar passa) e o LLM decidiria
+# de qualquer forma
+MINIMO_EXEMPLOS_MODELO = 150
+
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos"""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _tokens(texto: str) -> List[str]:
+    """Unigramas e bigramas do texto normalizado"""
+    palavras = re.findall(r"[a-z0-9]+", _normalizar(texto))
+    return palavras + [f"{a}_{b}" for a, b in zip(palavras, palavras[1:])]
+
+
+@dataclass
+class Previsao:
+    """Resultado de uma classificação local"""
+
+    rotulo: str
+    confianca: float
+    origem: str  # "regras", "modelo" ou "conflito" (regras discordam)
+    limiar: float = 1.0  # confiança mínima para dispensar o LLM
+
+
+# === MODELO LINEAR ===
+
+
+class ModeloLinear:
+    """Regressão logística multinomial sobre TF-IDF, treinada por SGD"""
+
+    def __init__(
+        self,
+        classes: Optional[List[str]] = None,
+        idf: Optional[Dict[str, float]] = None,
+        pesos: Optional[Dict[str, Dict[str, float]]] = None,
+        vies: Optional[Dict[str, float]] = None,
+    ):
+        self.classes = classes or []
+        self.idf = idf or {}
+        self.pesos = pesos or {c: {} for c in self.classes}
+        self.vies = vies or {c: 0.0 for c in self.classes}
+
+    def _vetor(self, texto: str) -> Dict[str, float]:
+        contagem = Counter(t for t in _tokens(texto) if t in self.idf)
+        vetor = {t: n * self.idf[t] for t, n in contagem.items()}
+        norma = math.sqrt(sum(v * v for v in vetor.values())) or 1.0
+        return {t: v / norma for t, v in vetor.items()}
+
+    def _probabilidades(self, vetor: Dict[str, float]) -> Dict[str, float]:
+        scores = {
+            c: self.vies[c] + sum(self.pesos[c].get(t, 0.0) * v for t, v in vetor.items())
+            for c in self.classes
+        }
+        maximo = max(scores.values())
+        exps = {c: math.exp(s - maximo) for c, s in scores.items()}
+        total = sum(exps.values())
+        return {c: e / total for c, e in exps.items()}
+
+    def treinar(
+        self,
+        textos: List[str],
+        rotulos: List[str],
+        epocas: int = 200,
+        taxa: float = 0.5,
+        l2: float = 1e-3,
+    ) -> None:
+        self.classes = sorted(set(rotulos))
+        df = Counter(t for texto in textos for t in set(_tokens(texto)))
+        n = len(textos)
+        self.idf = {t: math.log((1 + n) / (1 + d)) + 1 for t, d in df.items()}
+        self.pesos = {c: {} for c in self.classes}
+        self.vies = {c: 0.0 for c in self.classes}
+
+        vetores = [self._vetor(t) for t in textos]
+        for _ in range(epocas):
+            for vetor, rotulo in zip(vetores, rotulos):
+                probs = self._probabilidades(vetor)
+                for c in self.classes:
+                    gradiente = probs[c] - (1.0 if c == rotulo else 0.0)
+                    self.vies[c] -= taxa * gradiente
+                    pesos_c = self.pesos[c]
+                    for t, v in vetor.items():
+                        w = pesos_c.get(t, 0.0)
+                        pesos_c[t] = w - taxa * (gradiente * v + l2 * w)
+
+    def prever(self, texto: str) -> Tuple[str, float]:
+        probs = self._probabilidades(self._vetor(texto))
+        rotulo = max(probs, key=probs.get)
+        return rotulo, probs[rotulo]
+
+    def to_dict(self) -> Dict:
+        return {
+            "classes": self.classes,
+            "idf": self.idf,
+            "pesos": self.pesos,
+            "vies": self.vies,
+        }
+
+    @classmethod
+    def from_dict(cls, dados: Dict) -> "ModeloLinear":
+        return cls(dados["classes"], dados["idf"], dados["pesos"], dados["vies"])
+
+
+def versao_dados() -> str:
+    """Hash dos exemplos e regras embutidos; muda quando qualquer um é editado"""
+    conteudo = json.dumps(
+        [EXEMPLOS_TREINO, REGRAS_CATEGORIA, REGRAS_SENTIMENTO], ensure_ascii=False
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def calibrar_limiar(
+    textos: List[str],
+    rotulos: List[str],
+    precisao_alvo: float = 0.95,
+    dobras: int = 5,
+    minimo_acertos: int = 10,
+) -> Optional[float]:
+    """
+    Menor limiar de probabilidade em que o modelo acerta ao menos `precisao_alvo`
+    das previsões fora da amostra (validação cruzada em `dobras`).
+
+    Retorna None quando nenhum limiar atinge a precisão com pelo menos
+    `minimo_acertos` previsões: nesse caso o modelo não dispensa o LLM.
+    """
+    previsoes = []
+    for dobra in range(dobras):
+        treino = [i for i in range(len(textos)) if i % dobras != dobra]
+        teste = [i for i in range(len(textos)) if i % dobras == dobra]
+        if not teste or len({rotulos[i] for i in treino}) < 2:
+            continue
+        modelo = ModeloLinear()
+        modelo.treinar([textos[i] for i in treino], [rotulos[i] for i in treino])
+        for i in teste:
+            rotulo, prob = modelo.prever(textos[i])
+            previsoes.append((prob, rotulo == rotulos[i]))
+
+    previsoes.sort(key=lambda p: p[0], reverse=True)
+    limiar, acertos = None, 0
+    for n, (prob, acertou) in enumerate(previsoes, start=1):
+        acertos += acertou
+        if n >= minimo_acertos and acertos / n >= precisao_alvo:
+            limiar = prob
+    return limiar
+
+
+# === CLASSIFICADOR ===
+
+
+class ClassificadorLocal:
+    """
+    Regras + modelo linear para categoria e sentimento, com confiança.
+
+    O modelo é carregado de `caminho` no primeiro uso; se o arquivo não existir
+    ou tiver sido gerado com outros EXEMPLOS_TREINO/regras, é retreinado em uma
+    thread de fundo (enquanto isso, regras e LLM decidem) e salvo. Para treinar
+    fora do caminho das requisições: `python -m agents.classificador_local`.
+    `treinar()` aceita exemplos adicionais, por exemplo os rótulos do LLM obtidos
+    com `processar_lote`; eles ficam salvos e entram nos retreinos seguintes.
+
+    Regras decidem com confiança >= `limiar`. O modelo só decide acima do limiar
+    calibrado por validação cruzada no treino (`calibrar_limiar`); com menos de
+    MINIMO_EXEMPLOS_MODELO exemplos ele não é treinado e o LLM continua decidindo.
+    """
+
+    def __init__(self, caminho: str = MODELO_PATH, limiar: float = 0.8):
+        self.caminho = caminho
+        self.limiar = limiar
+        self._lock = threading.Lock()
+        self._lock_modelo = threading.Lock()
+        self.contagem: Counter = Counter()
+        self.modelo_categoria: Optional[ModeloLinear] = None
+        self.modelo_sentimento: Optional[ModeloLinear] = None
+        self.limiares_modelo: Dict[str, Optional[float]] = {}
+        self.exemplos_extras: List[Dict[str, str]] = []
+        self._carregado = False
+
+    def _garantir_modelos(self) -> None:
+        if self._carregado:
+            return
+        with self._lock_modelo:
+            if not self._carregado:
+                self._carregar()
+                self._carregado = True
+
+    def _carregar(self) -> None:
+        if os.path.exists(self.caminho):
+            with open(self.caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+            if dados.get("versao") == versao_dados():
+                self.limiares_modelo = dados["limiares_modelo"]
+                self.exemplos_extras = dados.get("exemplos_extras", [])
+                if dados.get("sentimento"):
+                    self.modelo_sentimento = ModeloLinear.from_dict(dados["sentimento"])
+                    self.modelo_categoria = ModeloLinear.from_dict(dados["categoria"])
+                return
+            # Exemplos ou regras mudaram: retreina mantendo os exemplos adicionais
+            self.exemplos_extras = dados.get("exemplos_extras", [])
+        # O treino (com validação cruzada) não roda dentro da requisição
+        threading.Thread(
+            target=self.treinar,
+            args=(self.exemplos_extras,),
+            name="classificador-local-treino",
+            daemon=True,
+        ).start()
+
+    def treinar(self, exemplos: List[Dict[str, str]]) -> None:
+        """
+        Treina os dois modelos com EXEMPLOS_TREINO + `exemplos` e persiste em disco.
+
+        Args:
+            exemplos: dicts com "query", "category" e "sentiment"; itens com
+                "erro" (consultas que falharam no lote) são ignorados
+        """
+        with self._lock_modelo:
+            self._treinar(exemplos)
+            self._carregado = True
+
+    def _treinar(self, exemplos: List[Dict[str, str]]) -> None:
+        extras = [
+            {
+                "query": e["query"],
+                "category": str(getattr(e["category"], "value", e["category"])),
+                "sentiment": str(getattr(e["sentiment"], "value", e["sentiment"])),
+            }
+            for e in exemplos
+            if "erro" not in e and e.get("category") and e.get("sentiment")
+        ]
+        dados = EXEMPLOS_TREINO + [(e["query"], e["category"], e["sentiment"]) for e in extras]
+        textos = [d[0] for d in dados]
+        categorias = [d[1] for d in dados]
+        sentimentos = [d[2] for d in dados]
+
+        modelo_categoria: Optional[ModeloLinear] = None
+        modelo_sentimento: Optional[ModeloLinear] = None
+        limiares: Dict[str, Optional[float]] = {"categoria": None, "sentimento": None}
+        if len(dados) >= MINIMO_EXEMPLOS_MODELO:
+            modelo_categoria = ModeloLinear()
+            modelo_categoria.treinar(textos, categorias)
+            modelo_sentimento = ModeloLinear()
+            modelo_sentimento.treinar(textos, sentimentos)
+            limiares = {
+                "categoria": calibrar_limiar(textos, categorias),
+                "sentimento": calibrar_limiar(textos, sentimentos),
+            }
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        tmp = f"{self.caminho}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "versao": versao_dados(),
+                    "limiares_modelo": limiares,
+                    "exemplos_extras": extras,
+                    "categoria": modelo_categoria and modelo_categoria.to_dict(),
+                    "sentimento": modelo_sentimento and modelo_sentimento.to_dict(),
+                },
+                f,
+            )
+        os.replace(tmp, self.caminho)
+
+        self.exemplos_extras = extras
+        self.limiares_modelo = limiares
+        self.modelo_sentimento = modelo_sentimento
+        self.modelo_categoria = modelo_categoria
+
+    def _aplicar_regras(
+        self, texto: str, regras: Dict[str, List[str]], prioritario: Optional[str] = None
+    ) -> Optional[Previsao]:
+        normalizado = _normalizar(texto)
+        acertos = {
+            rotulo: sum(1 for p in padroes if re.search(p, normalizado))
+            for rotulo, padroes in regras.items()
+        }
+        acertos = {r: n for r, n in acertos.items() if n}
+        if not acertos:
+            return None
+        rotulo = max(acertos, key=acertos.get)
+        if prioritario in acertos:
+            rotulo = prioritario
+        elif len(acertos) > 1:
+            # Regras discordam ("app não abre" + "cobrança"): o LLM decide
+            return Previsao(rotulo, 0.0, "conflito")
+        n = acertos[rotulo]
+        return Previsao(rotulo, min(0.99, 0.85 + 0.05 * (n - 1)), "regras", self.limiar)
+
+    def _previsao_modelo(self, texto: str, nome: str) -> Previsao:
+        self._garantir_modelos()
+        modelo = self.modelo_categoria if nome == "categoria" else self.modelo_sentimento
+        limiar_modelo = self.limiares_modelo.get(nome)
+        if modelo is None or limiar_modelo is None:
+            # Modelo ainda em treino ou sem limiar calibrado: o LLM decide
+            return Previsao("", 0.0, "modelo", math.inf)
+        rotulo, prob = modelo.prever(texto)
+        return Previsao(rotulo, prob, "modelo", max(self.limiar, limiar_modelo))
+
+    def _registrar(self, previsao: Previsao, nome: str) -> Previsao:
+        with self._lock:
+            origem = previsao.origem if self.confiavel(previsao) else "llm"
+            self.contagem[f"{nome}_{origem}"] += 1
+        return previsao
+
+    def categorizar(self, query: str) -> Previsao:
+        previsao = self._aplicar_regras(query, REGRAS_CATEGORIA)
+        if previsao is None:
+            previsao = self._previsao_modelo(query, "categoria")
+        return self._registrar(previsao, "categoria")
+
+    def analisar_sentimento(self, query: str) -> Previsao:
+        previsao = self._aplicar_regras(query, REGRAS_SENTIMENTO, PRIORIDADE_SENTIMENTO)
+        if previsao is None:
+            categoria = self._aplicar_regras(query, REGRAS_CATEGORIA)
+            if categoria is not None and categoria.origem == "regras":
+                # Assunto reconhecido e nenhuma pista de sentimento: pergunta neutra
+                previsao = Previsao(SENTIMENTO_PADRAO, categoria.confianca, "regras", self.limiar)
+            else:
+                previsao = self._previsao_modelo(query, "sentimento")
+        return self._registrar(previsao, "sentimento")
+
+    def confiavel(self, previsao: Previsao) -> bool:
+        return previsao.confianca >= previsao.limiar
+
+    def stats(self) -> Dict[str, int]:
+        """Quantas classificações foram resolvidas por regras, modelo ou LLM"""
+        with self._lock:
+            return dict(self.contagem)
+
+
+# Barato de criar: o modelo só é carregado/treinado na primeira classificação
+classificador_local = ClassificadorLocal()
+
+
+if __name__ == "__main__":
+    # Treino fora do caminho das requisições (por exemplo, no deploy)
+    classificador_local.treinar(classificador_local.exemplos_extras)
+    print(f"Limiares calibrados: {classificador_local.limiares_modelo}")
@@ -3,7 +3,9 @@ Workflow de Suporte Multi-Agente usando LangGraph
 Versão simplificada e estável para fins educacionais
 """
 
-from typing import Dict, Any
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional
 from langgraph.graph import StateGraph, END
 from datetime import datetime
 
@@ -14,39 +16,78 @@ from utils.state import (
     AgentType,
     criar_estado_inicial,
 )
-from agents.agente_coordenador import categorizar_consulta, analisar_sentimento
+from agents.agente_coordenador import (
+    categorizar_consulta,
+    analisar_sentimento,
+    classificar_consulta,
+)
+from agents.classificador_local import ClassificadorLocal, classificador_local
 from agents.agente_tecnico import buscar_solucao_tecnica, avaliar_complexidade_tecnica
 from agents.agente_financeiro import consultar_politica_financeira, calcular_reembolso
 from agents.agente_geral import buscar_informacao_empresa
-from memory.workflow_memory import checkpointer
+from memory.workflow_memory import checkpointer, criar_checkpointer_async
 
 
 class WorkflowSuporteMultiAgente:
     """Workflow principal usando tools diretamente - versão educacional simplificada"""
 
-    def __init__(self):
+    MODOS_CLASSIFICACAO = ("paralelo", "combinado")
+
+    def __init__(
+        self,
+        modo_classificacao: str = "paralelo",
+        classificador: Optional[ClassificadorLocal] = classificador_local,
+    ):
+        """
+        Args:
+            modo_classificacao: "paralelo" executa categorização e sentimento como
+                ramos simultâneos; "combinado" faz uma única chamada com saída estruturada.
+            classificador: classificador local consultado antes do LLM; o LLM só é
+                chamado quando a confiança fica abaixo do limiar. None desativa.
+        """
+        if modo_classificacao not in self.MODOS_CLASSIFICACAO:
+            raise ValueError(
+                f"modo_classificacao deve ser um de {self.MODOS_CLASSIFICACAO}"
+            )
+        self.modo_classificacao = modo_classificacao
+        self.classificador = classificador
+
         # Criar workflow
         self.app = self._criar_workflow()
+        # Mesmo grafo sem checkpointer, para lotes de avaliação que não precisam de memória
+        self.app_lote = self._criar_workflow(saver=None)
 
-    def _criar_workflow(self) -> StateGraph:
+    def _criar_workflow(self, saver: Any = checkpointer) -> StateGraph:
         """Cria workflow simplificado usando tools diretamente"""
         workflow = StateGraph(StateSuporteSimples)
 
         # === NÓSAÇÕES ===
         workflow.add_node("inicializar", self._inicializar)
-        workflow.add_node("categorizar", self._categorizar)
-        workflow.add_node("analisar_sentimento", self._analisar_sentimento)
         workflow.add_node("agent_tecnico", self._processar_tecnico)
         workflow.add_node("agent_financeiro", self._processar_financeiro)
         workflow.add_node("agent_geral", self._processar_geral)
 
         # === EDGES ===
-        workflow.add_edge("inicializar", "categorizar")
-        workflow.add_edge("categorizar", "analisar_sentimento")
+        if self.modo_classificacao == "paralelo":
+            # Os dois nós só leem state["query"]: rodam no mesmo passo (fan-out)
+            # e o roteamento espera os dois terminarem (fan-in)
+            workflow.add_node("categorizar", self._categorizar)
+            workflow.add_node("analisar_sentimento", self._analisar_sentimento)
+            workflow.add_node("consolidar_analise", self._consolidar_analise)
+            workflow.add_edge("inicializar", "categorizar")
+            workflow.add_edge("inicializar", "analisar_sentimento")
+            workflow.add_edge(
+                ["categorizar", "analisar_sentimento"], "consolidar_analise"
+            )
+            no_analise = "consolidar_analise"
+        else:
+            workflow.add_node("classificar", self._classificar)
+            workflow.add_edge("inicializar", "classificar")
+            no_analise = "classificar"
 
         # Roteamento direto após análise
         workflow.add_conditional_edges(
-            "analisar_sentimento",
+            no_analise,
             self._rotear_agente,
             {
                 "agent_tecnico": "agent_tecnico",
@@ -63,7 +104,7 @@ class WorkflowSuporteMultiAgente:
         # Ponto de entrada
         workflow.set_entry_point("inicializar")
 
-        return workflow.compile(checkpointer=checkpointer)
+        return workflow.compile(checkpointer=saver)
 
     # === FUNÇÕES DOS NÓS ===
 
@@ -76,23 +117,69 @@ class WorkflowSuporteMultiAgente:
         """Categoriza consulta usando tool de categorização diretamente"""
         print("🎯 Categorizando consulta...")
 
-        # Usar tool de categorização diretamente
         query = state["query"]
-        categoria = categorizar_consulta.invoke({"query": query})
+        categoria = self._classificar_local(query, "categoria")
+        if categoria is None:
+            # Usar tool de categorização diretamente
+            categoria = categorizar_consulta.invoke({"query": query})
 
         print(f"📂 Categoria identificada: {categoria}")
-        return {**state, "category": categoria}
+        # Atualização parcial: roda em paralelo com _analisar_sentimento
+        return {"category": categoria}
 
     def _analisar_sentimento(self, state: StateSuporteSimples) -> StateSuporteSimples:
         """Analisa sentimento usando tool de sentimento diretamente"""
         print("😊 Analisando sentimento...")
 
-        # Usar tool de sentimento diretamente
         query = state["query"]
-        sentimento = analisar_sentimento.invoke({"query": query})
+        sentimento = self._classificar_local(query, "sentimento")
+        if sentimento is None:
+            # Usar tool de sentimento diretamente
+            sentimento = analisar_sentimento.invoke({"query": query})
 
         print(f"💭 Sentimento detectado: {sentimento}")
-        return {**state, "sentiment": sentimento}
+        # Atualização parcial: roda em paralelo com _categorizar
+        return {"sentiment": sentimento}
+
+    def _consolidar_analise(self, state: StateSuporteSimples) -> Dict[str, Any]:
+        """Ponto de junção dos ramos de categorização e sentimento"""
+        print("🔗 Análise concluída")
+        return {}
+
+    def _classificar(self, state: StateSuporteSimples) -> StateSuporteSimples:
+        """Categoria e sentimento em uma única chamada com saída estruturada"""
+        print("🎯 Classificando consulta (categoria + sentimento)...")
+
+        query = state["query"]
+        categoria = self._classificar_local(query, "categoria")
+        sentimento = self._classificar_local(query, "sentimento")
+        if categoria is None or sentimento is None:
+            # Uma única chamada cobre o que o classificador local não resolveu
+            classificacao = classificar_consulta(query)
+            categoria = categoria or classificacao.category
+            sentimento = sentimento or classificacao.sentiment
+
+        print(f"📂 Categoria: {categoria} | 💭 Sentimento: {sentimento}")
+        return {**state, "category": categoria, "sentiment": sentimento}
+
+    def _classificar_local(self, query: str, tipo: str) -> Optional[str]:
+        """
+        Rótulo do classificador local ("categoria" ou "sentimento"), ou None
+        quando a confiança não basta e o LLM deve decidir.
+        """
+        if self.classificador is None:
+            return None
+        if tipo == "categoria":
+            previsao = self.classificador.categorizar(query)
+        else:
+            previsao = self.classificador.analisar_sentimento(query)
+        if not self.classificador.confiavel(previsao):
+            return None
+        print(
+            f"⚡ {tipo.capitalize()} local ({previsao.origem}, "
+            f"confiança {previsao.confianca:.2f}): {previsao.rotulo}"
+        )
+        return previsao.rotulo
 
     def _processar_tecnico(self, state: StateSuporteSimples) -> StateSuporteSimples:
         """Processa com ferramentas técnicas diretamente"""
@@ -211,7 +298,71 @@ class WorkflowSuporteMultiAgente:
 
         print(f"🎉 Processamento concluído por: {result['agent_used']}")
 
-        # Retornar resultado limpo
+        return self._formatar_resultado(result, thread_id)
+
+    def processar_lote(
+        self,
+        queries: List[str],
+        concurrency: int = 8,
+        usar_memoria: bool = False,
+        thread_prefix: str = "lote",
+    ) -> Dict[str, Any]:
+        """
+        Processa várias consultas com no máximo `concurrency` execuções simultâneas.
+
+        Um erro em uma consulta não interrompe o lote: o item correspondente
+        recebe o campo "erro". Por padrão usa o grafo sem checkpointer, já que
+        cada consulta do lote é independente.
+
+        Returns:
+            {"resultados": [...], "resumo": {...}} com um resultado por consulta,
+            na mesma ordem de `queries`
+        """
+        app = self.app if usar_memoria else self.app_lote
+        configs = self._configs_lote(len(queries), concurrency, thread_prefix)
+
+        inicio = time.perf_counter()
+        saidas = app.batch(
+            [criar_estado_inicial(q) for q in queries],
+            configs,
+            return_exceptions=True,
+        )
+        return self._consolidar_lote(queries, saidas, configs, inicio)
+
+    async def aprocessar_lote(
+        self,
+        queries: List[str],
+        concurrency: int = 8,
+        usar_memoria: bool = False,
+        thread_prefix: str = "lote",
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de `processar_lote`, usando `abatch`.
+        Com memória, usa um checkpointer aiosqlite sobre o mesmo banco: `self.app`
+        foi compilado com o SqliteSaver síncrono, que não suporta `abatch`, e não
+        pode ser usado aqui.
+        """
+        configs = self._configs_lote(len(queries), concurrency, thread_prefix)
+        estados = [criar_estado_inicial(q) for q in queries]
+
+        inicio = time.perf_counter()
+        if usar_memoria:
+            async with criar_checkpointer_async() as saver:
+                saidas = await self._criar_workflow(saver=saver).abatch(
+                    estados, configs, return_exceptions=True
+                )
+        else:
+            saidas = await self.app_lote.abatch(
+                estados, configs, return_exceptions=True
+            )
+        return self._consolidar_lote(queries, saidas, configs, inicio)
+
+    # === UTILITÁRIOS DE RESULTADO ===
+
+    def _formatar_resultado(
+        self, result: Dict[str, Any], thread_id: str
+    ) -> Dict[str, Any]:
+        """Retorna resultado limpo de uma execução do workflow"""
         return {
             "query": result["query"],
             "category": result["category"],
@@ -223,17 +374,80 @@ class WorkflowSuporteMultiAgente:
             "thread_id": thread_id,  # Incluir thread_id para referência
         }
 
+    def _configs_lote(
+        self, total: int, concurrency: int, thread_prefix: str
+    ) -> List[Dict[str, Any]]:
+        # Uma thread por consulta, numeradas a partir de 1
+        return [
+            {
+                "configurable": {"thread_id": f"{thread_prefix}_{i}"},
+                "max_concurrency": concurrency,
+            }
+            for i in range(1, total + 1)
+        ]
+
+    def _consolidar_lote(
+        self,
+        queries: List[str],
+        saidas: List[Any],
+        configs: List[Dict[str, Any]],
+        inicio: float,
+    ) -> Dict[str, Any]:
+        resultados = []
+        for query, saida, config in zip(queries, saidas, configs):
+            thread_id = config["configurable"]["thread_id"]
+            if isinstance(saida, Exception):
+                resultados.append(
+                    {"query": query, "erro": str(saida), "thread_id": thread_id}
+                )
+            else:
+                resultados.append(self._formatar_resultado(saida, thread_id))
+
+        resumo = resumir_lote(resultados, time.perf_counter() - inicio)
+        print(
+            f"📦 Lote concluído: {resumo['sucessos']}/{resumo['total']} consultas "
+            f"em {resumo['duracao_s']}s ({resumo['consultas_por_s']} consultas/s)"
+        )
+        return {"resultados": resultados, "resumo": resumo}
+
+
+def _valor(campo: Any) -> Any:
+    """Valor simples de um Enum (ou o próprio campo)"""
+    return getattr(campo, "value", campo)
+
+
+def resumir_lote(
+    resultados: List[Dict[str, Any]], duracao_s: Optional[float] = None
+) -> Dict[str, Any]:
+    """Distribuição de categoria/sentimento/agente, erros e throughput de um lote"""
+    ok = [r for r in resultados if "erro" not in r]
+    resumo = {
+        "total": len(resultados),
+        "sucessos": len(ok),
+        "erros": len(resultados) - len(ok),
+        "escalados": sum(1 for r in ok if r["escalated"]),
+        "por_categoria": dict(Counter(_valor(r["category"]) for r in ok)),
+        "por_sentimento": dict(Counter(_valor(r["sentiment"]) for r in ok)),
+        "por_agente": dict(Counter(_valor(r["agent_used"]) for r in ok)),
+    }
+    if duracao_s is not None:
+        resumo["duracao_s"] = round(duracao_s, 2)
+        resumo["consultas_por_s"] = (
+            round(len(resultados) / duracao_s, 2) if duracao_s > 0 else 0.0
+        )
+    return resumo
+
 
 # === FUNÇÃO HELPER ===
 
 
-def criar_workflow() -> WorkflowSuporteMultiAgente:
+def criar_workflow(modo_classificacao: str = "paralelo") -> WorkflowSuporteMultiAgente:
     """
     Função helper para criar e configurar o workflow
     Versão simplificada e estável
     """
     print("🔧 Criando workflow multi-agente refatorado...")
-    workflow = WorkflowSuporteMultiAgente()
+    workflow = WorkflowSuporteMultiAgente(modo_classificacao=modo_classificacao)
     print("✅ Workflow criado com agentes refatorados!")
 
     # Gerar visualização do grafo
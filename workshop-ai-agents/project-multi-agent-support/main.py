@@ -65,37 +65,39 @@ def main():
         },
     ]
 
-    # Processar cada caso
+    # Processar todos os casos em lote (cada caso em sua própria thread de memória)
+    lote = workflow.processar_lote(
+        [caso["query"] for caso in casos_teste],
+        concurrency=4,
+        usar_memoria=True,
+        thread_prefix="demo_caso",
+    )
+
+    # Verificar cada caso
     sucessos = 0
-    for i, caso in enumerate(casos_teste, 1):
+    for i, (caso, resultado) in enumerate(zip(casos_teste, lote["resultados"]), 1):
         print(f"\n📝 CASO {i}: {caso['query']}")
 
-        try:
-            # Criar thread única para cada caso (simula sessões diferentes)
-            thread_id = f"demo_caso_{i}"
-
-            resultado = workflow.processar_consulta(caso["query"], thread_id)
-
-            # Verificar se bateu com o esperado
-            esperado = caso["esperado"]
-            categoria_correta = resultado["category"] == esperado.get("categoria")
-            escalacao_correta = resultado["escalated"] == esperado.get(
-                "escalado", False
+        if "erro" in resultado:
+            print(f"❌ Erro no caso {i}: {resultado['erro']}")
+            continue
+
+        # Verificar se bateu com o esperado
+        esperado = caso["esperado"]
+        categoria_correta = resultado["category"] == esperado.get("categoria")
+        escalacao_correta = resultado["escalated"] == esperado.get("escalado", False)
+
+        if categoria_correta and escalacao_correta:
+            print("✅ Resultado correto!")
+            sucessos += 1
+        else:
+            print(
+                f"⚠️ Esperado: {esperado.get('categoria')}, Obtido: {resultado['category']}"
             )
 
-            if categoria_correta and escalacao_correta:
-                print("✅ Resultado correto!")
-                sucessos += 1
-            else:
-                print(
-                    f"⚠️ Esperado: {esperado.get('categoria')}, Obtido: {resultado['category']}"
-                )
-
-        except Exception as e:
-            print(f"❌ Erro no caso {i}: {e}")
-
     # Resumo final
     print(f"\n🎉 Concluído: {sucessos}/{len(casos_teste)} casos corretos")
+    print(f"📊 Resumo do lote: {lote['resumo']}")
     if os.getenv("LANGSMITH_API_KEY"):
         print(
             f"🔍 Traces: https://smith.langchain.com (projeto: {os.environ['LANGCHAIN_PROJECT']})"
@@ -6,7 +6,12 @@ Implementação minimalista seguindo padrão oficial
 from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.store.memory import InMemoryStore
 from langchain_core.messages import HumanMessage
+from contextlib import asynccontextmanager, contextmanager
+from collections import Counter
+from typing import Dict, Optional, Tuple
+import atexit
 import sqlite3
+import threading
 import os
 
 # === CONFIGURAÇÃO GLOBAL DE MEMÓRIA ===
@@ -18,16 +23,231 @@ in_memory_store = InMemoryStore()
 db_path = "src/memory/conversas.db"
 os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
 
+# Quantos checkpoints manter por thread_id (None = sem limite)
+MANTER_CHECKPOINTS_POR_THREAD = int(os.getenv("MANTER_CHECKPOINTS_POR_THREAD", "10"))
+# A compactação de uma thread roda a cada N gravações nela
+COMPACTAR_A_CADA = int(os.getenv("COMPACTAR_A_CADA", "10"))
+
+
+# === CONFIGURAÇÃO DO SQLITE ===
+
+
+def configurar_conexao(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    WAL permite leituras simultâneas a uma escrita; synchronous=NORMAL é seguro
+    em WAL e evita um fsync por commit; busy_timeout espera em vez de falhar
+    quando outra conexão está gravando.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+_SQL_COMPACTAR_THREAD = """
+    DELETE FROM checkpoints
+    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+        SELECT checkpoint_id FROM checkpoints
+        WHERE thread_id = ? AND checkpoint_ns = ?
+        ORDER BY checkpoint_id DESC LIMIT ?
+    )
+"""
+
+_SQL_COMPACTAR_TUDO = """
+    DELETE FROM checkpoints
+    WHERE (thread_id, checkpoint_ns, checkpoint_id) IN (
+        SELECT thread_id, checkpoint_ns, checkpoint_id FROM (
+            SELECT thread_id, checkpoint_ns, checkpoint_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY thread_id, checkpoint_ns
+                       ORDER BY checkpoint_id DESC
+                   ) AS posicao
+            FROM checkpoints
+        ) WHERE posicao > ?
+    )
+"""
+
+_SQL_REMOVER_WRITES_DA_THREAD = """
+    DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ?
+    AND checkpoint_id NOT IN (
+        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+    )
+"""
+
+# Writes pendentes de checkpoints que não existem mais
+_SQL_REMOVER_WRITES_ORFAOS = """
+    DELETE FROM writes WHERE NOT EXISTS (
+        SELECT 1 FROM checkpoints c
+        WHERE c.thread_id = writes.thread_id
+          AND c.checkpoint_ns = writes.checkpoint_ns
+          AND c.checkpoint_id = writes.checkpoint_id
+    )
+"""
+
+
+class _Retencao:
+    """
+    Conta as gravações por (thread_id, checkpoint_ns) e diz quando compactar.
+    Compartilhada entre os checkpointers síncrono e assíncrono do mesmo banco,
+    já que o assíncrono é recriado a cada lote.
+    """
+
+    def __init__(self):
+        self._gravacoes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def registrar(self, config, compactar_a_cada: int) -> Optional[tuple]:
+        """Registra uma gravação; retorna a chave da thread a cada `compactar_a_cada`"""
+        configurable = config["configurable"]
+        chave = (configurable["thread_id"], configurable.get("checkpoint_ns", ""))
+        with self._lock:
+            self._gravacoes[chave] += 1
+            return chave if self._gravacoes[chave] % max(compactar_a_cada, 1) == 0 else None
+
+
+_retencoes: Dict[str, _Retencao] = {}
+_retencoes_lock = threading.Lock()
+
+
+def _retencao(caminho: str) -> _Retencao:
+    with _retencoes_lock:
+        return _retencoes.setdefault(os.path.abspath(caminho), _Retencao())
+
+
+class SqliteSaverPorThread(SqliteSaver):
+    """
+    SqliteSaver com uma conexão por thread, em vez de uma única conexão
+    compartilhada: leituras de threads diferentes (ex.: `processar_lote`) rodam
+    em paralelo sobre o WAL. As gravações continuam passando pelo lock do
+    SqliteSaver, pois o SQLite só aceita um escritor por vez de qualquer forma.
+
+    Conexões de threads que já terminaram são fechadas na próxima conexão
+    aberta; `close()` fecha todas.
+
+    Com `manter_por_thread`, os checkpoints mais antigos de cada thread_id são
+    removidos periodicamente (os ids de checkpoint são ordenados no tempo).
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        manter_por_thread: Optional[int] = MANTER_CHECKPOINTS_POR_THREAD,
+        compactar_a_cada: int = COMPACTAR_A_CADA,
+        **kwargs,
+    ):
+        self.caminho = caminho
+        self.manter_por_thread = manter_por_thread
+        self.compactar_a_cada = compactar_a_cada
+        self.retencao = _retencao(caminho)
+        self._local = threading.local()
+        # thread ident -> (thread, conexão), para fechar as conexões depois
+        self._conexoes: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._conexoes_lock = threading.Lock()
+        # Conexão da thread de criação, usada também para criar as tabelas
+        super().__init__(self._conexao(), **kwargs)
+        self.setup()
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = configurar_conexao(
+                sqlite3.connect(self.caminho, timeout=30, check_same_thread=False)
+            )
+            self._local.conn = conn
+            with self._conexoes_lock:
+                self._fechar_conexoes_mortas()
+                self._conexoes[threading.get_ident()] = (threading.current_thread(), conn)
+        return conn
+
+    def _fechar_conexoes_mortas(self) -> None:
+        for ident, (thread, conn) in list(self._conexoes.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._conexoes[ident]
+
+    def close(self) -> None:
+        """Fecha as conexões de todas as threads"""
+        with self._conexoes_lock:
+            for _, conn in self._conexoes.values():
+                conn.close()
+            self._conexoes.clear()
+        self._local = threading.local()
+
+    @contextmanager
+    def cursor(self, transaction: bool = True):
+        conn = self._conexao()
+        if transaction:
+            with self.lock:
+                cur = conn.cursor()
+                try:
+                    yield cur
+                finally:
+                    conn.commit()
+                    cur.close()
+        else:
+            # Só leitura: a conexão é exclusiva desta thread, não precisa do lock
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        resultado = super().put(config, checkpoint, metadata, new_versions)
+        if self.manter_por_thread:
+            chave = self.retencao.registrar(config, self.compactar_a_cada)
+            if chave:
+                self.compactar_thread(*chave)
+        return resultado
+
+    def compactar_thread(self, thread_id: str, checkpoint_ns: str = "") -> int:
+        """Mantém só os `manter_por_thread` checkpoints mais recentes da thread"""
+        with self.cursor() as cur:
+            cur.execute(
+                _SQL_COMPACTAR_THREAD,
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.manter_por_thread),
+            )
+            removidos = cur.rowcount
+            cur.execute(
+                _SQL_REMOVER_WRITES_DA_THREAD,
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+            )
+        return removidos
+
+
+def compactar_checkpoints(
+    caminho: str = db_path,
+    manter_por_thread: int = MANTER_CHECKPOINTS_POR_THREAD,
+    vacuum: bool = False,
+) -> int:
+    """
+    Compactação completa do banco: mantém os `manter_por_thread` checkpoints mais
+    recentes de cada thread_id, remove writes órfãos e trunca o WAL.
+    `vacuum=True` devolve o espaço liberado ao sistema de arquivos (bloqueia o banco).
+
+    Returns:
+        int: número de checkpoints removidos
+    """
+    conn = configurar_conexao(sqlite3.connect(caminho, timeout=30))
+    try:
+        removidos = conn.execute(_SQL_COMPACTAR_TUDO, (manter_por_thread,)).rowcount
+        conn.execute(_SQL_REMOVER_WRITES_ORFAOS)
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    print(f"🧹 {removidos} checkpoints antigos removidos")
+    return removidos
+
 
 # Memória de curto prazo - persiste dentro de uma thread/conversa
-# Criar conexão SQLite explicitamente
 def criar_checkpointer():
     """Cria checkpointer SQLite de forma segura"""
     try:
-        # Método mais seguro para criar SqliteSaver
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        checkpointer = SqliteSaver(conn)
-        return checkpointer
+        return SqliteSaverPorThread(db_path)
     except Exception as e:
         print(f"⚠️ Erro ao criar SqliteSaver: {e}")
         print("🔄 Usando MemorySaver como fallback")
@@ -37,6 +257,63 @@ def criar_checkpointer():
 
 
 checkpointer = criar_checkpointer()
+if isinstance(checkpointer, SqliteSaverPorThread):
+    atexit.register(checkpointer.close)
+
+
+def _criar_saver_async(conn, caminho: str, manter_por_thread: Optional[int], compactar_a_cada: int):
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    class AsyncSqliteSaverComRetencao(AsyncSqliteSaver):
+        """AsyncSqliteSaver com a mesma retenção por thread do SqliteSaverPorThread"""
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            resultado = await super().aput(config, checkpoint, metadata, new_versions)
+            if manter_por_thread:
+                chave = _retencao(caminho).registrar(config, compactar_a_cada)
+                if chave:
+                    await self.acompactar_thread(*chave)
+            return resultado
+
+        async def acompactar_thread(self, thread_id: str, checkpoint_ns: str = "") -> int:
+            """Mantém só os `manter_por_thread` checkpoints mais recentes da thread"""
+            async with self.lock:
+                cur = await self.conn.execute(
+                    _SQL_COMPACTAR_THREAD,
+                    (thread_id, checkpoint_ns, thread_id, checkpoint_ns, manter_por_thread),
+                )
+                removidos = cur.rowcount
+                await self.conn.execute(
+                    _SQL_REMOVER_WRITES_DA_THREAD,
+                    (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+                )
+                await self.conn.commit()
+            return removidos
+
+    return AsyncSqliteSaverComRetencao(conn)
+
+
+@asynccontextmanager
+async def criar_checkpointer_async(
+    caminho: str = db_path,
+    manter_por_thread: Optional[int] = MANTER_CHECKPOINTS_POR_THREAD,
+    compactar_a_cada: int = COMPACTAR_A_CADA,
+):
+    """
+    Checkpointer assíncrono (aiosqlite) para `ainvoke`/`abatch`, que o
+    SqliteSaver síncrono não suporta. A conexão pertence ao event loop atual,
+    por isso é aberta e fechada a cada uso. Aplica a mesma retenção do
+    SqliteSaverPorThread, com a contagem de gravações compartilhada entre os dois.
+    """
+    import aiosqlite
+
+    async with aiosqlite.connect(caminho, timeout=30) as conn:
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("PRAGMA busy_timeout=5000")
+        saver = _criar_saver_async(conn, caminho, manter_por_thread, compactar_a_cada)
+        await saver.setup()
+        yield saver
 
 # === FUNÇÃO PARA CONFIGURAR MEMÓRIA ===
 